@@ -73,6 +73,8 @@ if command -v brew &>/dev/null; then
     echo -e "${GREEN}[OK]${NC} Homebrew already installed"
     echo -e "${GREEN}[INFO]${NC} Updating Homebrew..."
     brew update
+    # Let setup.py skip its own update on the same run
+    mkdir -p ~/.cache/mac-bootstrap && touch ~/.cache/mac-bootstrap/brew_update.stamp
 else
     echo -e "${YELLOW}[INSTALL]${NC} Installing Homebrew..."
     /bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"
@@ -97,26 +99,6 @@ else
 fi
 echo ""
 
-# Check for pip
-echo -e "${GREEN}[INFO]${NC} Checking for pip..."
-if command -v pip3 &>/dev/null; then
-    echo -e "${GREEN}[OK]${NC} pip already installed"
-else
-    echo -e "${YELLOW}[INSTALL]${NC} Installing pip..."
-    python3 -m ensurepip --upgrade
-fi
-echo ""
-
-# Install Python requirements
-echo -e "${GREEN}[INFO]${NC} Installing Python dependencies..."
-if [[ -f "requirements.txt" ]]; then
-    pip3 install -r requirements.txt
-    echo -e "${GREEN}[OK]${NC} Python dependencies installed"
-else
-    echo -e "${YELLOW}[WARNING]${NC} requirements.txt not found, skipping Python dependencies"
-fi
-echo ""
-
 # Make scripts executable
 echo -e "${GREEN}[INFO]${NC} Making scripts executable..."
 chmod +x setup.py
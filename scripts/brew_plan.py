@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Homebrew Install Planner
+
+Plans package installs from one dependency graph instead of probing and
+installing each configured package in isolation:
+
+- `brew info --json=v2` is queried for all configured formulae at once, then
+  once per level of dependencies not seen yet; casks take one more call
+- Configured packages that are already installed (including formulae that
+  came in as a dependency of another package) are dropped without a
+  `brew list` per package
+- Missing formulae are ordered dependencies first, most widely shared
+  first, so every bottle is poured once and reused by its dependents
+- Missing formulae are split into independent subtrees (no missing
+  dependency in common) that can be downloaded in parallel without two
+  downloads fetching the same bottle
+- A name brew does not know fails the whole `brew info` call, so it is
+  dropped and the rest queried again; the plan lists it as unknown
+
+The planner itself works on parsed `brew info` JSON, so it can be run
+against canned output:
+
+Usage:
+    ./brew_plan.py                    # Show the plan for the resolved config
+    ./brew_plan.py --json             # Print the plan as JSON
+    ./brew_plan.py --formula-json formulae.json --cask-json casks.json
+                                      # Plan from saved `brew info --json=v2` output
+"""
+
+import argparse
+import heapq
+import json
+import re
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, load_config, run_command
+
+
+# Dependency levels queried before giving up (Homebrew's graphs are much shallower)
+MAX_DEPTH = 20
+
+# How `brew info` reports a name it does not know (it stops at the first one)
+UNKNOWN_NAME_RE = re.compile(r'No available formula(?: or cask)? with the name "([^"]+)"'
+                             r"|Cask '([^']+)' is unavailable")
+
+
+def short_name(name):
+    """Strip the tap prefix from a package name (e.g. hashicorp/tap/terraform -> terraform)"""
+    return name.rsplit('/', 1)[-1]
+
+
+def unknown_names(stderr, names):
+    """Names from a failed `brew info` call that brew reported as unknown"""
+    reported = {short_name(next(group for group in match.groups() if group))
+                for match in UNKNOWN_NAME_RE.finditer(stderr or '')}
+    return [name for name in names if short_name(name) in reported]
+
+
+def brew_info(names, cask=False):
+    """
+    Query `brew info --json=v2` for several packages in one call
+
+    brew fails the whole call at the first unknown name; such names are
+    dropped and the rest queried again, so they are simply missing from the
+    result (and planned as unknown).
+
+    Returns:
+        list: Formula or cask entries, or None if the query failed
+    """
+    names = list(names)
+    while names:
+        result = run_command(["brew", "info", "--json=v2", "--cask" if cask else "--formula", *names],
+                             check=False)
+        if not result:
+            return None
+        if result.returncode == 0:
+            try:
+                data = json.loads(result.stdout or '{}')
+            except json.JSONDecodeError:
+                return None
+            return data.get('casks' if cask else 'formulae', [])
+        unknown = unknown_names(result.stderr, names)
+        if not unknown:
+            return None
+        names = [name for name in names if name not in unknown]
+    return []
+
+
+class FormulaIndex:
+    """Formula entries looked up by name, full name, alias or old name"""
+
+    def __init__(self, entries=()):
+        self.entries = {}
+        self._names = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        name = entry['name']
+        self.entries[name] = entry
+        for alias in [name, entry.get('full_name')] + entry.get('aliases', []) + entry.get('oldnames', []):
+            if alias:
+                self._names[alias] = name
+                self._names[short_name(alias)] = name
+
+    def resolve(self, name):
+        """Get the canonical name of a formula (None if unknown)"""
+        return self._names.get(name) or self._names.get(short_name(name))
+
+    def dependencies(self, name):
+        """Runtime dependencies of a formula (canonical names where known)"""
+        entry = self.entries.get(name) or {}
+        return [self.resolve(dep) or short_name(dep) for dep in entry.get('dependencies', [])]
+
+    def is_installed(self, name):
+        entry = self.entries.get(name)
+        return bool(entry and entry.get('installed'))
+
+
+def load_formula_graph(names, query=brew_info):
+    """
+    Fetch the dependency closure of formulae, one query per dependency level
+
+    Args:
+        names: Configured formula names
+        query: Function returning `brew info` entries for a list of names
+
+    Returns:
+        FormulaIndex, or None if a query failed
+    """
+    index = FormulaIndex()
+    asked = set()
+    pending = list(dict.fromkeys(names))
+    for _ in range(MAX_DEPTH):
+        if not pending:
+            break
+        entries = query(pending)
+        if entries is None:
+            return None
+        asked.update(pending)
+        for entry in entries:
+            index.add(entry)
+        pending = sorted({dep for name in index.entries for dep in index.dependencies(name)
+                          if index.resolve(dep) is None and dep not in asked})
+    return index
+
+
+def _closure(index, name, missing):
+    """Missing formulae a formula needs, including itself"""
+    seen = set()
+    stack = [name]
+    while stack:
+        current = stack.pop()
+        if current in seen or current not in missing:
+            continue
+        seen.add(current)
+        stack.extend(index.dependencies(current))
+    return seen
+
+
+def plan_formulae(formulae, index):
+    """
+    Plan formula installs from a dependency graph
+
+    Args:
+        formulae: Configured formula names
+        index: FormulaIndex covering their dependency closure
+
+    Returns:
+        dict: The plan:
+            order:        missing formulae to install, dependencies first
+            dependencies: missing formulae pulled in only as dependencies
+            groups:       configured formulae split into independent subtrees
+            satisfied:    configured formulae already installed
+            unknown:      configured names brew does not know
+    """
+    explicit = {}
+    satisfied = []
+    unknown = []
+    for name in formulae:
+        canonical = index.resolve(name)
+        if canonical is None:
+            unknown.append(name)
+        elif index.is_installed(canonical):
+            satisfied.append(name)
+        else:
+            explicit.setdefault(canonical, name)
+
+    # Every formula that has to be poured for the configured ones
+    not_installed = {name for name in index.entries if not index.is_installed(name)}
+    missing = set()
+    for canonical in explicit:
+        missing |= _closure(index, canonical, not_installed)
+
+    # Kahn's algorithm; among ready formulae the most depended-on go first
+    dependents = {name: [] for name in missing}
+    waiting = {}
+    for name in missing:
+        deps = [dep for dep in index.dependencies(name) if dep in missing]
+        waiting[name] = len(deps)
+        for dep in deps:
+            dependents[dep].append(name)
+    ready = [(-len(dependents[name]), name) for name in missing if not waiting[name]]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, name = heapq.heappop(ready)
+        order.append(name)
+        for dependent in dependents[name]:
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                heapq.heappush(ready, (-len(dependents[dependent]), dependent))
+    # A dependency cycle should not happen; install whatever is left last
+    order += sorted(missing - set(order))
+
+    # Independent subtrees: configured formulae connected by a shared missing dependency
+    groups = []
+    for canonical in (name for name in order if name in explicit):
+        closure = _closure(index, canonical, missing)
+        overlapping = [group for group in groups if group[1] & closure]
+        merged = ([explicit[canonical]], closure)
+        for group in overlapping:
+            groups.remove(group)
+            merged = (group[0] + merged[0], group[1] | merged[1])
+        groups.append(merged)
+
+    return {
+        'order': [explicit.get(name, name) for name in order],
+        'dependencies': [name for name in order if name not in explicit],
+        'groups': [names for names, _ in groups],
+        'satisfied': satisfied,
+        'unknown': unknown,
+    }
+
+
+def plan_casks(casks, entries):
+    """
+    Split casks into missing and already installed
+
+    Returns:
+        tuple: (missing names, installed names, unknown names)
+    """
+    by_token = {}
+    for entry in entries:
+        by_token[entry['token']] = entry
+        by_token[entry.get('full_token', entry['token'])] = entry
+        for old in entry.get('old_tokens', []):
+            by_token[old] = entry
+    missing, installed, unknown = [], [], []
+    for cask in casks:
+        entry = by_token.get(cask) or by_token.get(short_name(cask))
+        if entry is None:
+            unknown.append(cask)
+        elif entry.get('installed'):
+            installed.append(cask)
+        else:
+            missing.append(cask)
+    return missing, installed, unknown
+
+
+def plan_installs(formulae, casks, formula_query=brew_info, cask_entries=None):
+    """
+    Plan the installs for configured formulae and casks
+
+    Args:
+        formulae: Configured formula names
+        casks: Configured cask names (fonts and apps)
+        formula_query: Function returning `brew info` entries for formula names
+        cask_entries: `brew info --cask` entries (queried if None)
+
+    Returns:
+        dict: plan_formulae() plus `casks` (missing), `casks_installed` and
+        `casks_unknown`, or None if Homebrew could not be queried
+    """
+    index = load_formula_graph(formulae, formula_query) if formulae else FormulaIndex()
+    if index is None:
+        return None
+    if cask_entries is None:
+        cask_entries = brew_info(casks, cask=True)
+        if cask_entries is None:
+            return None
+
+    plan = plan_formulae(formulae, index)
+    plan['casks'], plan['casks_installed'], plan['casks_unknown'] = plan_casks(casks, cask_entries)
+    return plan
+
+
+def canned_query(entries):
+    """Formula query answered from saved `brew info` entries"""
+    index = FormulaIndex(entries)
+
+    def query(names):
+        return [index.entries[index.resolve(name)] for name in names if index.resolve(name)]
+    return query
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Plan Homebrew installs from the dependency graph")
+    parser.add_argument("--json", action="store_true", help="Print the plan as JSON")
+    parser.add_argument("--formula-json", metavar="FILE",
+                        help="Saved `brew info --json=v2 --formula` output to plan from")
+    parser.add_argument("--cask-json", metavar="FILE",
+                        help="Saved `brew info --json=v2 --cask` output to plan from")
+    args = parser.parse_args()
+
+    config = load_config()
+    formulae = config.get('brew_formulae') or []
+    casks = (config.get('brew_fonts') or []) + (config.get('brew_casks') or [])
+
+    formula_query = brew_info
+    cask_entries = None
+    if args.formula_json:
+        with open(args.formula_json) as f:
+            formula_query = canned_query(json.load(f).get('formulae', []))
+    if args.cask_json:
+        with open(args.cask_json) as f:
+            cask_entries = json.load(f).get('casks', [])
+
+    plan = plan_installs(formulae, casks, formula_query, cask_entries)
+    if plan is None:
+        Logger.error("Could not query Homebrew")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(plan, indent=2))
+        return
+
+    Logger.info(f"Already installed: {len(plan['satisfied'])} formulae, {len(plan['casks_installed'])} casks")
+    Logger.info(f"Install order ({len(plan['order'])} formulae, "
+                f"{len(plan['dependencies'])} of them dependencies):")
+    for name in plan['order']:
+        print(f"  {name}{'' if name not in plan['dependencies'] else '  (dependency)'}")
+    Logger.info(f"Independent download groups: {len(plan['groups'])}")
+    for group in plan['groups']:
+        print(f"  {', '.join(group)}")
+    if plan['casks']:
+        Logger.info(f"Casks to install: {', '.join(plan['casks'])}")
+    for name in plan['unknown'] + plan['casks_unknown']:
+        Logger.warning(f"Unknown to Homebrew: {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Zipapp Builder
+
+Packages the tool as one executable Python zip application, so a fresh Mac
+can run the setup with the stock /usr/bin/python3 and no pip step:
+
+    ./build_zipapp.py -o mac-bootstrap.pyz
+    python3 mac-bootstrap.pyz --brew-only      # Same arguments as setup.py
+
+The archive holds setup.py, the scripts, dotfiles, profiles and
+config.yaml, plus the resolved configuration of every profile precompiled
+to JSON, so the target machine never parses YAML. On first run the archive
+unpacks itself into ~/.cache/mac-bootstrap/app/<digest>/ (the scripts run
+as separate processes and need real files) and then runs setup.py from
+there; later runs of the same archive start straight away.
+
+Edit config.yaml before building: the archive carries a copy of it.
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import sys
+import tempfile
+import zipapp
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, compile_config, format_bytes, get_project_root, list_profiles
+
+
+# Files and directories packaged into the archive
+APP_PATHS = ['setup.py', 'config.yaml', 'scripts', 'dotfiles', 'profiles']
+# Precompiled configs inside the archive (copied into CONFIG_CACHE_DIR)
+CONFIG_CACHE_MEMBER = 'config-cache'
+
+MAIN_TEMPLATE = '''\
+"""mac-bootstrap zip application: unpack once, then run setup.py"""
+
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+APP_DIGEST = {digest!r}
+STATE_DIR = Path.home() / '.cache' / 'mac-bootstrap'
+
+
+def unpack(archive):
+    """Extract the archive into the app directory (once per build)"""
+    target = STATE_DIR / 'app' / APP_DIGEST
+    if (target / '.complete').exists():
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=target.parent))
+    with zipfile.ZipFile(archive) as zf:
+        zf.extractall(staging)
+    for script in [staging / 'setup.py', *(staging / 'scripts').glob('*.py')]:
+        script.chmod(0o755)
+    (staging / '.complete').touch()
+    try:
+        staging.rename(target)
+    except OSError:
+        # Another run unpacked the same build first
+        shutil.rmtree(staging, ignore_errors=True)
+
+    cache_dir = STATE_DIR / 'config'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for compiled in (target / {cache_member!r}).glob('*.json'):
+        if not (cache_dir / compiled.name).exists():
+            shutil.copyfile(compiled, cache_dir / compiled.name)
+    return target
+
+
+def main():
+    target = unpack(os.path.dirname(os.path.abspath(__file__)))
+    setup = str(target / 'setup.py')
+    os.execv(sys.executable, [sys.executable, setup, *sys.argv[1:]])
+
+
+main()
+'''
+
+
+def _ignore_caches(directory, names):
+    return [name for name in names if name == '__pycache__' or name.endswith('.pyc')]
+
+
+def stage_app(staging):
+    """
+    Copy the application and its precompiled configs into a directory
+
+    Returns:
+        str: Content digest of the staged files
+    """
+    project_root = get_project_root()
+    for name in APP_PATHS:
+        source = project_root / name
+        if source.is_dir():
+            shutil.copytree(source, staging / name, ignore=_ignore_caches)
+        elif source.is_file():
+            shutil.copy2(source, staging / name)
+
+    cache_dir = staging / CONFIG_CACHE_MEMBER
+    cache_dir.mkdir()
+    # None is the plain `setup.py` run; every profile is precompiled as well
+    for profile in [None] + list_profiles():
+        key, config = compile_config(profile)
+        with open(cache_dir / f"{key}.json", 'w') as f:
+            json.dump(config, f, default=str)
+
+    digest = hashlib.sha256()
+    for path in sorted(staging.rglob('*')):
+        if path.is_file():
+            digest.update(path.relative_to(staging).as_posix().encode() + b'\0')
+            digest.update(path.read_bytes() + b'\0')
+    return digest.hexdigest()[:16]
+
+
+def build_zipapp(output):
+    """
+    Build the zip application
+
+    Args:
+        output: Path of the .pyz archive to write
+
+    Returns:
+        Path: The written archive
+    """
+    output = Path(output).resolve()
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp)
+        digest = stage_app(staging)
+        (staging / '__main__.py').write_text(
+            MAIN_TEMPLATE.format(digest=digest, cache_member=CONFIG_CACHE_MEMBER))
+        zipapp.create_archive(staging, output, interpreter='/usr/bin/env python3', compressed=True)
+
+    Logger.success(f"Zipapp written to {output} ({format_bytes(output.stat().st_size)}, build {digest})")
+    return output
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Package the tool as a single zipapp")
+    parser.add_argument(
+        "-o", "--output",
+        default="mac-bootstrap.pyz",
+        help="Archive to write (default: mac-bootstrap.pyz)"
+    )
+    args = parser.parse_args()
+
+    try:
+        build_zipapp(args.output)
+    except OSError as e:
+        Logger.error(f"Failed to build zipapp: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Cask App Index
+
+Maps each configured cask to the .app bundles it installs, from one
+`brew info --json=v2 --cask` call for all casks, so the Dock step and the
+drift checker resolve `dock.apps` names to real bundle paths instead of
+guessing them from display names (the iterm2 cask installs iTerm.app, not
+iTerm2.app).
+
+An app can be referred to by its cask token (visual-studio-code), the
+cask's name (Visual Studio Code) or the bundle name (iTerm). The index is
+kept in ~/.cache/mac-bootstrap/cask-index.json and rebuilt when it is
+older than `homebrew.cask_index_ttl_hours` or misses a configured cask.
+install_packages.py and check_drift.py refresh it for free from the
+`brew info` output they already fetch.
+
+Usage:
+    ./cask_index.py             # Show the app paths of the configured casks
+    ./cask_index.py --refresh   # Rebuild the index first
+"""
+
+import argparse
+import json
+import os
+import shlex
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, STATE_DIR, command_exists, load_config
+from brew_plan import brew_info, short_name
+
+
+CASK_INDEX_FILE = STATE_DIR / 'cask-index.json'
+# Bump when the index layout changes to ignore older files
+CASK_INDEX_VERSION = 1
+DEFAULT_TTL_HOURS = 24
+DEFAULT_APPDIR = '/Applications'
+
+
+def cask_appdir():
+    """Get the directory casks install apps into (honours --appdir in HOMEBREW_CASK_OPTS)"""
+    options = shlex.split(os.environ.get('HOMEBREW_CASK_OPTS', ''))
+    for i, option in enumerate(options):
+        if option.startswith('--appdir='):
+            return os.path.expanduser(option.split('=', 1)[1])
+        if option == '--appdir' and i + 1 < len(options):
+            return os.path.expanduser(options[i + 1])
+    return DEFAULT_APPDIR
+
+
+def app_artifacts(entry, appdir=None):
+    """
+    Get the app bundle paths a cask installs
+
+    Args:
+        entry: A `brew info --json=v2 --cask` entry
+        appdir: Directory apps are installed into (default: cask_appdir())
+
+    Returns:
+        list: Absolute .app paths
+    """
+    appdir = Path(appdir or cask_appdir())
+    paths = []
+    for artifact in entry.get('artifacts') or []:
+        if not isinstance(artifact, dict) or 'app' not in artifact:
+            continue
+        for item in artifact['app']:
+            if isinstance(item, str):
+                paths.append(str(appdir / Path(item).name))
+            elif isinstance(item, dict) and item.get('target') and paths:
+                # {"target": ...} renames the app listed just before it
+                paths[-1] = str(appdir / os.path.expanduser(item['target']))
+    return paths
+
+
+def configured_casks(config):
+    """Casks that may install apps (fonts do not)"""
+    return (config.get('brew_casks') or []) + (config.get('personal_apps') or [])
+
+
+class CaskIndex:
+    """Cask tokens mapped to their names and app bundle paths"""
+
+    def __init__(self, casks=None, created=None):
+        self.casks = casks or {}
+        self.created = created if created is not None else time.time()
+        self._lookup = None
+
+    @classmethod
+    def from_entries(cls, entries, appdir=None):
+        """Build an index from `brew info --json=v2 --cask` entries"""
+        casks = {}
+        for entry in entries:
+            casks[entry['token']] = {
+                'names': entry.get('name') or [],
+                'apps': app_artifacts(entry, appdir),
+                'installed': entry.get('installed'),
+            }
+        return cls(casks)
+
+    @classmethod
+    def load(cls, path=None):
+        """Read the stored index (None if missing, unreadable or outdated)"""
+        try:
+            with open(path or CASK_INDEX_FILE) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != CASK_INDEX_VERSION:
+            return None
+        return cls(data.get('casks') or {}, data.get('created', 0))
+
+    def save(self, path=None):
+        """Write the index (failures only warn: the index is a cache)"""
+        path = Path(path or CASK_INDEX_FILE)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump({'version': CASK_INDEX_VERSION, 'created': self.created, 'casks': self.casks}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            Logger.warning(f"Could not save the cask index: {e}")
+
+    def merge(self, other):
+        """Add or replace the casks of another index; the result is as new as `other`"""
+        self.casks.update(other.casks)
+        self.created = other.created
+        self._lookup = None
+        return self
+
+    def is_fresh(self, ttl_hours, casks=()):
+        """Whether the index is younger than the TTL and covers the given casks"""
+        if time.time() - self.created > ttl_hours * 3600:
+            return False
+        return all(short_name(cask) in self.casks for cask in casks)
+
+    def app_path(self, name):
+        """
+        Resolve an app by cask token, cask name or bundle name
+
+        Returns:
+            str: Path of the installed app bundle, or None
+        """
+        if self._lookup is None:
+            self._lookup = {}
+            for token, info in self.casks.items():
+                bundles = [Path(app).stem for app in info['apps']]
+                for key in [token] + info['names'] + bundles:
+                    self._lookup.setdefault(key.lower(), []).extend(info['apps'])
+        for path in self._lookup.get(name.lower(), []):
+            if Path(path).exists():
+                return path
+        return None
+
+
+def load_cask_index(casks, ttl_hours=DEFAULT_TTL_HOURS, refresh=False):
+    """
+    Get the cask index, rebuilding it with one `brew info` call if it is
+    stale or misses one of the casks
+
+    Args:
+        casks: Configured cask tokens
+        ttl_hours: Maximum age of the stored index
+        refresh: Rebuild even if the stored index is fresh
+
+    Returns:
+        CaskIndex: Possibly empty if Homebrew is unavailable
+    """
+    index = CaskIndex.load()
+    if index and not refresh and index.is_fresh(ttl_hours, casks):
+        return index
+    if not casks or not command_exists("brew"):
+        return index or CaskIndex()
+
+    entries = brew_info([short_name(cask) for cask in casks], cask=True)
+    if entries is None:
+        # An unknown token fails the whole query; keep what is known
+        Logger.warning("Could not query Homebrew for cask apps; using the stored index")
+        return index or CaskIndex()
+    return update_cask_index(entries, index)
+
+
+def update_cask_index(entries, index=None):
+    """
+    Store cask entries fetched elsewhere (e.g. by the install planner)
+
+    Returns:
+        CaskIndex: The updated index
+    """
+    index = (index or CaskIndex.load() or CaskIndex()).merge(CaskIndex.from_entries(entries))
+    index.save()
+    return index
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Map configured casks to their app bundles")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild the index from Homebrew")
+    args = parser.parse_args()
+
+    config = load_config()
+    casks = configured_casks(config)
+    ttl_hours = (config.get('homebrew') or {}).get('cask_index_ttl_hours', DEFAULT_TTL_HOURS)
+    index = load_cask_index(casks, ttl_hours, refresh=args.refresh)
+
+    for cask in casks:
+        info = index.casks.get(short_name(cask))
+        if info is None:
+            Logger.warning(f"  {cask}: not in the index")
+            continue
+        apps = [f"{app}{'' if Path(app).exists() else ' (not installed)'}" for app in info['apps']]
+        print(f"  {cask:<24} {', '.join(apps) or '(no app)'}")
+    age = time.time() - index.created
+    Logger.info(f"Index: {CASK_INDEX_FILE} ({len(index.casks)} casks, built {int(age // 60)} minutes ago)")
+
+
+if __name__ == "__main__":
+    main()
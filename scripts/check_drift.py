@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Drift Detection Script
+
+Compares the machine's actual state to config.yaml and reports drift as
+JSON. Each probe is a single cheap snapshot:
+
+- brew:     one `brew info --json=v2 --installed` inventory
+- defaults: one `defaults export` per preference domain
+- dotfiles: SHA-256 of each deployed dotfile
+
+Usage:
+    ./check_drift.py                  # Check once, exit 1 if drift was found
+    ./check_drift.py --remediate      # Fix only the drifted items
+    ./check_drift.py --watch          # Keep checking (see drift: in config.yaml)
+    ./check_drift.py --install-agent  # Run --watch as a launchd agent at login
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import plistlib
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, STATE_DIR, load_config, run_command, command_exists, get_project_root, config_sources
+from configure_dock import get_app_path, load_app_index, configure_dock
+from cask_index import update_cask_index
+from configure_finder import VIEW_STYLES
+from copy_dotfiles import DOTFILES
+
+
+AGENT_LABEL = 'com.mac-bootstrap.drift'
+
+# Default minimum seconds between runs of each probe
+PROBE_INTERVALS = {'brew': 3600, 'defaults': 300, 'dotfiles': 60}
+
+# config key -> (domain, preference key, defaults type)
+DOCK_SETTINGS = {
+    'tile_size': ('com.apple.dock', 'tilesize', 'int'),
+    'autohide': ('com.apple.dock', 'autohide', 'bool'),
+    'show_recents': ('com.apple.dock', 'show-recents', 'bool'),
+}
+SYSTEM_SETTINGS = {
+    'key_repeat_rate': ('NSGlobalDomain', 'KeyRepeat', 'int'),
+    'initial_key_repeat': ('NSGlobalDomain', 'InitialKeyRepeat', 'int'),
+    'tracking_speed': ('NSGlobalDomain', 'com.apple.trackpad.scaling', 'float'),
+    'screenshot_show_thumbnail': ('com.apple.screencapture', 'show-thumbnail', 'bool'),
+}
+# Restarted after their preferences are remediated
+DOMAIN_PROCESSES = {'com.apple.dock': 'Dock', 'com.apple.finder': 'Finder'}
+
+
+def expected_defaults(config):
+    """
+    Build the preference values config.yaml asks for
+
+    Returns:
+        list: (domain, key, type, value) tuples
+    """
+    expected = []
+    dock_config = config.get('dock', {})
+    for name, (domain, key, kind) in DOCK_SETTINGS.items():
+        if name in dock_config:
+            expected.append((domain, key, kind, dock_config[name]))
+
+    finder_config = config.get('finder', {})
+    view = finder_config.get('default_view', 'list')
+    if view in VIEW_STYLES:
+        expected.append(('com.apple.finder', 'FXPreferredViewStyle', 'string', VIEW_STYLES[view]))
+    for name, key in [('show_path_bar', 'ShowPathbar'), ('show_status_bar', 'ShowStatusBar'),
+                      ('show_hidden_files', 'AppleShowAllFiles')]:
+        if finder_config.get(name):
+            expected.append(('com.apple.finder', key, 'bool', True))
+
+    system_config = config.get('system') or {}
+    for name, (domain, key, kind) in SYSTEM_SETTINGS.items():
+        if name in system_config:
+            expected.append((domain, key, kind, system_config[name]))
+    if system_config.get('disable_auto_correct'):
+        expected.append(('NSGlobalDomain', 'NSAutomaticSpellingCorrectionEnabled', 'bool', False))
+    if system_config.get('disable_auto_capitalize'):
+        expected.append(('NSGlobalDomain', 'NSAutomaticCapitalizationEnabled', 'bool', False))
+    return expected
+
+
+def _values_match(kind, expected, actual):
+    if actual is None:
+        return False
+    try:
+        if kind == 'bool':
+            return bool(actual) == bool(expected)
+        if kind in ('int', 'float'):
+            return float(actual) == float(expected)
+    except (TypeError, ValueError):
+        return False
+    return str(actual) == str(expected)
+
+
+def export_domain(domain):
+    """Read a whole preference domain with one `defaults export`"""
+    result = run_command(["defaults", "export", domain, "-"], check=False)
+    if not result or result.returncode != 0 or not result.stdout:
+        return {}
+    try:
+        return plistlib.loads(result.stdout.encode())
+    except Exception:
+        return {}
+
+
+def _dock_app_paths(dock_prefs):
+    """Get the app paths in the Dock, in order"""
+    paths = []
+    for item in dock_prefs.get('persistent-apps', []):
+        url = item.get('tile-data', {}).get('file-data', {}).get('_CFURLString', '')
+        if url:
+            paths.append(unquote(urlparse(url).path).rstrip('/') if url.startswith('file:') else url.rstrip('/'))
+    return paths
+
+
+def probe_brew(config):
+    """Find configured packages that are not installed"""
+    if not command_exists("brew"):
+        return [{'probe': 'brew', 'item': 'brew', 'expected': 'installed', 'actual': 'missing'}]
+
+    result = run_command(["brew", "info", "--json=v2", "--installed"], check=False)
+    if not result or result.returncode != 0:
+        return [{'probe': 'brew', 'item': 'brew info', 'expected': 'an inventory', 'actual': 'command failed'}]
+    try:
+        inventory = json.loads(result.stdout or '{}')
+    except ValueError:
+        return [{'probe': 'brew', 'item': 'brew info', 'expected': 'an inventory', 'actual': 'invalid JSON'}]
+    installed_formulae = set()
+    for formula in inventory.get('formulae', []):
+        installed_formulae.add(formula['name'])
+        installed_formulae.update(formula.get('aliases', []))
+        installed_formulae.update(formula.get('oldnames', []))
+    installed_casks = {cask['token'] for cask in inventory.get('casks', [])}
+    if inventory.get('casks'):
+        # The inventory lists every installed cask's apps; keep the Dock's index current
+        update_cask_index(inventory['casks'])
+
+    drift = []
+    for formula in config.get('brew_formulae') or []:
+        if formula.rsplit('/', 1)[-1] not in installed_formulae:
+            drift.append({'probe': 'brew', 'item': formula, 'kind': 'formula',
+                          'expected': 'installed', 'actual': 'missing'})
+    casks = (config.get('brew_fonts') or []) + (config.get('brew_casks') or []) + \
+        (config.get('personal_apps') or [])
+    for cask in casks:
+        if cask.rsplit('/', 1)[-1] not in installed_casks:
+            drift.append({'probe': 'brew', 'item': cask, 'kind': 'cask',
+                          'expected': 'installed', 'actual': 'missing'})
+    return drift
+
+
+def probe_defaults(config):
+    """Find preference values and Dock items that differ from the config"""
+    expected = expected_defaults(config)
+    domains = sorted({domain for domain, _, _, _ in expected} | {'com.apple.dock'})
+    exported = {domain: export_domain(domain) for domain in domains}
+
+    drift = []
+    for domain, key, kind, value in expected:
+        actual = exported[domain].get(key)
+        if not _values_match(kind, value, actual):
+            drift.append({'probe': 'defaults', 'item': f"{domain} {key}", 'domain': domain,
+                          'key': key, 'type': kind, 'expected': value, 'actual': actual})
+
+    index = load_app_index(config)
+    desired = [get_app_path(app, index) for app in config.get('dock', {}).get('apps', [])]
+    desired = [path.rstrip('/') for path in desired if path]
+    actual = _dock_app_paths(exported['com.apple.dock'])
+    if desired != actual:
+        drift.append({'probe': 'defaults', 'item': 'dock apps', 'expected': desired, 'actual': actual})
+    return drift
+
+
+def _sha256(path):
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def probe_dotfiles(config):
+    """Find deployed dotfiles that differ from the repository copies"""
+    if not config.get('optional', {}).get('copy_dotfiles'):
+        return []
+
+    drift = []
+    dotfiles_dir = get_project_root() / 'dotfiles'
+    for name in DOTFILES:
+        expected = _sha256(dotfiles_dir / name)
+        actual = _sha256(Path.home() / name)
+        if expected and expected != actual:
+            drift.append({'probe': 'dotfiles', 'item': name, 'expected': expected, 'actual': actual})
+    return drift
+
+
+PROBES = {
+    'brew': probe_brew,
+    'defaults': probe_defaults,
+    'dotfiles': probe_dotfiles,
+}
+
+
+def remediate(drift):
+    """Fix only the drifted items"""
+    fixed = 0
+    restart = set()
+
+    for item in drift:
+        probe = item['probe']
+        if probe == 'brew' and 'kind' in item:
+            cmd = ["brew", "install"] + (["--cask"] if item['kind'] == 'cask' else []) + [item['item']]
+            result = run_command(cmd, check=False)
+            ok = bool(result and result.returncode == 0)
+        elif probe == 'defaults' and 'key' in item:
+            value = item['expected']
+            value = str(value).lower() if item['type'] == 'bool' else str(value)
+            result = run_command(["defaults", "write", item['domain'], item['key'],
+                                  f"-{item['type']}", value], check=False)
+            ok = bool(result and result.returncode == 0)
+            if ok and item['domain'] in DOMAIN_PROCESSES:
+                restart.add(DOMAIN_PROCESSES[item['domain']])
+        elif item['item'] == 'dock apps':
+            ok = configure_dock()
+        elif probe == 'dotfiles':
+            shutil.copy2(get_project_root() / 'dotfiles' / item['item'], Path.home() / item['item'])
+            ok = True
+        else:
+            ok = False
+
+        if ok:
+            fixed += 1
+            Logger.success(f"Remediated {item['item']}")
+        else:
+            Logger.warning(f"Could not remediate {item['item']}")
+
+    for process in sorted(restart):
+        run_command(["killall", process], check=False)
+    return fixed
+
+
+def _cpu_seconds():
+    """CPU time used by this process and its finished children"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class DriftChecker:
+    """Runs probes on their own schedules and keeps the latest results"""
+
+    def __init__(self, config):
+        self.results = {}
+        self.probe_seconds = {}
+        self.reload(config)
+
+    def reload(self, config):
+        """Switch to a new configuration; every probe is due again"""
+        self.config = config
+        drift_config = config.get('drift', {})
+        self.intervals = {**PROBE_INTERVALS, **(drift_config.get('probes') or {})}
+        self.base_interval = drift_config.get('interval_seconds', 60)
+        self.cpu_budget = drift_config.get('cpu_budget_percent', 1.0) / 100
+        self.last_run = {}
+
+    def due_probes(self, now):
+        return [name for name in PROBES
+                if now - self.last_run.get(name, float('-inf')) >= self.intervals.get(name, 0)]
+
+    def check(self, probes=None):
+        """Run the given (default: all) probes and return the drift report"""
+        for name in probes or PROBES:
+            start = time.monotonic()
+            self.results[name] = PROBES[name](self.config)
+            self.last_run[name] = time.monotonic()
+            self.probe_seconds[name] = round(self.last_run[name] - start, 3)
+        return self.report()
+
+    def report(self):
+        drift = [item for name in PROBES for item in self.results.get(name, [])]
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'drifted': bool(drift),
+            'drift': drift,
+            'probe_seconds': self.probe_seconds,
+        }
+
+    def sleep_time(self, cpu_used, wall_used):
+        """Wait at least the base interval, longer if needed to stay within the CPU budget"""
+        budget_sleep = cpu_used / self.cpu_budget - wall_used if self.cpu_budget > 0 else 0
+        return max(self.base_interval, budget_sleep)
+
+
+def write_report(report, path):
+    """Write the latest drift report atomically"""
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    os.replace(tmp_file, path)
+
+
+def _config_mtimes():
+    """Modification times of the config files, to notice edits while watching"""
+    mtimes = {}
+    for path in config_sources():
+        try:
+            mtimes[path] = path.stat().st_mtime_ns
+        except OSError:
+            continue
+    return mtimes
+
+
+def watch(checker, report_file, auto_remediate):
+    """Check for drift forever, running each probe only when it is due"""
+    Logger.info("Watching for drift (Ctrl+C to stop)...")
+    mtimes = _config_mtimes()
+    while True:
+        cpu_start, wall_start = _cpu_seconds(), time.monotonic()
+        current = _config_mtimes()
+        if current != mtimes:
+            mtimes = current
+            Logger.info("Configuration changed, reloading")
+            checker.reload(load_config())
+        due = checker.due_probes(wall_start)
+        if due:
+            report = checker.check(due)
+            if report['drifted'] and auto_remediate:
+                remediate(report['drift'])
+                report = checker.check(sorted({item['probe'] for item in report['drift']}))
+            write_report(report, report_file)
+            print(json.dumps(report, default=str), flush=True)
+
+        time.sleep(checker.sleep_time(_cpu_seconds() - cpu_start, time.monotonic() - wall_start))
+
+
+def install_agent():
+    """Install a launchd agent that runs --watch at login"""
+    plist_path = Path.home() / 'Library' / 'LaunchAgents' / f"{AGENT_LABEL}.plist"
+    plist_path.parent.mkdir(parents=True, exist_ok=True)
+    log_file = STATE_DIR / 'drift.log'
+    agent = {
+        'Label': AGENT_LABEL,
+        'ProgramArguments': [sys.executable, str(Path(__file__).resolve()), '--watch'],
+        'RunAtLoad': True,
+        'KeepAlive': True,
+        'ProcessType': 'Background',
+        'LowPriorityIO': True,
+        'Nice': 10,
+        'StandardOutPath': str(log_file),
+        'StandardErrorPath': str(log_file),
+    }
+    with open(plist_path, 'wb') as f:
+        plistlib.dump(agent, f)
+    subprocess.run(['launchctl', 'unload', str(plist_path)], capture_output=True)
+    subprocess.run(['launchctl', 'load', str(plist_path)], check=True)
+    Logger.success(f"Drift agent installed: {plist_path}")
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Detect drift from config.yaml")
+    parser.add_argument("--watch", action="store_true", help="Keep checking periodically")
+    parser.add_argument("--remediate", action="store_true", help="Fix drifted items")
+    parser.add_argument(
+        "--probe",
+        action="append",
+        choices=sorted(PROBES),
+        help="Only run this probe (repeatable)"
+    )
+    parser.add_argument("--install-agent", action="store_true", help="Install the launchd agent")
+    args = parser.parse_args()
+
+    if args.install_agent:
+        install_agent()
+        return
+
+    config = load_config()
+    drift_config = config.get('drift', {})
+    report_file = drift_config.get('report_file', str(STATE_DIR / 'drift.json'))
+    checker = DriftChecker(config)
+
+    if args.watch:
+        try:
+            watch(checker, report_file, args.remediate or drift_config.get('auto_remediate', False))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = checker.check(args.probe)
+    if report['drifted'] and args.remediate:
+        remediate(report['drift'])
+        report = checker.check(sorted({item['probe'] for item in report['drift']}))
+    write_report(report, report_file)
+    print(json.dumps(report, indent=2, default=str))
+
+    if report['drifted']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
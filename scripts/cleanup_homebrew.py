@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Homebrew Cleanup Script
+
+Reclaims disk space used by the Homebrew download cache, old package
+versions and orphaned dependencies.
+
+Usage:
+    ./cleanup_homebrew.py          # Clean up only if the cache exceeds the threshold
+    ./cleanup_homebrew.py --force  # Always clean up
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, load_config, run_command, command_exists, directory_size, format_bytes
+
+
+STEP = {
+    'description': 'Cleaning up Homebrew',
+    'tags': ['setup', 'brew', 'upgrade'],
+    'requires': ['install_packages', 'upgrade_packages'],
+    'order': 30,
+    'cost': 30,
+}
+
+
+def get_cache_dir():
+    """Get the Homebrew download cache directory"""
+    result = run_command(["brew", "--cache"], check=False)
+    if result and result.returncode == 0 and result.stdout.strip():
+        return Path(result.stdout.strip())
+    return None
+
+
+def get_install_dirs():
+    """Get the Cellar and Caskroom under the Homebrew prefix (empty if unknown)"""
+    result = run_command(["brew", "--prefix"], check=False)
+    if result and result.returncode == 0 and result.stdout.strip():
+        prefix = Path(result.stdout.strip())
+        return [prefix / "Cellar", prefix / "Caskroom"]
+    return []
+
+
+def disk_usage(dirs):
+    """Total size of the given directories"""
+    return sum(directory_size(path) for path in dirs)
+
+
+def cleanup_homebrew(force=False):
+    """Clean up Homebrew caches, old versions and unused dependencies"""
+    config = load_config()
+    cleanup_config = config.get('cleanup', {})
+
+    if not command_exists("brew"):
+        Logger.error("Homebrew not installed. Run install_homebrew.py first")
+        return False
+
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        Logger.error("Could not determine Homebrew cache directory")
+        return False
+
+    cache_before = directory_size(cache_dir)
+    Logger.info(f"Homebrew cache: {format_bytes(cache_before)} ({cache_dir})")
+
+    threshold_mb = cleanup_config.get('threshold_mb', 0)
+    if not force and cache_before < threshold_mb * 1024 * 1024:
+        Logger.info(f"Cache below {threshold_mb} MB threshold (skipping cleanup)")
+        return True
+
+    # Old versions live in the Cellar/Caskroom, so measure those too
+    install_dirs = get_install_dirs()
+    size_before = cache_before + disk_usage(install_dirs)
+
+    prune = cleanup_config.get('prune', 'all')
+    Logger.info("Removing old versions and cached downloads...")
+    result = run_command(["brew", "cleanup", f"--prune={prune}"], check=False)
+    if not result or result.returncode != 0:
+        Logger.warning("brew cleanup reported errors")
+
+    if cleanup_config.get('autoremove', True):
+        Logger.info("Removing unused dependencies...")
+        result = run_command(["brew", "autoremove"], check=False)
+        if not result or result.returncode != 0:
+            Logger.warning("brew autoremove reported errors")
+
+    cache_after = directory_size(cache_dir)
+    reclaimed = max(size_before - cache_after - disk_usage(install_dirs), 0)
+    scope = "cache, Cellar and Caskroom" if install_dirs else "cache only"
+    Logger.success(f"Homebrew cleanup complete: {format_bytes(reclaimed)} reclaimed ({scope}; "
+                   f"cache now {format_bytes(cache_after)})")
+    return True
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Reclaim disk space used by Homebrew")
+    parser.add_argument(
+        "-f", "--force",
+        action="store_true",
+        help="Clean up even if the cache is below the configured threshold"
+    )
+    args = parser.parse_args()
+
+    config = load_config()
+    cleanup_config = config.get('cleanup', {})
+
+    print("=" * 60)
+    print("  Homebrew Cleanup")
+    print("=" * 60)
+    print()
+
+    if not args.force and not cleanup_config.get('enabled', True):
+        Logger.info("Homebrew cleanup disabled in config")
+        return
+
+    if not cleanup_homebrew(force=args.force):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ Dock Configuration Script
 
 Configures macOS Dock preferences using dockutil.
 Only adds applications that are actually installed.
+
+Apps installed from casks are resolved through the cask app index (see
+cask_index.py), so `dock.apps` may name the cask, its display name or its
+app bundle.
 """
 
 import subprocess
@@ -13,6 +17,16 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from utils import Logger, load_config, command_exists, run_command
+from cask_index import DEFAULT_TTL_HOURS, configured_casks, load_cask_index
+
+
+STEP = {
+    'description': 'Configuring Dock',
+    'tags': ['setup', 'config'],
+    'requires': ['install_packages'],
+    'order': 120,  # Last: only adds installed apps
+    'cost': 10,
+}
 
 
 # Common application paths
@@ -33,8 +47,26 @@ APP_PATHS = {
 }
 
 
-def get_app_path(app_name):
-    """Get the full path for an application"""
+def load_app_index(config):
+    """Get the cask app index for the configured casks"""
+    ttl_hours = (config.get('homebrew') or {}).get('cask_index_ttl_hours', DEFAULT_TTL_HOURS)
+    return load_cask_index(configured_casks(config), ttl_hours)
+
+
+def get_app_path(app_name, index=None):
+    """
+    Get the full path for an application
+
+    Args:
+        app_name: App display name, cask token or bundle name
+        index: CaskIndex to resolve cask apps with (optional)
+    """
+    # Casks know exactly which bundle they installed
+    if index is not None:
+        app_path = index.app_path(app_name)
+        if app_path:
+            return app_path
+
     # Check if we have a known path
     if app_name in APP_PATHS:
         app_path = APP_PATHS[app_name]
@@ -70,6 +102,7 @@ def configure_dock():
     try:
         # Get desired apps list (in order)
         desired_apps = dock_config.get('apps', ['Apps'])
+        index = load_app_index(config)
 
         Logger.info("Removing all existing Dock items (except Finder)...")
         # Remove all apps except Finder (which can't be removed)
@@ -81,7 +114,7 @@ def configure_dock():
         skipped_count = 0
 
         for app_name in desired_apps:
-            app_path = get_app_path(app_name)
+            app_path = get_app_path(app_name, index)
 
             if app_path:
                 # Add to dock
@@ -14,6 +14,24 @@ sys.path.insert(0, str(Path(__file__).parent))
 from utils import Logger, load_config
 
 
+STEP = {
+    'description': 'Configuring Finder',
+    'tags': ['setup', 'config'],
+    'requires': ['snapshot'],
+    'order': 50,
+    'cost': 5,
+}
+
+
+# View style mapping
+VIEW_STYLES = {
+    'icon': 'icnv',
+    'list': 'Nlsv',
+    'column': 'clmv',
+    'gallery': 'glyv'
+}
+
+
 def configure_finder():
     """Configure Finder preferences"""
     config = load_config()
@@ -22,18 +40,10 @@ def configure_finder():
     finder_config = config.get('finder', {})
 
     try:
-        # View style mapping
-        view_styles = {
-            'icon': 'icnv',
-            'list': 'Nlsv',
-            'column': 'clmv',
-            'gallery': 'glyv'
-        }
-
         default_view = finder_config.get('default_view', 'list')
-        if default_view in view_styles:
+        if default_view in VIEW_STYLES:
             subprocess.run(
-                ['defaults', 'write', 'com.apple.finder', 'FXPreferredViewStyle', '-string', view_styles[default_view]],
+                ['defaults', 'write', 'com.apple.finder', 'FXPreferredViewStyle', '-string', VIEW_STYLES[default_view]],
                 check=True
             )
 
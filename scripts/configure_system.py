@@ -14,6 +14,15 @@ sys.path.insert(0, str(Path(__file__).parent))
 from utils import Logger, load_config
 
 
+STEP = {
+    'description': 'Configuring system preferences',
+    'tags': ['setup', 'config'],
+    'requires': ['snapshot'],
+    'order': 60,
+    'cost': 5,
+}
+
+
 def configure_system():
     """Configure system preferences"""
     config = load_config()
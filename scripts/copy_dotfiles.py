@@ -3,20 +3,54 @@
 Dotfiles Copy Script
 
 Copies dotfiles to home directory
+
+Usage:
+    ./copy_dotfiles.py                 # Copy all dotfiles
+    ./copy_dotfiles.py --watch         # Sync each dotfile to HOME as soon as it is saved
+    ./copy_dotfiles.py --benchmark 50  # Measure save-to-sync latency
 """
 
+import argparse
+import os
 import shutil
-import subprocess
+import statistics
 import sys
+import tempfile
+import threading
+import time
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import Logger, load_config
+from utils import Logger, load_config, get_project_root
+from fswatch import BACKENDS, create_watcher, wait_debounced
+from snapshot import capture_snapshot
+
+
+STEP = {
+    'description': 'Copying dotfiles',
+    'tags': ['setup', 'dotfiles'],
+    # The Oh My Zsh installer replaces ~/.zshrc
+    'requires': ['snapshot', 'install_zsh'],
+    'order': 110,
+    'cost': 5,
+    # The snapshot step already captured the dotfiles
+    'args_with': {'snapshot': ['--no-snapshot']},
+}
+
+
+# Zsh config files copied from dotfiles/ to the home directory
+DOTFILES = ['.zshrc', '.zsh_aliases', '.zsh_functions']
+
 
+def copy_dotfiles(snapshot=True):
+    """
+    Copy dotfiles to home directory
 
-def copy_dotfiles():
-    """Copy dotfiles to home directory"""
+    Args:
+        snapshot: Snapshot the dotfiles about to be overwritten first, so the
+            copy can be undone with `snapshot.py restore` / `setup.py --rollback`
+    """
     Logger.info("Copying dotfiles...")
 
     try:
@@ -29,35 +63,30 @@ def copy_dotfiles():
             Logger.warning("Dotfiles directory not found")
             return False
 
+        if snapshot:
+            changed = [name for name in DOTFILES
+                       if (dotfiles_dir / name).exists() and (
+                           not (Path.home() / name).exists()
+                           or (dotfiles_dir / name).read_bytes() != (Path.home() / name).read_bytes())]
+            if changed:
+                capture_snapshot(include_defaults=False, files=DOTFILES, reason="copy_dotfiles")
+
         # Copy all zsh config files
-        zsh_files = ['.zshrc', '.zsh_aliases', '.zsh_functions']
         copied_count = 0
 
-        for zsh_file in zsh_files:
+        for zsh_file in DOTFILES:
             src = dotfiles_dir / zsh_file
-            dst = Path.home() / zsh_file
 
             if not src.exists():
                 Logger.warning(f"{zsh_file} not found in dotfiles directory")
                 continue
 
-            # Backup existing file if it exists
-            if dst.exists():
-                timestamp = subprocess.run(
-                    ['date', '+%Y%m%d%H%M%S'],
-                    capture_output=True,
-                    text=True
-                ).stdout.strip()
-                backup_path = Path.home() / f"{zsh_file}.backup.{timestamp}"
-                shutil.copy2(dst, backup_path)
-                Logger.info(f"Backed up existing {zsh_file} to {backup_path.name}")
-
-            shutil.copy2(src, dst)
+            sync_dotfile(zsh_file, dotfiles_dir, Path.home())
             Logger.success(f"Copied {zsh_file}")
             copied_count += 1
 
         if copied_count > 0:
-            Logger.success(f"Dotfiles copied ({copied_count}/{len(zsh_files)})")
+            Logger.success(f"Dotfiles copied ({copied_count}/{len(DOTFILES)})")
             return True
         else:
             Logger.warning("No dotfiles were copied")
@@ -68,8 +97,125 @@ def copy_dotfiles():
         return False
 
 
+def sync_dotfile(name, src_dir, dst_dir):
+    """
+    Atomically replace one dotfile in the destination directory
+
+    The file is copied to a temporary name next to the target and renamed
+    over it, so the shell never reads a half-written file.
+    """
+    src = Path(src_dir) / name
+    dst = Path(dst_dir) / name
+    tmp = dst.with_name(f".{name}.sync-{os.getpid()}")
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def watch_dotfiles(src_dir=None, dst_dir=None, backend='auto', stop=None, on_sync=None):
+    """
+    Sync dotfiles to the destination as soon as they change
+
+    Args:
+        src_dir: Directory to watch (default: dotfiles/)
+        dst_dir: Destination (default: home directory)
+        backend: Watcher backend (see fswatch.BACKENDS)
+        stop: threading.Event that ends the watch
+        on_sync: Callback called with each synced file name
+    """
+    src_dir = Path(src_dir or get_project_root() / 'dotfiles')
+    dst_dir = Path(dst_dir or Path.home())
+    stop = stop or threading.Event()
+
+    with create_watcher(src_dir, backend) as watcher:
+        Logger.info(f"Watching {src_dir} ({watcher.name} backend, Ctrl+C to stop)...")
+        while not stop.is_set():
+            changed = wait_debounced(watcher, timeout=0.5)
+            for name in sorted(changed & set(DOTFILES)):
+                if not (src_dir / name).exists():
+                    continue
+                sync_dotfile(name, src_dir, dst_dir)
+                if on_sync:
+                    on_sync(name)
+                else:
+                    Logger.success(f"Synced {name}")
+
+
+def benchmark_sync(backend='auto', iterations=20):
+    """
+    Measure latency from saving a dotfile to it being synced
+
+    Returns:
+        list: Latencies in milliseconds
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir, dst_dir = Path(tmp) / 'src', Path(tmp) / 'dst'
+        src_dir.mkdir()
+        dst_dir.mkdir()
+        name = DOTFILES[0]
+
+        synced = threading.Event()
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=watch_dotfiles,
+            args=(src_dir, dst_dir, backend, stop, lambda _: synced.set()),
+            daemon=True
+        )
+        thread.start()
+        time.sleep(0.2)  # Let the watcher start
+
+        latencies = []
+        for i in range(iterations):
+            synced.clear()
+            start = time.perf_counter()
+            (src_dir / name).write_text(f"# revision {i}\n")
+            if synced.wait(timeout=5):
+                latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.05)
+
+        stop.set()
+        thread.join()
+    return latencies
+
+
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Copy dotfiles to the home directory")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and sync each dotfile as soon as it is saved"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=['auto'] + sorted(BACKENDS),
+        default='auto',
+        help="Change notification backend for --watch (default: best available)"
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Do not snapshot overwritten dotfiles (setup.py already took one)"
+    )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="Measure save-to-sync latency over N saves in a temporary directory"
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        latencies = benchmark_sync(args.backend, args.benchmark)
+        if not latencies:
+            Logger.error("No saves were synced")
+            sys.exit(1)
+        latencies.sort()
+        Logger.info(f"{len(latencies)}/{args.benchmark} saves synced: "
+                    f"median {statistics.median(latencies):.1f} ms, "
+                    f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms, "
+                    f"max {latencies[-1]:.1f} ms")
+        return
+
     config = load_config()
     optional_config = config.get('optional', {})
 
@@ -82,9 +228,15 @@ def main():
         Logger.info("Dotfiles copy disabled in config")
         return
 
-    if not copy_dotfiles():
+    if not copy_dotfiles(snapshot=not args.no_snapshot):
         sys.exit(1)
 
+    if args.watch:
+        try:
+            watch_dotfiles(backend=args.backend)
+        except KeyboardInterrupt:
+            pass
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,219 @@
+"""
+Filesystem change notification
+
+Watches a directory for files being written, with three backends:
+
+- inotify:  Linux kernel notifications (via ctypes, no dependencies)
+- fsevents: macOS FSEvents through the `fswatch` tool (brew install fswatch)
+- polling:  mtime scan, works everywhere
+
+create_watcher() picks the best backend available.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+class Watcher:
+    """Base class: reports names of files changed in one directory"""
+
+    name = 'base'
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def wait(self, timeout):
+        """
+        Wait for changes
+
+        Args:
+            timeout: Seconds to wait for the first change
+
+        Returns:
+            set: Names of changed files (empty on timeout)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InotifyWatcher(Watcher):
+    """Linux inotify backend"""
+
+    name = 'inotify'
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = 0x00000800
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(self.directory), mask) < 0:
+            os.close(self._fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {self.directory}")
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith('linux') and bool(ctypes.util.find_library('c'))
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class FSEventsWatcher(Watcher):
+    """macOS FSEvents backend using the fswatch tool"""
+
+    name = 'fsevents'
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self._process = subprocess.Popen(
+            ['fswatch', '-0', '--latency', '0.05', '--event', 'Updated', '--event', 'Created',
+             '--event', 'Renamed', '--event', 'MovedTo', str(self.directory)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self._buffer = b''
+
+    @staticmethod
+    def available():
+        return sys.platform == 'darwin' and shutil.which('fswatch') is not None
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self._process.stdout], [], [], timeout)
+        if not ready:
+            return set()
+        self._buffer += os.read(self._process.stdout.fileno(), 64 * 1024)
+        *paths, self._buffer = self._buffer.split(b'\0')
+        return {Path(os.fsdecode(path)).name for path in paths if path}
+
+    def close(self):
+        self._process.terminate()
+        self._process.wait()
+
+
+class PollingWatcher(Watcher):
+    """Fallback backend comparing file mtimes"""
+
+    name = 'polling'
+
+    def __init__(self, directory, interval=0.25):
+        super().__init__(directory)
+        self.interval = interval
+        self._mtimes = self._scan()
+
+    @staticmethod
+    def available():
+        return True
+
+    def _scan(self):
+        mtimes = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    mtimes[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return mtimes
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {name for name, stamp in current.items() if self._mtimes.get(name) != stamp}
+            self._mtimes = current
+            if changed:
+                return changed
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+
+
+BACKENDS = {
+    'inotify': InotifyWatcher,
+    'fsevents': FSEventsWatcher,
+    'polling': PollingWatcher,
+}
+
+
+def create_watcher(directory, backend='auto'):
+    """
+    Create a watcher for a directory
+
+    Args:
+        directory: Directory to watch
+        backend: 'inotify', 'fsevents', 'polling' or 'auto' (best available)
+
+    Returns:
+        Watcher
+    """
+    if backend != 'auto':
+        return BACKENDS[backend](directory)
+    for cls in (InotifyWatcher, FSEventsWatcher):
+        if cls.available():
+            try:
+                return cls(directory)
+            except OSError:
+                continue
+    return PollingWatcher(directory)
+
+
+def wait_debounced(watcher, timeout, debounce=0.05):
+    """
+    Wait for a burst of changes to settle
+
+    Editors often write a file in several steps (truncate, write, rename);
+    changes are collected until none arrive for `debounce` seconds.
+
+    Returns:
+        set: Names of changed files (empty on timeout)
+    """
+    changed = watcher.wait(timeout)
+    while changed:
+        more = watcher.wait(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
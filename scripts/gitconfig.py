@@ -0,0 +1,248 @@
+"""
+Git Config Engine
+
+Applies a nested mapping of settings to the global git config file in one
+step: the file is parsed once, the desired settings are diffed against it,
+and every change is written with a single atomic file replace. Comments,
+includes and unrelated settings are left untouched.
+
+Mapping format (as under `git:` in config.yaml):
+
+    core:
+      pager: delta
+      fsmonitor: true
+    alias:
+      st: status
+    url:
+      "git@github.com:":        # Dict of dicts -> [url "git@github.com:"]
+        insteadOf: https://github.com/
+
+Lists become multi-valued keys; None removes a key.
+"""
+
+import os
+import re
+from pathlib import Path
+
+
+SECTION_RE = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+ENTRY_RE = re.compile(r'^\s*([A-Za-z][A-Za-z0-9-]*)\s*(?:=\s*(.*?))?\s*$')
+BOOL_TRUE = {'true', 'yes', 'on', '1', ''}
+BOOL_FALSE = {'false', 'no', 'off', '0'}
+
+
+def global_config_path():
+    """Get the global git config file (honours GIT_CONFIG_GLOBAL)"""
+    if os.environ.get('GIT_CONFIG_GLOBAL'):
+        return Path(os.environ['GIT_CONFIG_GLOBAL']).expanduser()
+    return Path.home() / '.gitconfig'
+
+
+def flatten(mapping):
+    """
+    Flatten a nested settings mapping
+
+    Returns:
+        dict: (section, subsection or None, key) -> list of string values (None to remove)
+    """
+    settings = {}
+    for section, entries in mapping.items():
+        for name, value in (entries or {}).items():
+            if isinstance(value, dict):
+                for key, sub_value in value.items():
+                    settings[(section, name, key)] = _values(sub_value)
+            else:
+                settings[(section, None, name)] = _values(value)
+    return settings
+
+
+def _values(value):
+    if value is None:
+        return None
+    items = value if isinstance(value, list) else [value]
+    return [str(item).lower() if isinstance(item, bool) else str(item) for item in items]
+
+
+def _unquote(raw):
+    """Parse a raw config value: strip comments, quotes and escapes"""
+    out = []
+    quoted = False
+    i = 0
+    while i < len(raw):
+        char = raw[i]
+        if char == '"':
+            quoted = not quoted
+        elif char == '\\' and i + 1 < len(raw):
+            i += 1
+            out.append({'n': '\n', 't': '\t', 'b': '\b'}.get(raw[i], raw[i]))
+        elif char in '#;' and not quoted:
+            break
+        else:
+            out.append(char)
+        i += 1
+    return ''.join(out).strip()
+
+
+def _quote(value):
+    """Format a value for writing"""
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\t', '\\t')
+    if value != value.strip() or '#' in value or ';' in value:
+        return f'"{escaped}"'
+    return escaped
+
+
+def _section_header(section, subsection):
+    if subsection is None:
+        return f"[{section}]"
+    escaped = subsection.replace('\\', '\\\\').replace('"', '\\"')
+    return f'[{section} "{escaped}"]'
+
+
+def _same(current, desired):
+    """Compare values, treating git's boolean spellings as equal"""
+    if len(current) != len(desired):
+        return False
+    for have, want in zip(current, desired):
+        if want in ('true', 'false') and have.lower() in BOOL_TRUE | BOOL_FALSE:
+            if (have.lower() in BOOL_TRUE) != (want == 'true'):
+                return False
+        elif have != want:
+            return False
+    return True
+
+
+class GitConfigFile:
+    """A git config file parsed once, edited in memory and saved atomically"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else global_config_path()
+        try:
+            self.lines = self.path.read_text().splitlines()
+        except FileNotFoundError:
+            self.lines = []
+        self._parse()
+
+    def _parse(self):
+        """Index sections and entries by line number"""
+        # (section, subsection) -> index of the last line belonging to it
+        self.sections = {}
+        # (section, subsection, key) -> [(line index, value)]
+        self.entries = {}
+        current = None
+        for index, line in enumerate(self.lines):
+            match = SECTION_RE.match(line)
+            if match:
+                section, subsection = match.group(1).lower(), match.group(2)
+                if subsection is None and '.' in section:
+                    # Deprecated [section.subsection] syntax
+                    section, subsection = section.split('.', 1)
+                elif subsection is not None:
+                    subsection = re.sub(r'\\(.)', r'\1', subsection)
+                current = (section, subsection)
+                self.sections[current] = index
+                continue
+            if current is None:
+                continue
+            stripped = line.strip()
+            if stripped and stripped[0] not in '#;':
+                self.sections[current] = index
+                entry = ENTRY_RE.match(line)
+                if entry:
+                    key = (*current, entry.group(1).lower())
+                    value = _unquote(entry.group(2)) if entry.group(2) is not None else ''
+                    self.entries.setdefault(key, []).append((index, value))
+
+    def _lines_of(self, section, subsection, key):
+        """Get (line index, value) pairs of a key; names are case-insensitive"""
+        return self.entries.get((section.lower(), subsection, key.lower()), [])
+
+    def get(self, section, subsection, key):
+        """Get the current values of a key"""
+        return [value for _, value in self._lines_of(section, subsection, key)]
+
+    def diff(self, settings):
+        """
+        Compare desired settings with the file
+
+        Returns:
+            list: (section, subsection, key, current values, desired values) for each change
+        """
+        changes = []
+        for (section, subsection, key), desired in settings.items():
+            current = self.get(section, subsection, key)
+            if desired is None:
+                if current:
+                    changes.append((section, subsection, key, current, None))
+            elif not _same(current, desired):
+                changes.append((section, subsection, key, current, desired))
+        return changes
+
+    def apply(self, changes):
+        """Apply changes from diff() to the in-memory file"""
+        removed = set()
+        # Inserted lines, keyed by the index they follow
+        inserts = {}
+        appended = []
+
+        for section, subsection, key, _, desired in changes:
+            existing = [index for index, _ in self._lines_of(section, subsection, key)]
+            new_lines = [f"\t{key} = {_quote(value)}" for value in desired or []]
+            if existing:
+                # Replace in place where the key was first defined
+                removed.update(existing)
+                inserts.setdefault(existing[0], []).extend(new_lines)
+            elif (section.lower(), subsection) in self.sections:
+                inserts.setdefault(self.sections[(section.lower(), subsection)], []).extend(new_lines)
+            elif new_lines:
+                appended.append(((section, subsection), new_lines))
+
+        lines = []
+        for index, line in enumerate(self.lines):
+            if index not in removed:
+                lines.append(line)
+            lines.extend(inserts.get(index, []))
+
+        headers = {}
+        for (section, subsection), new_lines in appended:
+            headers.setdefault((section, subsection), []).extend(new_lines)
+        for (section, subsection), new_lines in headers.items():
+            lines.append(_section_header(section, subsection))
+            lines.extend(new_lines)
+
+        self.lines = lines
+        self._parse()
+
+    def save(self):
+        """Write the file with one atomic replace, keeping its permissions"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(self.lines) + '\n')
+        if self.path.exists():
+            os.chmod(tmp_path, self.path.stat().st_mode & 0o7777)
+        os.replace(tmp_path, self.path)
+
+
+def apply_settings(mapping, path=None, dry_run=False):
+    """
+    Bring a git config file in line with a nested settings mapping
+
+    Args:
+        mapping: Nested settings (see module docstring)
+        path: Config file (default: the global config)
+        dry_run: Only report the changes
+
+    Returns:
+        list: The changes (see GitConfigFile.diff)
+    """
+    config_file = GitConfigFile(path)
+    changes = config_file.diff(flatten(mapping))
+    if changes and not dry_run:
+        config_file.apply(changes)
+        config_file.save()
+    return changes
+
+
+def format_key(section, subsection, key):
+    """Format a key the way `git config` names it"""
+    return f"{section}.{subsection}.{key}" if subsection is not None else f"{section}.{key}"
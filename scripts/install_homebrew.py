@@ -2,16 +2,41 @@
 """
 Homebrew Installation Script
 
-Installs and updates Homebrew package manager
+Installs and updates Homebrew package manager.
+
+`brew update` runs at most once per `homebrew.update_ttl_hours`; every other
+brew invocation has auto-update disabled (see utils.HOMEBREW_ENV).
+
+Usage:
+    ./install_homebrew.py                 # Install, update if the last update is stale
+    ./install_homebrew.py --force-update  # Always run brew update
+    ./install_homebrew.py --offline FILE  # Install from an offline bundle (no update)
 """
 
+import argparse
+import os
 import subprocess
 import sys
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import Logger, command_exists, run_command
+from utils import Logger, load_config, command_exists, run_command, stamp_is_fresh, touch_stamp
+from installers import get_installer
+from offline_bundle import OFFLINE_ENV, add_offline_argument, activate_offline
+
+
+STEP = {
+    'description': 'Installing Homebrew',
+    'tags': ['setup', 'brew'],
+    'order': 10,
+    'cost': 120,
+    'sudo': True,
+    'probe': 'step_done',
+}
+
+
+UPDATE_STAMP = 'brew_update.stamp'
 
 
 def install_homebrew():
@@ -24,9 +49,10 @@ def install_homebrew():
         return True
 
     try:
-        # Install Homebrew
-        install_cmd = '/bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"'
-        subprocess.run(install_cmd, shell=True, check=True)
+        # Run the checksummed local copy of install.sh (downloaded once)
+        install_script = get_installer('homebrew')
+        subprocess.run(['/bin/bash', str(install_script)], check=True)
+        touch_stamp(UPDATE_STAMP)  # A fresh install is already up to date
         Logger.success("Homebrew installed")
         return True
     except Exception as e:
@@ -34,16 +60,23 @@ def install_homebrew():
         return False
 
 
-def update_homebrew():
-    """Update Homebrew"""
-    Logger.info("Updating Homebrew...")
+def update_homebrew(force=False):
+    """Update Homebrew unless it was updated within the configured TTL"""
+    config = load_config()
+    ttl_hours = config.get('homebrew', {}).get('update_ttl_hours', 6)
 
     if not command_exists("brew"):
         Logger.error("Homebrew not installed")
         return False
 
+    if not force and stamp_is_fresh(UPDATE_STAMP, ttl_hours * 3600):
+        Logger.info(f"Homebrew updated within the last {ttl_hours}h (skipping update)")
+        return True
+
+    Logger.info("Updating Homebrew...")
     try:
-        run_command(["brew", "update"])
+        run_command(["brew", "update"], stream="progress")
+        touch_stamp(UPDATE_STAMP)
         Logger.success("Homebrew updated")
         return True
     except Exception as e:
@@ -51,15 +84,36 @@ def update_homebrew():
         return False
 
 
+def step_done():
+    """Whether Homebrew is installed and needs no update (probe for setup.py)"""
+    if not command_exists("brew"):
+        return False
+    if os.environ.get(OFFLINE_ENV):
+        return True
+    ttl_hours = load_config().get('homebrew', {}).get('update_ttl_hours', 6)
+    return stamp_is_fresh(UPDATE_STAMP, ttl_hours * 3600)
+
+
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Install and update Homebrew")
+    parser.add_argument(
+        "--force-update",
+        action="store_true",
+        help="Run brew update even if it ran recently"
+    )
+    add_offline_argument(parser)
+    args = parser.parse_args()
+    offline = activate_offline(args.offline)
+
     print("=" * 60)
     print("  Homebrew Installation")
     print("=" * 60)
     print()
 
     if install_homebrew():
-        update_homebrew()
+        if not offline:
+            update_homebrew(force=args.force_update)
     else:
         sys.exit(1)
 
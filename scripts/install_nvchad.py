@@ -2,44 +2,239 @@
 """
 NvChad Installation Script
 
-Installs NvChad configuration for Neovim
+Installs NvChad configuration for Neovim, or updates an existing one, and
+then installs its plugins headlessly so the first `nvim` start is warm:
+
+- `Lazy! sync` with lazy.nvim's concurrency raised
+- Mason tools installed in parallel
+- Treesitter parsers compiled ahead of time
+
+Each phase reports its duration and all share a timeout; see `nvchad:` in
+config.yaml.
+
+Usage:
+    ./install_nvchad.py                    # Clone the starter from GitHub
+    ./install_nvchad.py --offline BUNDLE   # Clone the starter from an offline bundle
 """
 
+import argparse
+import os
+import shutil
 import subprocess
 import sys
+import time
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import Logger, load_config
+from utils import Logger, load_config, run_with_retry, stream_command
+from offline_bundle import OFFLINE_ENV, add_offline_argument, activate_offline, git_clone
+from timings import format_duration
 
 
-def install_nvchad():
-    """Install NvChad for Neovim"""
-    Logger.info("Installing NvChad...")
+STEP = {
+    'description': 'Installing NvChad',
+    'tags': ['setup', 'shell'],
+    'requires': ['install_packages'],
+    'order': 90,
+    'cost': 120,
+}
 
-    nvim_config_dir = Path.home() / '.config' / 'nvim'
 
-    if nvim_config_dir.exists():
-        Logger.warning("Neovim config already exists. Skipping NvChad installation.")
-        Logger.info(f"To reinstall, backup and remove: {nvim_config_dir}")
+STARTER_URL = 'https://github.com/NvChad/starter'
+
+# Defaults for the `nvchad:` config section
+SYNC_DEFAULTS = {
+    'sync': True,
+    'timeout_minutes': 10,
+    'concurrency': 16,
+    'mason_concurrency': 4,
+    'mason': [],
+    'treesitter': [],
+}
+
+# Exits non-zero if any plugin failed to install
+LAZY_CHECK = (
+    "lua local failed = 0 "
+    "for _, plugin in pairs(require('lazy.core.config').plugins) do "
+    "if not plugin._.installed then failed = failed + 1 end end "
+    "io.write(('plugins=%d failed=%d\\n'):format(vim.tbl_count(require('lazy.core.config').plugins), failed)) "
+    "if failed > 0 then vim.cmd('cquit 1') end"
+)
+
+
+def _lua_list(items):
+    return '{' + ', '.join(repr(str(item)) for item in items) + '}'
+
+
+def mason_install_command(tools, concurrency, timeout):
+    """
+    Lua that installs Mason tools in parallel and waits for them
+
+    Returns:
+        str: A `+lua ...` command for nvim
+    """
+    return (
+        "lua require('lazy').load({plugins = {'mason.nvim'}}) "
+        f"require('mason.settings').current.max_concurrent_installers = {int(concurrency)} "
+        "local registry = require('mason-registry') registry.refresh() "
+        "local pending, failed = 0, {} "
+        f"for _, name in ipairs({_lua_list(tools)}) do "
+        "local ok, package = pcall(registry.get_package, name) "
+        "if not ok then table.insert(failed, name) "
+        "elseif not package:is_installed() then pending = pending + 1 "
+        "package:install():once('closed', function() pending = pending - 1 "
+        "if not package:is_installed() then table.insert(failed, name) end end) end end "
+        f"vim.wait({int(timeout * 1000)}, function() return pending == 0 end, 200) "
+        "io.write(('mason pending=%d failed=%s\\n'):format(pending, table.concat(failed, ','))) "
+        "if pending > 0 or #failed > 0 then vim.cmd('cquit 1') end"
+    )
+
+
+def treesitter_install_command(parsers):
+    """
+    Lua that compiles treesitter parsers ahead of time
+
+    Returns:
+        str: A `+lua ...` command for nvim
+    """
+    return (
+        "lua require('lazy').load({plugins = {'nvim-treesitter'}}) "
+        f"require('nvim-treesitter.install').ensure_installed_sync({_lua_list(parsers)})"
+    )
+
+
+def run_headless(label, commands, timeout):
+    """
+    Run headless nvim commands with a timeout, reporting progress
+
+    Returns:
+        bool: True if nvim exited cleanly in time
+    """
+    Logger.info(f"{label}...")
+    start = time.monotonic()
+    args = ['nvim', '--headless']
+    for command in commands:
+        args += ['-c', command]
+    args += ['-c', 'qa']
+    try:
+        result = stream_command(args, check=False, prefix='  ', progress=True, timeout=timeout)
+    except OSError as e:
+        Logger.warning(f"{label} failed: {e}")
+        return False
+    elapsed = format_duration(time.monotonic() - start)
+    if result.returncode != 0:
+        Logger.warning(f"{label} did not finish ({elapsed}); `nvim` will retry on first start")
+        return False
+    # The check snippets print a `key=value` summary as their last line
+    summary = [line for line in result.stdout.splitlines() if '=' in line][-1:]
+    Logger.success(f"{label}: done in {elapsed}" + (f" ({summary[0]})" if summary else ""))
+    return True
+
+
+def sync_plugins(sync_config):
+    """
+    Install everything NvChad would install on its first interactive start
+
+    Runs lazy.nvim's sync with tuned concurrency, installs the Mason tools
+    in parallel and compiles the treesitter parsers, each in a headless
+    nvim sharing one overall timeout, so the first `nvim` start is warm.
+
+    Returns:
+        bool: True if every phase finished
+    """
+    if not shutil.which('nvim'):
+        Logger.warning("nvim not found; plugins will install on first start")
         return False
 
+    deadline = time.monotonic() + sync_config['timeout_minutes'] * 60
+    # Each phase builds its commands from the time left when it starts
+    phases = [(
+        f"Syncing plugins (lazy.nvim, {sync_config['concurrency']} at a time)",
+        lambda remaining: [
+            f"lua require('lazy.core.config').options.concurrency = {int(sync_config['concurrency'])}",
+            'Lazy! sync', LAZY_CHECK],
+    )]
+    if sync_config['mason']:
+        phases.append((
+            f"Installing {len(sync_config['mason'])} Mason tools ({sync_config['mason_concurrency']} at a time)",
+            lambda remaining: [mason_install_command(sync_config['mason'], sync_config['mason_concurrency'],
+                                                     remaining)],
+        ))
+    if sync_config['treesitter']:
+        phases.append((
+            f"Compiling {len(sync_config['treesitter'])} treesitter parsers",
+            lambda remaining: [treesitter_install_command(sync_config['treesitter'])],
+        ))
+
+    ok = True
+    for label, build_commands in phases:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            Logger.warning(f"Skipping: {label} (sync timeout of {sync_config['timeout_minutes']} minutes reached)")
+            ok = False
+            continue
+        ok = run_headless(label, build_commands(remaining), remaining) and ok
+    return ok
+
+
+def update_nvchad(nvim_config_dir):
+    """Fast-forward an existing config that is a git checkout"""
+    if not (nvim_config_dir / '.git').exists():
+        Logger.info(f"Keeping existing Neovim config (not a git checkout): {nvim_config_dir}")
+        return
+    if os.environ.get(OFFLINE_ENV):
+        Logger.info("Offline: keeping the existing Neovim config as is")
+        return
     try:
-        # Clone NvChad starter config
-        install_cmd = 'git clone https://github.com/NvChad/starter ~/.config/nvim'
-        subprocess.run(install_cmd, shell=True, check=True)
-        Logger.success("NvChad installed")
-        Logger.info("Run 'nvim' to complete NvChad setup (plugins will auto-install)")
-        return True
+        run_with_retry(['git', '-C', str(nvim_config_dir), 'pull', '--ff-only', '--quiet'])
+        Logger.success("Neovim config updated")
+    except subprocess.CalledProcessError:
+        Logger.warning("Could not fast-forward the Neovim config (local changes?); keeping it as is")
+
 
+def install_nvchad(sync_config=None):
+    """
+    Install or update NvChad for Neovim and pre-sync its plugins
+
+    Args:
+        sync_config: The `nvchad:` config section (see SYNC_DEFAULTS)
+
+    Returns:
+        bool: True if NvChad is installed (a failed plugin sync only warns)
+    """
+    sync_config = {**SYNC_DEFAULTS, **(sync_config or {})}
+    Logger.info("Installing NvChad...")
+
+    nvim_config_dir = Path.home() / '.config' / 'nvim'
+
+    try:
+        if nvim_config_dir.exists():
+            Logger.info("Neovim config already exists, updating...")
+            update_nvchad(nvim_config_dir)
+        else:
+            # Clone NvChad starter config
+            git_clone(STARTER_URL, nvim_config_dir)
+            Logger.success("NvChad installed")
     except Exception as e:
         Logger.error(f"Failed to install NvChad: {e}")
         return False
 
+    if not sync_config['sync']:
+        Logger.info("Run 'nvim' to complete NvChad setup (plugins will auto-install)")
+    elif os.environ.get(OFFLINE_ENV):
+        Logger.info("Offline: plugins will install on the first 'nvim' start with network access")
+    elif sync_plugins(sync_config):
+        Logger.success("Plugins, tools and parsers installed; 'nvim' will start ready to use")
+    return True
+
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Install NvChad for Neovim")
+    add_offline_argument(parser)
+    args = parser.parse_args()
+
     config = load_config()
     optional_config = config.get('optional', {})
 
@@ -52,7 +247,9 @@ def main():
         Logger.info("NvChad installation disabled in config")
         return
 
-    install_nvchad()
+    activate_offline(args.offline)
+    if not install_nvchad(config.get('nvchad')):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
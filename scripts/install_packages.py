@@ -3,19 +3,158 @@
 Package Installation Script
 
 Installs Homebrew formulae, casks, and fonts
+
+What is missing and in which order to install it comes from one
+dependency plan (see brew_plan.py) instead of a `brew list` per package.
+The same `brew info` output records which app bundles the casks install
+(see cask_index.py) for the Dock step.
+Missing packages are downloaded in parallel before installing: formulae
+that share a missing dependency are fetched by the same worker, and the
+slowest downloads by their recorded times (see timings.py) start first.
+Every download and install time is recorded for the next run.
+
+Usage:
+    ./install_packages.py                    # Download from Homebrew
+    ./install_packages.py --offline BUNDLE   # Use bottles and casks from an offline bundle
 """
 
+import argparse
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from utils import Logger, load_config, run_command, command_exists
+from offline_bundle import add_offline_argument, activate_offline
+from timings import TimingDB, format_duration, longest_first
+from brew_plan import brew_info, plan_installs
+from cask_index import configured_casks, update_cask_index
+
+
+STEP = {
+    'description': 'Installing packages',
+    'tags': ['setup', 'brew'],
+    'requires': ['install_homebrew'],
+    'order': 20,
+    'cost': 900,
+    'sudo': True,
+}
+
+
+# (config key, timing kind, brew flags, label) in install order
+PACKAGE_GROUPS = [
+    ('brew_formulae', 'formula', [], 'Formulae'),
+    ('brew_fonts', 'cask', ['--cask'], 'Fonts'),
+    ('brew_casks', 'cask', ['--cask'], 'Casks'),
+]
+
+
+def find_missing(names, flags):
+    """
+    Split packages into missing and already installed
+
+    Returns:
+        tuple: (missing names, number skipped)
+    """
+    missing = []
+    for name in names:
+        result = run_command(["brew", "list", *flags, name], check=False, capture_output=True)
+        if result and result.returncode == 0:
+            Logger.warning(f"  {name} already installed (skipping)")
+        else:
+            missing.append(name)
+    return missing, len(names) - len(missing)
+
+
+def find_missing_planned(config):
+    """
+    Split every package group into missing and already installed from one
+    dependency plan
+
+    Returns:
+        tuple: (groups as for install_packages, formula download units), or
+        None if Homebrew could not be queried
+    """
+    fonts = config.get('brew_fonts', [])
+    casks = config.get('brew_casks', [])
+    # Personal apps ride along so the Dock step's index covers every cask it resolves
+    indexed = [cask for cask in configured_casks(config) if cask not in casks]
+    cask_entries = brew_info(fonts + casks + indexed, cask=True)
+    if cask_entries is None:
+        return None
+    # Fetched anyway: record the apps the casks install for the Dock step
+    update_cask_index(cask_entries)
+    plan = plan_installs(config.get('brew_formulae', []), fonts + casks, cask_entries=cask_entries)
+    if plan is None:
+        return None
+
+    for name in plan['satisfied'] + plan['casks_installed']:
+        Logger.warning(f"  {name} already installed (skipping)")
+    if plan['dependencies']:
+        Logger.info(f"  {len(plan['dependencies'])} dependencies will be installed along the way")
+
+    # Names brew does not know are still attempted, so the failure is reported
+    missing = {
+        'formula': [name for name in plan['order'] if name not in plan['dependencies']] + plan['unknown'],
+        'cask': set(plan['casks'] + plan['casks_unknown']),
+    }
+    groups = []
+    for key, kind, flags, label in PACKAGE_GROUPS:
+        names = config.get(key, [])
+        if names:
+            group_missing = missing['formula'] if kind == 'formula' else \
+                [name for name in names if name in missing['cask']]
+            groups.append((kind, flags, label, group_missing, len(names) - len(group_missing)))
+    units = [[('formula', name, []) for name in group] for group in plan['groups']]
+    return groups, units
+
+
+def prefetch(units, db, workers):
+    """
+    Download packages in parallel, longest estimated download first
+
+    Each unit is a list of packages fetched one after another by the same
+    worker; formulae sharing a missing dependency form one unit so no
+    bottle is downloaded twice at the same time. Starting the slowest units
+    first keeps them off the critical path: the short ones finish in the
+    remaining slots while they run. Failures are ignored; `brew install`
+    downloads anything missing itself.
+
+    Args:
+        units: Lists of (kind, name, flags) tuples
+        db: TimingDB with download history
+        workers: Concurrent downloads
+    """
+    def estimate(unit):
+        return sum(db.package_estimate(kind, name, 'fetch') for kind, name, _ in unit)
+
+    ordered = longest_first(units, estimate)
+    total = sum(len(unit) for unit in ordered)
+    Logger.info(f"Downloading {total} packages ({workers} at a time, longest first)...")
+
+    def fetch(unit):
+        fetched = 0
+        for kind, name, flags in unit:
+            start = time.monotonic()
+            result = run_command(["brew", "fetch", *flags, *(["--deps"] if not flags else []), name],
+                                 check=False, capture_output=True)
+            ok = bool(result) and result.returncode == 0
+            db.record_package(kind, name, 'fetch', time.monotonic() - start, ok)
+            fetched += ok
+        return fetched
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        fetched = sum(executor.map(fetch, ordered))
+    Logger.success(f"Downloaded {fetched}/{total} packages in {format_duration(time.monotonic() - start)}")
 
 
 def install_packages():
     """Install Homebrew formulae, casks, and fonts"""
     config = load_config()
+    db = TimingDB()
 
     Logger.info("Installing Homebrew packages...")
 
@@ -25,66 +164,47 @@ def install_packages():
         return False
 
     # Tap font cask if fonts are needed
-    fonts = config.get('brew_fonts', [])
-    if fonts:
+    if config.get('brew_fonts', []):
         Logger.info("Tapping homebrew/cask-fonts...")
         run_command(["brew", "tap", "homebrew/cask-fonts"], check=False)
 
-    # Install formulae (CLI tools)
-    formulae = config.get('brew_formulae', [])
-    if formulae:
-        Logger.info(f"Checking {len(formulae)} formulae...")
+    # Check what is already installed
+    Logger.info("Planning installs from the dependency graph...")
+    planned = find_missing_planned(config)
+    if planned:
+        groups, units = planned
+    else:
+        Logger.warning("Could not query the dependency graph; checking packages one by one")
+        groups, units = [], []
+        for key, kind, flags, label in PACKAGE_GROUPS:
+            names = config.get(key, [])
+            if names:
+                Logger.info(f"Checking {len(names)} {label.lower()}...")
+                missing, skipped = find_missing(names, flags)
+                groups.append((kind, flags, label, missing, skipped))
+        units = [[('formula', name, [])] for kind, _, _, missing, _ in groups if kind == 'formula'
+                 for name in missing]
+    # Casks do not share downloads: one unit each
+    units += [[(kind, name, flags)] for kind, flags, _, missing, _ in groups if kind == 'cask'
+              for name in missing]
+
+    # Download everything up front; installs then come from the cache
+    workers = (config.get('homebrew') or {}).get('parallel_downloads', 4)
+    if workers and sum(len(unit) for unit in units) > 1 and not activate_offline():
+        prefetch(units, db, workers)
+
+    for kind, flags, label, missing, skipped in groups:
         installed_count = 0
-        skipped_count = 0
-        for formula in formulae:
-            # Check if already installed
-            result = run_command(["brew", "list", formula], check=False, capture_output=True)
-            if result and result.returncode == 0:
-                Logger.warning(f"  {formula} already installed (skipping)")
-                skipped_count += 1
-            else:
-                Logger.info(f"  Installing {formula}...")
-                install_result = run_command(["brew", "install", formula], check=False)
-                if install_result and install_result.returncode == 0:
-                    installed_count += 1
-        Logger.success(f"Formulae: {installed_count} installed, {skipped_count} skipped")
-
-    # Install fonts
-    if fonts:
-        Logger.info(f"Checking {len(fonts)} fonts...")
-        installed_count = 0
-        skipped_count = 0
-        for font in fonts:
-            # Check if already installed
-            result = run_command(["brew", "list", "--cask", font], check=False, capture_output=True)
-            if result and result.returncode == 0:
-                Logger.warning(f"  {font} already installed (skipping)")
-                skipped_count += 1
-            else:
-                Logger.info(f"  Installing {font}...")
-                install_result = run_command(["brew", "install", "--cask", font], check=False)
-                if install_result and install_result.returncode == 0:
-                    installed_count += 1
-        Logger.success(f"Fonts: {installed_count} installed, {skipped_count} skipped")
-
-    # Install casks (GUI apps)
-    casks = config.get('brew_casks', [])
-    if casks:
-        Logger.info(f"Checking {len(casks)} casks...")
-        installed_count = 0
-        skipped_count = 0
-        for cask in casks:
-            # Check if already installed
-            result = run_command(["brew", "list", "--cask", cask], check=False, capture_output=True)
-            if result and result.returncode == 0:
-                Logger.warning(f"  {cask} already installed (skipping)")
-                skipped_count += 1
-            else:
-                Logger.info(f"  Installing {cask}...")
-                install_result = run_command(["brew", "install", "--cask", cask], check=False)
-                if install_result and install_result.returncode == 0:
-                    installed_count += 1
-        Logger.success(f"Casks: {installed_count} installed, {skipped_count} skipped")
+        for name in missing:
+            estimate = db.package_estimate(kind, name, 'install', default=None)
+            Logger.info(f"  Installing {name}..." + (f" (~{format_duration(estimate)})" if estimate else ""))
+            start = time.monotonic()
+            install_result = run_command(["brew", "install", *flags, name], check=False, stream="progress")
+            ok = bool(install_result) and install_result.returncode == 0
+            db.record_package(kind, name, 'install', time.monotonic() - start, ok)
+            if ok:
+                installed_count += 1
+        Logger.success(f"{label}: {installed_count} installed, {skipped} skipped")
 
     Logger.success("Homebrew packages installed")
     return True
@@ -92,11 +212,16 @@ def install_packages():
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Install Homebrew formulae, casks, and fonts")
+    add_offline_argument(parser)
+    args = parser.parse_args()
+
     print("=" * 60)
     print("  Package Installation")
     print("=" * 60)
     print()
 
+    activate_offline(args.offline)
     if not install_packages():
         sys.exit(1)
 
@@ -4,6 +4,7 @@ Personal Applications Installation Script
 
 Installs personal/non-professional applications.
 This script is separate from the main professional setup.
+The app list is `personal_apps` in profiles/personal.yaml.
 
 Apps included:
 - Communication: Discord
@@ -16,7 +17,11 @@ Apps included:
 
 Usage:
     ./install_personal_apps.py        # Interactive mode (asks for confirmation)
-    ./install_personal_apps.py -y     # Skip confirmation prompt
+    ./install_personal_apps.py -y     # Skip confirmation prompt (implied by setup.py --non-interactive)
+
+Uses the profile selected with `setup.py --profile` (or the
+MAC_BOOTSTRAP_PROFILE environment variable), falling back to "personal"
+when no profile is selected or the selected one has no `personal_apps`.
 """
 
 import argparse
@@ -25,40 +30,25 @@ from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import Logger, run_command, command_exists
-
-
-# Personal applications to install
-PERSONAL_APPS = [
-    # Communication & Gaming
-    'discord',
-    'jagex-launcher',
-    'runelite',
-    'steam',
-
-    # Cloud Storage
-    'google-drive',
+from utils import Logger, load_config, run_command, command_exists, active_profile, is_non_interactive
+from offline_bundle import add_offline_argument, activate_offline
 
-    # Utilities
-    'appcleaner',
-    'keka',
-    'veracrypt',
 
-    # Media
-    'vlc',
-    'handbrake',
+# Profile used when no profile is selected for the run
+DEFAULT_PROFILE = 'personal'
 
-    # Remote Access & Network Tools
-    'anydesk',
-    'cyberduck',
-    'wireshark',
 
-    # System Tools
-    'balenaetcher',
+def get_personal_apps():
+    """
+    Get the personal app list from the resolved profile
 
-    # Optional
-    # 'spotify',  # Uncomment if needed
-]
+    Profiles that do not set `personal_apps` (backend, data, design) use
+    the list from the personal profile.
+    """
+    config = load_config(profile=active_profile() or DEFAULT_PROFILE)
+    if 'personal_apps' not in config:
+        config = load_config(profile=DEFAULT_PROFILE)
+    return config.get('personal_apps') or []
 
 
 def install_personal_apps():
@@ -72,7 +62,7 @@ def install_personal_apps():
 
     installed_count = 0
     skipped_count = 0
-    for app in PERSONAL_APPS:
+    for app in get_personal_apps():
         # Check if already installed
         result = run_command(["brew", "list", "--cask", app], check=False, capture_output=True)
         if result and result.returncode == 0:
@@ -80,7 +70,7 @@ def install_personal_apps():
             skipped_count += 1
         else:
             Logger.info(f"  Installing {app}...")
-            install_result = run_command(["brew", "install", "--cask", app], check=False)
+            install_result = run_command(["brew", "install", "--cask", app], check=False, stream="progress")
             if install_result and install_result.returncode == 0:
                 installed_count += 1
 
@@ -99,6 +89,7 @@ def main():
         action="store_true",
         help="Skip confirmation prompt and install automatically"
     )
+    add_offline_argument(parser)
     args = parser.parse_args()
 
     print("=" * 60)
@@ -106,17 +97,18 @@ def main():
     print("=" * 60)
     print()
     print("This will install personal/non-professional apps:")
-    for app in PERSONAL_APPS:
+    for app in get_personal_apps():
         print(f"  - {app}")
     print()
 
-    # Skip confirmation if -y flag is provided
-    if not args.yes:
+    # Skip confirmation if -y flag is provided or the run is unattended
+    if not args.yes and not is_non_interactive():
         response = input("Continue? (y/n): ")
         if response.lower() != 'y':
             Logger.info("Installation cancelled")
             return
 
+    activate_offline(args.offline)
     if not install_personal_apps():
         sys.exit(1)
 
@@ -3,8 +3,13 @@
 Zsh and Oh My Zsh Installation Script
 
 Installs Oh My Zsh and custom plugins
+
+Usage:
+    ./install_zsh.py                    # Install from the network
+    ./install_zsh.py --offline BUNDLE   # Install from an offline bundle
 """
 
+import argparse
 import os
 import subprocess
 import sys
@@ -13,6 +18,29 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from utils import Logger, load_config
+from installers import get_installer
+from offline_bundle import OH_MY_ZSH_REPO, add_offline_argument, activate_offline, git_clone, offline_repo
+from privileged import PrivilegedBatch
+
+
+STEP = {
+    'description': 'Installing Zsh and Oh My Zsh',
+    'tags': ['setup', 'shell'],
+    'requires': ['install_packages'],
+    'order': 80,
+    'cost': 60,
+    'sudo': True,
+}
+
+
+# Custom plugins cloned into ~/.oh-my-zsh/custom/plugins
+ZSH_PLUGINS = {
+    'zsh-autosuggestions': 'https://github.com/zsh-users/zsh-autosuggestions',
+    'zsh-syntax-highlighting': 'https://github.com/zsh-users/zsh-syntax-highlighting',
+    'zsh-interactive-cd': 'https://github.com/changyuheng/zsh-interactive-cd',
+    'you-should-use': 'https://github.com/MichaelAquilina/zsh-you-should-use',
+    'zsh-bat': 'https://github.com/fdellwing/zsh-bat'
+}
 
 
 def install_oh_my_zsh():
@@ -27,16 +55,27 @@ def install_oh_my_zsh():
 
     try:
         # Download and install Oh My Zsh (non-interactive)
-        install_cmd = 'sh -c "$(curl -fsSL https://raw.githubusercontent.com/ohmyzsh/ohmyzsh/master/tools/install.sh)" "" --unattended'
-        subprocess.run(install_cmd, shell=True, check=True)
+        install_script = get_installer('oh_my_zsh')
+        env = dict(os.environ)
+        oh_my_zsh_repo = offline_repo(OH_MY_ZSH_REPO)
+        if oh_my_zsh_repo:
+            # The installer clones $REMOTE
+            env['REMOTE'] = str(oh_my_zsh_repo)
+        subprocess.run(['sh', str(install_script), '--unattended'], check=True, env=env)
         Logger.success("Oh My Zsh installed")
 
         # Set zsh as default shell
         current_shell = os.environ.get('SHELL', '')
         if 'zsh' not in current_shell:
             Logger.info("Setting zsh as default shell...")
-            subprocess.run(['chsh', '-s', '/bin/zsh'], check=False)
-            Logger.success("Zsh set as default shell (restart terminal to apply)")
+            # chsh prompts for the user's password; run it through the privileged helper instead
+            batch = PrivilegedBatch()
+            batch.chsh('/bin/zsh')
+            result, = batch.run()
+            if result['ok']:
+                Logger.success("Zsh set as default shell (restart terminal to apply)")
+            else:
+                Logger.warning(f"Could not set zsh as default shell: {result['output']}")
 
         return True
     except Exception as e:
@@ -51,38 +90,30 @@ def install_zsh_plugins():
     custom_plugins_dir = Path.home() / '.oh-my-zsh' / 'custom' / 'plugins'
     custom_plugins_dir.mkdir(parents=True, exist_ok=True)
 
-    plugins_to_install = {
-        'zsh-autosuggestions': 'https://github.com/zsh-users/zsh-autosuggestions',
-        'zsh-syntax-highlighting': 'https://github.com/zsh-users/zsh-syntax-highlighting',
-        'zsh-interactive-cd': 'https://github.com/changyuheng/zsh-interactive-cd',
-        'you-should-use': 'https://github.com/MichaelAquilina/zsh-you-should-use',
-        'zsh-bat': 'https://github.com/fdellwing/zsh-bat'
-    }
-
     success_count = 0
-    for plugin_name, repo_url in plugins_to_install.items():
+    for plugin_name, repo_url in ZSH_PLUGINS.items():
         plugin_path = custom_plugins_dir / plugin_name
         if plugin_path.exists():
             Logger.warning(f"{plugin_name} already installed")
             success_count += 1
         else:
             try:
-                subprocess.run(
-                    ['git', 'clone', repo_url, str(plugin_path)],
-                    check=True,
-                    capture_output=True
-                )
+                git_clone(repo_url, plugin_path)
                 Logger.success(f"Installed {plugin_name}")
                 success_count += 1
             except Exception as e:
                 Logger.error(f"Failed to install {plugin_name}: {e}")
 
-    Logger.success(f"Zsh plugins installation complete ({success_count}/{len(plugins_to_install)})")
-    return success_count == len(plugins_to_install)
+    Logger.success(f"Zsh plugins installation complete ({success_count}/{len(ZSH_PLUGINS)})")
+    return success_count == len(ZSH_PLUGINS)
 
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Install Oh My Zsh and custom plugins")
+    add_offline_argument(parser)
+    args = parser.parse_args()
+
     config = load_config()
     optional_config = config.get('optional', {})
 
@@ -95,6 +126,7 @@ def main():
         Logger.info("Oh My Zsh installation disabled in config")
         return
 
+    activate_offline(args.offline)
     if install_oh_my_zsh():
         install_zsh_plugins()
     else:
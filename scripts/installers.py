@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Installer Artifact Manager
+
+Keeps local, checksummed copies of the remote installer scripts (Homebrew,
+Oh My Zsh). Each script is downloaded once into a content-addressed cache
+and verified against the SHA-256 pinned in `installers:` in config.yaml, so
+reruns need no network access and a tampered download is never executed.
+
+An unpinned installer is only used when its entry sets `allow_unpinned`
+or, in an interactive run, once its hash has been confirmed; the accepted
+copy is then reused like a pinned one. Unattended runs refuse it.
+
+Usage:
+    ./installers.py          # Show installers, pins and cache status
+    ./installers.py --fetch  # Download every installer into the cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, STATE_DIR, is_non_interactive, load_config, run_with_retry
+
+
+CACHE_DIR = STATE_DIR / 'installers'
+INDEX_FILE = CACHE_DIR / 'index.json'
+
+# Used when config.yaml has no entry for an installer
+DEFAULT_INSTALLERS = {
+    'homebrew': {'url': 'https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh'},
+    'oh_my_zsh': {'url': 'https://raw.githubusercontent.com/ohmyzsh/ohmyzsh/master/tools/install.sh'},
+}
+
+
+class InstallerVerificationError(RuntimeError):
+    """Raised when an installer does not match its pinned checksum"""
+
+
+def sha256_file(path):
+    """Compute the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_installer_config(name, config=None):
+    """Get the url/sha256 entry for an installer"""
+    config = config if config is not None else load_config()
+    entry = dict(DEFAULT_INSTALLERS.get(name, {}))
+    entry.update((config.get('installers') or {}).get(name) or {})
+    if 'url' not in entry:
+        raise KeyError(f"Unknown installer: {name}")
+    return entry
+
+
+def _load_index():
+    try:
+        with open(INDEX_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index):
+    tmp_file = INDEX_FILE.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_file, INDEX_FILE)
+
+
+def _cached_path(digest):
+    """Get the cached file for a digest if present and intact"""
+    path = CACHE_DIR / digest
+    if path.exists() and sha256_file(path) == digest:
+        return path
+    return None
+
+
+def _accept_unpinned(name, digest, allowed):
+    """Decide whether an unpinned download may be cached and run"""
+    if allowed:
+        return True
+    if is_non_interactive():
+        return False
+    response = input(f"The {name} installer is not pinned (sha256 {digest}). Use it? (y/n): ")
+    return response.strip().lower() == 'y'
+
+
+def get_installer(name, config=None, allow_unpinned=None):
+    """
+    Get a verified local copy of an installer script
+
+    A pinned installer already in the cache is used without any network
+    access. Unpinned installers are refused unless allowed (see the module
+    docstring); once accepted they are reused and their hash is printed so
+    it can be pinned in config.yaml.
+
+    Args:
+        name: Installer name (e.g. "homebrew")
+        config: Configuration dictionary (default: load_config())
+        allow_unpinned: Accept an unpinned download (default: the entry's
+            `allow_unpinned`, or ask in interactive runs)
+
+    Returns:
+        Path: Cached installer script
+
+    Raises:
+        InstallerVerificationError: The download does not match the pinned
+            SHA-256, or is unpinned and was not accepted
+    """
+    entry = get_installer_config(name, config)
+    url = entry['url']
+    pinned = (entry.get('sha256') or '').lower() or None
+    if allow_unpinned is None:
+        allow_unpinned = bool(entry.get('allow_unpinned'))
+    index = _load_index()
+
+    known = pinned or index.get(url)
+    if known:
+        cached = _cached_path(known)
+        if cached:
+            return cached
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = CACHE_DIR / f"download.{os.getpid()}.tmp"
+    Logger.info(f"Downloading {name} installer...")
+    try:
+        run_with_retry(['curl', '-fsSL', '-o', str(tmp_file), url])
+        digest = sha256_file(tmp_file)
+        if pinned and digest != pinned:
+            raise InstallerVerificationError(
+                f"{name} installer checksum mismatch: expected {pinned}, got {digest}"
+            )
+        if not pinned and not _accept_unpinned(name, digest, allow_unpinned):
+            raise InstallerVerificationError(
+                f"{name} installer is not pinned (sha256 {digest}); set installers.{name}.sha256 "
+                f"or allow_unpinned in config.yaml"
+            )
+        os.replace(tmp_file, CACHE_DIR / digest)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+    if not pinned:
+        Logger.warning(f"{name} installer is not pinned; add `sha256: {digest}` under installers.{name}")
+    index[url] = digest
+    _save_index(index)
+    return CACHE_DIR / digest
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Manage cached installer scripts")
+    parser.add_argument(
+        "--fetch",
+        action="store_true",
+        help="Download every installer into the cache"
+    )
+    args = parser.parse_args()
+
+    config = load_config()
+    names = sorted(set(DEFAULT_INSTALLERS) | set(config.get('installers') or {}))
+    index = _load_index()
+
+    failed = False
+    for name in names:
+        entry = get_installer_config(name, config)
+        if args.fetch:
+            try:
+                # Fetching only caches the script (to print its hash), it runs nothing
+                get_installer(name, config, allow_unpinned=True)
+                index = _load_index()
+            except Exception as e:
+                Logger.error(f"Failed to fetch {name} installer: {e}")
+                failed = True
+        digest = (entry.get('sha256') or index.get(entry['url']) or '').lower()
+        status = 'cached' if digest and (CACHE_DIR / digest).exists() else 'not cached'
+        pin = 'pinned' if entry.get('sha256') else 'unpinned'
+        print(f"  {name:<12} {pin:<9} {status:<11} {digest or '-'}")
+        print(f"  {'':<12} {entry['url']}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
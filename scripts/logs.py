@@ -0,0 +1,475 @@
+"""
+Unified logging for setup.py and the setup scripts
+
+Every message is a structured record (timestamp, step, level, message)
+sent through one hub per process to a set of sinks:
+
+- ConsoleSink:    coloured `[INFO] ...` lines (the classic output)
+- StatusView:     compact live view on a TTY, one line per running step
+- JsonLinesSink:  one JSON object per record, for machines
+- StepFileSink:   full log of each step in <run dir>/<step>.log
+
+File and pipe sinks buffer in memory and are flushed by a background thread
+every FLUSH_INTERVAL seconds, so chatty command output costs one write per
+batch rather than one per line.
+
+setup.py creates a run directory and exports it to the scripts it runs:
+
+- MAC_BOOTSTRAP_LOG_DIR:    run directory for log files
+- MAC_BOOTSTRAP_STEP:       step name records are tagged with
+- MAC_BOOTSTRAP_LOG_FORMAT: "json" (script writes records to stdout; setup.py
+  parses them, renders them and writes the files, together with any other
+  output of the script) or "plain" (the default for a script run on its own:
+  it owns the terminal and its log files)
+"""
+
+import atexit
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+LOG_DIR_ENV = 'MAC_BOOTSTRAP_LOG_DIR'
+STEP_ENV = 'MAC_BOOTSTRAP_STEP'
+LOG_FORMAT_ENV = 'MAC_BOOTSTRAP_LOG_FORMAT'
+
+LOGS_DIR = Path.home() / '.cache' / 'mac-bootstrap' / 'logs'
+KEEP_RUNS = 20
+FLUSH_INTERVAL = 0.2
+BUFFER_LIMIT = 64 * 1024
+ANSI_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+# Levels in increasing severity; "output" is raw command/script output and
+# "progress" a transient status line that the next message replaces
+LEVELS = ('progress', 'output', 'info', 'success', 'warning', 'error')
+
+
+class Colors:
+    """ANSI color codes for terminal output"""
+    RED = '\033[0;31m'
+    GREEN = '\033[0;32m'
+    YELLOW = '\033[1;33m'
+    BLUE = '\033[0;34m'
+    DIM = '\033[2m'
+    NC = '\033[0m'  # No Color
+
+
+LEVEL_COLORS = {
+    'info': Colors.BLUE,
+    'success': Colors.GREEN,
+    'warning': Colors.YELLOW,
+    'error': Colors.RED,
+}
+
+
+class LogRecord:
+    """One log message"""
+
+    __slots__ = ('ts', 'step', 'level', 'msg')
+
+    def __init__(self, level, msg, step, ts=None):
+        self.ts = ts if ts is not None else time.time()
+        self.step = step
+        self.level = level
+        self.msg = msg
+
+    def to_dict(self):
+        return {'ts': round(self.ts, 3), 'step': self.step, 'level': self.level, 'msg': self.msg}
+
+    @classmethod
+    def from_json(cls, line, default_step):
+        """Parse a JSON-lines record, or None if the line is not one"""
+        if not line.startswith('{'):
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or data.get('level') not in LEVELS + ('step',):
+            return None
+        return cls(data['level'], str(data.get('msg', '')), data.get('step') or default_step, data.get('ts'))
+
+
+def format_line(record, color=True):
+    """Format a record the way the console shows it"""
+    if record.level in ('output', 'progress'):
+        return record.msg
+    label = f"[{record.level.upper()}]"
+    if color:
+        return f"{LEVEL_COLORS[record.level]}{label}{Colors.NC} {record.msg}"
+    return f"{label} {record.msg}"
+
+
+class BufferedFile:
+    """
+    Append-only file written in batches
+
+    Each flush is a single write() to an O_APPEND descriptor, so several
+    processes can append to the same file without splitting lines.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._chunks = []
+        self._size = 0
+
+    def write(self, text):
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size >= BUFFER_LIMIT:
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            data = ''.join(self._chunks).encode(errors='replace')
+            self._chunks = []
+            self._size = 0
+            os.write(self._fd, data)
+
+    def close(self):
+        self.flush()
+        os.close(self._fd)
+
+
+class Sink:
+    """Base class for record destinations"""
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def step_started(self, step, description):
+        pass
+
+    def step_finished(self, step, ok, elapsed):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class ConsoleSink(Sink):
+    """Coloured lines on stdout"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.color = True
+        self.tty = self.stream.isatty()
+        self._progress_shown = False
+
+    def write(self, record):
+        if record.level == 'step':
+            return
+        if record.level == 'progress':
+            # Redrawn in place on a terminal, dropped elsewhere
+            if self.tty:
+                width = shutil.get_terminal_size().columns - 1
+                self.stream.write(f"\r\033[K{Colors.DIM}{record.msg[:width]}{Colors.NC}")
+                self.stream.flush()
+                self._progress_shown = True
+            return
+        if self._progress_shown:
+            self.stream.write("\r\033[K")
+            self._progress_shown = False
+        self.stream.write(format_line(record, self.color) + '\n')
+        if self.tty:
+            self.stream.flush()
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        if self._progress_shown:
+            self.stream.write("\r\033[K")
+        self.flush()
+
+
+class JsonLinesSink(Sink):
+    """One JSON object per record, to a stream or an appended file"""
+
+    def __init__(self, target):
+        if isinstance(target, (str, Path)):
+            self._file = BufferedFile(target)
+            self._write = self._file.write
+            self._flush = self._file.flush
+        else:
+            self._file = None
+            self._write = target.write
+            self._flush = target.flush
+
+    def write(self, record):
+        self._write(json.dumps(record.to_dict()) + '\n')
+
+    def step_started(self, step, description):
+        self.write(LogRecord('step', f"started: {description}", step))
+
+    def step_finished(self, step, ok, elapsed):
+        self.write(LogRecord('step', f"{'ok' if ok else 'failed'} in {elapsed:.1f}s", step))
+
+    def flush(self):
+        self._flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+        else:
+            self.flush()
+
+
+class StepFileSink(Sink):
+    """Full plain-text log of each step in <directory>/<step>.log"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._files = {}
+
+    def _file(self, step):
+        if step not in self._files:
+            self._files[step] = BufferedFile(self.directory / f"{step}.log")
+        return self._files[step]
+
+    def write(self, record):
+        stamp = time.strftime('%H:%M:%S', time.localtime(record.ts)) + f".{int(record.ts * 1000) % 1000:03d}"
+        self._file(record.step).write(f"{stamp} {format_line(record, color=False)}\n")
+
+    def step_finished(self, step, ok, elapsed):
+        self.write(LogRecord('info', f"Step {'succeeded' if ok else 'failed'} in {elapsed:.1f}s", step))
+        self._file(step).flush()
+
+    def flush(self):
+        for file in self._files.values():
+            file.flush()
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._files = {}
+
+
+class StatusView(Sink):
+    """
+    Live status view for terminals
+
+    Shows one line per running step with its elapsed time and latest
+    message, redrawn in place. Finished steps, warnings, errors and the
+    orchestrator's own messages scroll above the live lines.
+    """
+
+    SPINNER = '⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏'
+
+    def __init__(self, own_step, stream=None):
+        self.own_step = own_step
+        self.stream = stream or sys.stdout
+        self._running = {}  # step -> [description, start time, latest message]
+        self._drawn = 0
+        self._frame = 0
+
+    def _clear(self):
+        if self._drawn:
+            self.stream.write(f"\033[{self._drawn}F\033[J")
+            self._drawn = 0
+
+    def _draw(self):
+        width = max(40, os.get_terminal_size(self.stream.fileno()).columns if self.stream.isatty() else 100)
+        spinner = self.SPINNER[self._frame % len(self.SPINNER)]
+        now = time.monotonic()
+        for description, start, latest in self._running.values():
+            head = f"{spinner} {description} ({now - start:.0f}s)"
+            line = f"{head}  {Colors.DIM}{latest}" if latest else head
+            self.stream.write(line[:width + len(Colors.DIM)] + Colors.NC + '\n')
+        self._drawn = len(self._running)
+
+    def _print(self, text):
+        self._clear()
+        self.stream.write(text + '\n')
+        self._draw()
+
+    def write(self, record):
+        if record.level == 'step':
+            return
+        if record.step == self.own_step and not record.msg.strip():
+            return  # Keep the view compact
+        if record.step == self.own_step or record.level in ('warning', 'error'):
+            prefix = '' if record.step == self.own_step else f"{record.step}: "
+            self._print(format_line(LogRecord(record.level, prefix + record.msg, record.step)))
+        elif record.step in self._running and record.msg.strip():
+            self._running[record.step][2] = ANSI_RE.sub('', record.msg).strip().replace('\t', ' ')
+
+    def step_started(self, step, description):
+        self._running[step] = [description, time.monotonic(), '']
+        self._clear()
+        self._draw()
+
+    def step_finished(self, step, ok, elapsed):
+        description = self._running.pop(step, [step])[0]
+        mark = f"{Colors.GREEN}✓" if ok else f"{Colors.RED}✗"
+        self._print(f"{mark}{Colors.NC} {description} ({elapsed:.1f}s)")
+
+    def flush(self):
+        # Called periodically: advance the spinner and elapsed times
+        if self._running:
+            self._frame += 1
+            self._clear()
+            self._draw()
+        self.stream.flush()
+
+    def close(self):
+        self._clear()
+        self.stream.flush()
+
+
+class LogHub:
+    """Routes records to sinks; thread-safe, flushed in the background"""
+
+    def __init__(self, step, sinks=()):
+        self.step = step
+        self.sinks = list(sinks)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def emit(self, level, msg, step=None, ts=None):
+        self.dispatch(LogRecord(level, msg, step or self.step, ts))
+
+    def dispatch(self, record):
+        with self._lock:
+            for sink in self.sinks:
+                sink.write(record)
+
+    def step_started(self, step, description):
+        with self._lock:
+            for sink in self.sinks:
+                sink.step_started(step, description)
+
+    def step_finished(self, step, ok, elapsed):
+        with self._lock:
+            for sink in self.sinks:
+                sink.step_finished(step, ok, elapsed)
+
+    def flush(self):
+        with self._lock:
+            for sink in self.sinks:
+                sink.flush()
+
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except (OSError, ValueError):
+                pass
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            for sink in self.sinks:
+                try:
+                    sink.close()
+                except (OSError, ValueError):
+                    # The stream was closed first (e.g. stdout piped to head)
+                    pass
+
+
+_hub = None
+
+
+def new_run_dir():
+    """Create a log directory for this run and prune old ones"""
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    runs = sorted(path for path in LOGS_DIR.iterdir() if path.is_dir())
+    for old in runs[:max(0, len(runs) - KEEP_RUNS + 1)]:
+        for file in old.iterdir():
+            file.unlink()
+        old.rmdir()
+
+    name = time.strftime('%Y%m%d-%H%M%S')
+    path = LOGS_DIR / name
+    suffix = 1
+    while path.exists():
+        path = LOGS_DIR / f"{name}-{suffix}"
+        suffix += 1
+    path.mkdir()
+    return path
+
+
+def configure(step, log_format='plain', log_dir=None):
+    """
+    Set up this process's hub
+
+    Args:
+        step: Step name records are tagged with
+        log_format: "plain", "status" or "json" (console rendering)
+        log_dir: Run directory for per-step logs and run.jsonl
+
+    Returns:
+        LogHub
+    """
+    global _hub
+    if _hub:
+        _hub.close()
+
+    if log_format == 'json':
+        sinks = [JsonLinesSink(sys.stdout)]
+    elif log_format == 'status':
+        sinks = [StatusView(step)]
+    else:
+        sinks = [ConsoleSink()]
+    if log_dir:
+        sinks += [StepFileSink(log_dir), JsonLinesSink(Path(log_dir) / 'run.jsonl')]
+
+    _hub = LogHub(step, sinks)
+    return _hub
+
+
+def get_hub():
+    """Get this process's hub, configured from the environment on first use"""
+    if _hub is None:
+        log_format = os.environ.get(LOG_FORMAT_ENV, 'plain')
+        step = os.environ.get(STEP_ENV) or Path(sys.argv[0]).stem or 'main'
+        # In json mode the parent process writes the log files
+        log_dir = os.environ.get(LOG_DIR_ENV) if log_format == 'plain' else None
+        configure(step, log_format, log_dir)
+    return _hub
+
+
+class Logger:
+    """Logging facade used by every script"""
+
+    @staticmethod
+    def info(msg):
+        get_hub().emit('info', msg)
+
+    @staticmethod
+    def success(msg):
+        get_hub().emit('success', msg)
+
+    @staticmethod
+    def warning(msg):
+        get_hub().emit('warning', msg)
+
+    @staticmethod
+    def error(msg):
+        get_hub().emit('error', msg)
+
+    @staticmethod
+    def output(msg=''):
+        """Plain text (banners, command output), logged without a level label"""
+        get_hub().emit('output', msg)
+
+    @staticmethod
+    def progress(msg):
+        """Transient status line, replaced by the next message on a terminal"""
+        get_hub().emit('progress', msg)
@@ -0,0 +1,334 @@
+"""
+Minimal YAML reader
+
+A dependency-free parser for the YAML subset used by config.yaml, the
+profiles and fleet inventories, so the tool runs on the stock macOS Python
+without PyYAML:
+
+- Block mappings and sequences (including mappings inside sequences)
+- Flow sequences and mappings: [a, b], {key: value}
+- Plain, 'single' and "double" quoted scalars
+- Plain scalars resolve like PyYAML's safe_load (YAML 1.1): null, booleans
+  (including yes/no/on/off), ints (010 is octal 8; 0x, 0b and 1:30 base 60),
+  floats (1.5, 1.0e+3, .inf, .nan; 1e3 stays a string) and dates and
+  timestamps (datetime.date, datetime.datetime)
+- Comments and a leading --- document marker
+- JSON documents (provision_fleet.py ships the resolved config as JSON)
+
+Anchors, tags and multi-line (| or >) scalars are not supported and raise
+MiniYAMLError. Use PyYAML for anything beyond this subset.
+"""
+
+import datetime
+import json
+import re
+
+
+class MiniYAMLError(ValueError):
+    """Raised for malformed or unsupported YAML"""
+
+
+# Implicit resolvers of PyYAML's SafeLoader (YAML 1.1)
+INT_RE = re.compile(r'''^(?:[-+]?0b[0-1_]+
+    |[-+]?0[0-7_]+
+    |[-+]?(?:0|[1-9][0-9_]*)
+    |[-+]?0x[0-9a-fA-F_]+
+    |[-+]?[1-9][0-9_]*(?::[0-5]?[0-9])+)$''', re.X)
+FLOAT_RE = re.compile(r'''^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+][0-9]+)?
+    |\.[0-9][0-9_]*(?:[eE][-+][0-9]+)?
+    |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\.[0-9_]*
+    |[-+]?\.(?:inf|Inf|INF)
+    |\.(?:nan|NaN|NAN))$''', re.X)
+TIMESTAMP_RE = re.compile(r'''^(?P<year>[0-9]{4})-(?P<month>[0-9]{1,2})-(?P<day>[0-9]{1,2})
+    (?:(?:[Tt]|[ \t]+)(?P<hour>[0-9]{1,2}):(?P<minute>[0-9]{2}):(?P<second>[0-9]{2})
+    (?:\.(?P<fraction>[0-9]*))?
+    (?:[ \t]*(?P<tz>Z|(?P<tz_sign>[-+])(?P<tz_hour>[0-9]{1,2})(?::(?P<tz_minute>[0-9]{2}))?))?)?$''', re.X)
+BOOLEANS = {
+    'yes': True, 'Yes': True, 'YES': True, 'true': True, 'True': True, 'TRUE': True,
+    'on': True, 'On': True, 'ON': True,
+    'no': False, 'No': False, 'NO': False, 'false': False, 'False': False, 'FALSE': False,
+    'off': False, 'Off': False, 'OFF': False,
+}
+NULLS = {'', '~', 'null', 'Null', 'NULL'}
+DOUBLE_ESCAPES = {'n': '\n', 't': '\t', '"': '"', '\\': '\\', '/': '/', '0': '\0'}
+
+
+def _strip_comment(text):
+    """Remove a trailing comment outside quotes"""
+    quote = None
+    for i, char in enumerate(text):
+        if quote:
+            if char == '\\' and quote == '"':
+                continue
+            if char == quote:
+                quote = None
+        elif char in '\'"' and (i == 0 or text[i - 1] in ' \t[{,:-'):
+            quote = char
+        elif char == '#' and (i == 0 or text[i - 1] in ' \t'):
+            return text[:i].rstrip()
+    return text.rstrip()
+
+
+def _split_key(text, lineno):
+    """
+    Split `key: value` at the first mapping colon
+
+    Returns:
+        tuple: (key, rest) or None if the text is not a mapping entry
+    """
+    if text[:1] in '\'"':
+        end = _quoted_end(text, lineno)
+        rest = text[end:].lstrip()
+        if rest.startswith(':') and (len(rest) == 1 or rest[1] in ' \t'):
+            return _scalar(text[:end], lineno), rest[1:].strip()
+        return None
+    match = re.search(r':(\s|$)', text)
+    if not match or text[:1] in '[{':
+        return None
+    return _scalar(text[:match.start()].strip(), lineno), text[match.end():].strip()
+
+
+def _quoted_end(text, lineno):
+    """Index just past the quoted scalar that starts text"""
+    quote = text[0]
+    i = 1
+    while i < len(text):
+        if quote == '"' and text[i] == '\\':
+            i += 2
+            continue
+        if text[i] == quote:
+            if quote == "'" and text[i + 1:i + 2] == "'":
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    raise MiniYAMLError(f"line {lineno}: unterminated string")
+
+
+def _scalar(text, lineno):
+    """Convert a scalar token to a Python value"""
+    text = text.strip()
+    if text[:1] == '"':
+        body = text[1:_quoted_end(text, lineno) - 1]
+        return re.sub(r'\\(.)', lambda m: DOUBLE_ESCAPES.get(m.group(1), '\\' + m.group(1)), body)
+    if text[:1] == "'":
+        return text[1:_quoted_end(text, lineno) - 1].replace("''", "'")
+    if text[:1] in '&*!|>':
+        raise MiniYAMLError(f"line {lineno}: unsupported YAML syntax: {text}")
+    if text in NULLS:
+        return None
+    if text in BOOLEANS:
+        return BOOLEANS[text]
+    if INT_RE.match(text):
+        return _int(text.replace('_', ''))
+    if FLOAT_RE.match(text):
+        return _float(text.replace('_', '').lower())
+    match = TIMESTAMP_RE.match(text)
+    # A bare date needs two-digit months and days (2024-01-05, not 2024-1-5)
+    if match and (match['hour'] or len(match['month']) == len(match['day']) == 2):
+        return _timestamp(match, lineno)
+    return text
+
+
+def _sexagesimal(sign, text, base_value):
+    """Value of a base 60 number such as 1:30:00"""
+    value = 0
+    for part in text.split(':'):
+        value = value * 60 + base_value(part)
+    return sign * value
+
+
+def _int(text):
+    """Convert an int token the way YAML 1.1 does (0b, 0x, leading-zero octal, sexagesimal)"""
+    sign = -1 if text[0] == '-' else 1
+    text = text.lstrip('-+')
+    if text == '0':
+        return 0
+    if text.startswith('0b'):
+        return sign * int(text[2:], 2)
+    if text.startswith('0x'):
+        return sign * int(text[2:], 16)
+    if text.startswith('0'):
+        return sign * int(text, 8)
+    if ':' in text:
+        return _sexagesimal(sign, text, int)
+    return sign * int(text)
+
+
+def _float(text):
+    """Convert a lower-cased float token (including .inf, .nan and sexagesimal)"""
+    sign = -1 if text[0] == '-' else 1
+    text = text.lstrip('-+')
+    if text == '.inf':
+        return sign * float('inf')
+    if text == '.nan':
+        return float('nan')
+    if ':' in text:
+        return _sexagesimal(sign, text, float)
+    return sign * float(text)
+
+
+def _timestamp(match, lineno):
+    """Convert a date (datetime.date) or timestamp (datetime.datetime)"""
+    parts = match.groupdict()
+    try:
+        if parts['hour'] is None:
+            return datetime.date(int(parts['year']), int(parts['month']), int(parts['day']))
+        tzinfo = None
+        if parts['tz_sign']:
+            offset = datetime.timedelta(hours=int(parts['tz_hour']), minutes=int(parts['tz_minute'] or 0))
+            tzinfo = datetime.timezone(-offset if parts['tz_sign'] == '-' else offset)
+        elif parts['tz']:
+            tzinfo = datetime.timezone.utc
+        fraction = int((parts['fraction'] or '0')[:6].ljust(6, '0'))
+        return datetime.datetime(int(parts['year']), int(parts['month']), int(parts['day']),
+                                 int(parts['hour']), int(parts['minute']), int(parts['second']),
+                                 fraction, tzinfo=tzinfo)
+    except ValueError as e:
+        raise MiniYAMLError(f"line {lineno}: invalid timestamp {match.group(0)}: {e}")
+
+
+def _flow(text, lineno):
+    """Parse a flow collection ([...] or {...}) or scalar"""
+    value, rest = _flow_value(text.strip(), lineno)
+    if rest.strip():
+        raise MiniYAMLError(f"line {lineno}: unexpected text after value: {rest.strip()}")
+    return value
+
+
+def _flow_value(text, lineno):
+    """Parse one flow value from the start of text; returns (value, remaining text)"""
+    text = text.lstrip()
+    if text[:1] in '[{':
+        closing = ']' if text[0] == '[' else '}'
+        items = [] if closing == ']' else {}
+        text = text[1:].lstrip()
+        while not text.startswith(closing):
+            if not text:
+                raise MiniYAMLError(f"line {lineno}: unterminated flow collection")
+            if closing == ']':
+                value, text = _flow_value(text, lineno)
+                items.append(value)
+            else:
+                key, text = _flow_value(text, lineno)
+                text = text.lstrip()
+                if text.startswith(':'):
+                    value, text = _flow_value(text[1:], lineno)
+                else:
+                    value = None
+                items[key] = value
+            text = text.lstrip()
+            if text.startswith(','):
+                text = text[1:].lstrip()
+        return items, text[1:]
+
+    if text[:1] in '\'"':
+        end = _quoted_end(text, lineno)
+        return _scalar(text[:end], lineno), text[end:]
+
+    match = re.match(r'[^,\]}]*?(?=\s*(,|\]|\}|:\s|:$|$))', text)
+    token = match.group(0) if match else text
+    return _scalar(token, lineno), text[len(token):]
+
+
+def _lines(text):
+    """Yield (line number, indent, content) for meaningful lines"""
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        if '\t' in raw[:len(raw) - len(raw.lstrip())]:
+            raise MiniYAMLError(f"line {lineno}: tabs are not allowed for indentation")
+        content = _strip_comment(raw.strip())
+        if not content or (content == '---' and raw.startswith('---')):
+            continue
+        yield lineno, len(raw) - len(raw.lstrip()), content
+
+
+class _Parser:
+    def __init__(self, text):
+        self.lines = list(_lines(text))
+        self.pos = 0
+
+    def parse(self):
+        if not self.lines:
+            return None
+        value = self._block(self.lines[0][1])
+        if self.pos < len(self.lines):
+            lineno = self.lines[self.pos][0]
+            raise MiniYAMLError(f"line {lineno}: unexpected indentation")
+        return value
+
+    def _block(self, indent):
+        """Parse the block (mapping or sequence) starting at the current line"""
+        _, _, content = self.lines[self.pos]
+        if content == '-' or content.startswith('- '):
+            return self._sequence(indent)
+        return self._mapping(indent)
+
+    def _value(self, rest, parent_indent, lineno, allow_sequence_at_parent=False):
+        """Parse the value after `key:` or `- `"""
+        if rest:
+            return _flow(rest, lineno)
+        if self.pos >= len(self.lines):
+            return None
+        _, indent, content = self.lines[self.pos]
+        is_item = content == '-' or content.startswith('- ')
+        if indent > parent_indent or (allow_sequence_at_parent and indent == parent_indent and is_item):
+            return self._block(indent)
+        return None
+
+    def _mapping(self, indent):
+        mapping = {}
+        while self.pos < len(self.lines):
+            lineno, line_indent, content = self.lines[self.pos]
+            if line_indent < indent:
+                break
+            if line_indent > indent:
+                raise MiniYAMLError(f"line {lineno}: unexpected indentation")
+            if content == '-' or content.startswith('- '):
+                break
+            entry = _split_key(content, lineno)
+            if entry is None:
+                raise MiniYAMLError(f"line {lineno}: expected `key: value`")
+            key, rest = entry
+            self.pos += 1
+            # A sequence may sit at the same indent as its key
+            mapping[key] = self._value(rest, indent, lineno, allow_sequence_at_parent=True)
+        return mapping
+
+    def _sequence(self, indent):
+        items = []
+        while self.pos < len(self.lines):
+            lineno, line_indent, content = self.lines[self.pos]
+            if line_indent < indent or not (content == '-' or content.startswith('- ')):
+                break
+            if line_indent > indent:
+                raise MiniYAMLError(f"line {lineno}: unexpected indentation")
+            rest = content[1:].strip()
+            nested = rest == '-' or rest.startswith('- ')
+            if nested or (rest and _split_key(rest, lineno) is not None):
+                # "- key: value" or "- - item" starts a block indented past the dash
+                item_indent = line_indent + (len(content) - len(content[1:].lstrip()))
+                self.lines[self.pos] = (lineno, item_indent, rest)
+                items.append(self._block(item_indent))
+            else:
+                self.pos += 1
+                items.append(self._value(rest, indent, lineno))
+        return items
+
+
+def loads(text):
+    """
+    Parse YAML text
+
+    Returns:
+        The parsed document (dict, list, scalar or None)
+
+    Raises:
+        MiniYAMLError: Malformed or unsupported YAML
+    """
+    if text.lstrip()[:1] in '[{':
+        # JSON is valid YAML and may span lines the block parser does not join
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return _Parser(text).parse()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Offline Bundle Builder
+
+Gathers every artifact a setup needs from the network into one compressed
+archive, so air-gapped machines can be provisioned without reaching GitHub
+or Homebrew:
+
+- Homebrew bottles (with dependencies) and cask payloads via `brew fetch`
+- Git bundles of the Homebrew, Oh My Zsh, Zsh plugin and NvChad repositories
+- The installer scripts from installers.py
+
+A manifest records the SHA-256 of every file and is verified before a
+bundle is used.
+
+Usage:
+    ./offline_bundle.py build -o mac-bootstrap.tar.gz  # Build from the resolved config
+    ./offline_bundle.py verify mac-bootstrap.tar.gz    # Check bundle integrity
+
+Install scripts accept `--offline <bundle>` (or setup.py --offline) to
+install from a bundle instead of the network.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, STATE_DIR, brew_env, load_config, run_with_retry, format_bytes
+from installers import CACHE_DIR as INSTALLER_CACHE_DIR, INDEX_FILE, get_installer, sha256_file, \
+    get_installer_config, DEFAULT_INSTALLERS
+
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+EXTRACT_DIR = STATE_DIR / 'bundles'
+
+# Inherited by child scripts so the whole run installs from the bundle
+OFFLINE_ENV = 'MAC_BOOTSTRAP_OFFLINE'
+
+HOMEBREW_REPO = 'https://github.com/Homebrew/brew'
+OH_MY_ZSH_REPO = 'https://github.com/ohmyzsh/ohmyzsh.git'
+
+_active_bundle = None
+
+
+class BundleError(RuntimeError):
+    """Raised when a bundle is missing, malformed or fails verification"""
+
+
+class OfflineBundle:
+    """An extracted and verified offline bundle"""
+
+    def __init__(self, root, manifest):
+        self.root = Path(root)
+        self.manifest = manifest
+
+    @property
+    def brew_cache(self):
+        return self.root / 'brew-cache'
+
+    def repo(self, url):
+        """Get the git bundle for a repository URL, or None"""
+        entry = self.manifest.get('repos', {}).get(url)
+        return self.root / entry['file'] if entry else None
+
+
+def _repo_urls():
+    """Every git repository the install scripts clone"""
+    from install_zsh import ZSH_PLUGINS
+    from install_nvchad import STARTER_URL
+    return [HOMEBREW_REPO, OH_MY_ZSH_REPO, STARTER_URL] + list(ZSH_PLUGINS.values())
+
+
+def _repo_file(url):
+    name = url.rstrip('/').rsplit('/', 1)[-1].removesuffix('.git')
+    return f"git/{hashlib.sha1(url.encode()).hexdigest()[:12]}-{name}.bundle"
+
+
+def _fetch_brew(staging, config):
+    """Download bottles and cask payloads into the bundle's Homebrew cache"""
+    env = {**brew_env(), 'HOMEBREW_CACHE': str(staging / 'brew-cache')}
+    formulae = config.get('brew_formulae') or []
+    casks = (config.get('brew_fonts') or []) + (config.get('brew_casks') or []) + \
+        (config.get('personal_apps') or [])
+
+    if formulae:
+        Logger.info(f"Fetching {len(formulae)} formulae with dependencies...")
+        run_with_retry(["brew", "fetch", "--deps"] + formulae, capture_output=False, env=env)
+    if casks:
+        Logger.info(f"Fetching {len(casks)} casks...")
+        run_with_retry(["brew", "fetch", "--cask"] + casks, capture_output=False, env=env)
+    return {'formulae': formulae, 'casks': casks}
+
+
+def _bundle_repos(staging):
+    """Create a git bundle of every repository"""
+    repos = {}
+    with tempfile.TemporaryDirectory() as mirrors:
+        for url in _repo_urls():
+            Logger.info(f"Bundling {url}...")
+            mirror = Path(mirrors) / hashlib.sha1(url.encode()).hexdigest()
+            run_with_retry(["git", "clone", "--quiet", "--mirror", url, str(mirror)])
+            file = _repo_file(url)
+            (staging / file).parent.mkdir(parents=True, exist_ok=True)
+            subprocess.run(
+                ["git", "-C", str(mirror), "bundle", "create", str(staging / file), "--all"],
+                check=True, capture_output=True
+            )
+            repos[url] = {'file': file}
+    return repos
+
+
+def _bundle_installers(staging, config):
+    """Copy the verified installer scripts into the bundle"""
+    installers = {}
+    names = set(DEFAULT_INSTALLERS) | set(config.get('installers') or {})
+    (staging / 'installers').mkdir(parents=True, exist_ok=True)
+    for name in sorted(names):
+        source = get_installer(name, config)
+        file = f"installers/{name}.sh"
+        shutil.copy2(source, staging / file)
+        installers[name] = {'url': get_installer_config(name, config)['url'], 'file': file}
+    return installers
+
+
+def build_bundle(output, profile=None):
+    """
+    Build an offline bundle for the resolved configuration
+
+    Args:
+        output: Path of the .tar.gz archive to write
+        profile: Configuration profile (default: active profile)
+
+    Returns:
+        Path: The written archive
+    """
+    config = load_config(profile=profile)
+    output = Path(output).resolve()
+    start = time.monotonic()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp)
+        manifest = {
+            'version': BUNDLE_FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'profile': profile,
+            'packages': _fetch_brew(staging, config),
+            'repos': _bundle_repos(staging),
+            'installers': _bundle_installers(staging, config),
+            'files': {},
+        }
+
+        for path in sorted(staging.rglob('*')):
+            if path.is_file():
+                manifest['files'][path.relative_to(staging).as_posix()] = {
+                    'sha256': sha256_file(path),
+                    'size': path.stat().st_size,
+                }
+        with open(staging / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        Logger.info("Compressing bundle...")
+        tmp_output = output.with_name(output.name + '.tmp')
+        with tarfile.open(tmp_output, 'w:gz') as tar:
+            tar.add(staging / MANIFEST_NAME, arcname=MANIFEST_NAME)
+            for name in manifest['files']:
+                tar.add(staging / name, arcname=name)
+        os.replace(tmp_output, output)
+
+    digest = sha256_file(output)
+    output.with_name(output.name + '.sha256').write_text(f"{digest}  {output.name}\n")
+    Logger.success(f"Bundle written to {output} ({format_bytes(output.stat().st_size)}, "
+                   f"{len(manifest['files'])} files, {time.monotonic() - start:.1f}s)")
+    return output
+
+
+def _safe_members(tar):
+    """Reject archive members that could escape the extraction directory"""
+    for member in tar.getmembers():
+        path = Path(member.name)
+        if path.is_absolute() or '..' in path.parts or not (member.isfile() or member.isdir()):
+            raise BundleError(f"Unsafe path in bundle: {member.name}")
+        yield member
+
+
+def verify_bundle(root):
+    """
+    Verify extracted bundle contents against the manifest
+
+    Returns:
+        dict: The manifest
+
+    Raises:
+        BundleError: A file is missing, does not match its checksum or is
+            not listed in the manifest
+    """
+    root = Path(root)
+    try:
+        with open(root / MANIFEST_NAME, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"Bundle manifest unreadable: {e}")
+
+    if manifest.get('version') != BUNDLE_FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle version: {manifest.get('version')}")
+
+    for name, entry in manifest['files'].items():
+        path = root / name
+        if not path.is_file() or path.stat().st_size != entry['size'] or sha256_file(path) != entry['sha256']:
+            raise BundleError(f"Bundle file failed verification: {name}")
+    for path in root.rglob('*'):
+        name = path.relative_to(root).as_posix()
+        if path.is_file() and name not in manifest['files'] and name not in (MANIFEST_NAME, '.verified'):
+            raise BundleError(f"Bundle file not in manifest: {name}")
+    return manifest
+
+
+def open_bundle(bundle):
+    """
+    Extract and verify a bundle (once per bundle file)
+
+    Returns:
+        OfflineBundle
+    """
+    bundle = Path(bundle).expanduser().resolve()
+    if not bundle.is_file():
+        raise BundleError(f"Bundle not found: {bundle}")
+
+    stat = bundle.stat()
+    key = hashlib.sha256(f"{bundle}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    root = EXTRACT_DIR / key
+    marker = root / '.verified'
+
+    if marker.exists():
+        with open(root / MANIFEST_NAME, 'r') as f:
+            return OfflineBundle(root, json.load(f))
+
+    checksum_file = bundle.with_name(bundle.name + '.sha256')
+    if checksum_file.exists():
+        expected = checksum_file.read_text().split()[0]
+        if sha256_file(bundle) != expected:
+            raise BundleError(f"Bundle checksum mismatch: {bundle}")
+
+    Logger.info(f"Extracting offline bundle {bundle.name}...")
+    shutil.rmtree(root, ignore_errors=True)
+    root.mkdir(parents=True)
+    with tarfile.open(bundle, 'r:gz') as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(root, members=_safe_members(tar), filter='data')
+        else:
+            # Python without extraction filters (before 3.11.4); _safe_members still applies
+            tar.extractall(root, members=_safe_members(tar))
+
+    manifest = verify_bundle(root)
+    marker.touch()
+    return OfflineBundle(root, manifest)
+
+
+def activate_offline(bundle=None):
+    """
+    Switch this process (and its children) to install from a bundle
+
+    Uses the bundle given or the one selected with setup.py --offline.
+    Homebrew is pointed at the bundle's download cache and repositories,
+    and the installer scripts are seeded into the installer cache.
+
+    Returns:
+        OfflineBundle or None if no bundle is selected
+    """
+    global _active_bundle
+    bundle = bundle or os.environ.get(OFFLINE_ENV)
+    if not bundle:
+        return None
+    if _active_bundle is not None:
+        return _active_bundle
+
+    _active_bundle = open_bundle(bundle)
+    os.environ[OFFLINE_ENV] = str(Path(bundle).expanduser().resolve())
+    os.environ['HOMEBREW_CACHE'] = str(_active_bundle.brew_cache)
+    homebrew_repo = _active_bundle.repo(HOMEBREW_REPO)
+    if homebrew_repo:
+        os.environ['HOMEBREW_BREW_GIT_REMOTE'] = str(homebrew_repo)
+
+    # Seed the content-addressed installer cache so get_installer() never downloads
+    INSTALLER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(INDEX_FILE, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    for entry in _active_bundle.manifest.get('installers', {}).values():
+        digest = _active_bundle.manifest['files'][entry['file']]['sha256']
+        target = INSTALLER_CACHE_DIR / digest
+        if not target.exists():
+            shutil.copy2(_active_bundle.root / entry['file'], target)
+        index[entry['url']] = digest
+    with open(INDEX_FILE, 'w') as f:
+        json.dump(index, f, indent=2)
+
+    Logger.info(f"Offline mode: installing from {Path(bundle).name}")
+    return _active_bundle
+
+
+def add_offline_argument(parser):
+    """Add the --offline option to a script's argument parser"""
+    parser.add_argument(
+        "--offline",
+        metavar="BUNDLE",
+        help="Install from an offline bundle instead of the network"
+    )
+
+
+def offline_repo(url):
+    """Get the active offline bundle's copy of a repository, or None"""
+    return _active_bundle.repo(url) if _active_bundle else None
+
+
+def git_clone(url, dest):
+    """Clone a repository, from the active offline bundle when it has one"""
+    source = offline_repo(url)
+    if source is None:
+        run_with_retry(['git', 'clone', url, str(dest)])
+        return
+    subprocess.run(['git', 'clone', '--quiet', str(source), str(dest)], check=True, capture_output=True)
+    subprocess.run(['git', '-C', str(dest), 'remote', 'set-url', 'origin', url], check=True)
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Build or verify offline bundles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build a bundle from the resolved config")
+    build_parser.add_argument(
+        "-o", "--output",
+        default="mac-bootstrap-bundle.tar.gz",
+        help="Archive to write (default: mac-bootstrap-bundle.tar.gz)"
+    )
+    build_parser.add_argument("--profile", help="Configuration profile to bundle")
+
+    verify_parser = subparsers.add_parser("verify", help="Verify a bundle's integrity")
+    verify_parser.add_argument("bundle", help="Bundle archive")
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Offline Bundle")
+    print("=" * 60)
+    print()
+
+    try:
+        if args.command == "build":
+            build_bundle(args.output, profile=args.profile)
+        else:
+            manifest = verify_bundle(open_bundle(args.bundle).root)
+            Logger.success(f"Bundle OK ({len(manifest['files'])} files verified)")
+    except Exception as e:
+        Logger.error(f"Offline bundle {args.command} failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Developer Cache Pre-Warming Script
+
+Fills the download caches of the installed toolchains from the projects
+listed under `prewarm:` in config.yaml, so the first build of each project
+on a fresh Mac does not download its dependencies:
+
+- Go module cache (`go mod download`)
+- npm cache (`npm ci` of the lock file in a scratch directory)
+- pip wheel and HTTP caches (`pip wheel -r requirements.txt`)
+- Terraform plugin cache (`terraform init -backend=false`)
+
+Manifests are processed in parallel. If `mirror_dir` exists (e.g. a mounted
+team share), packages are taken from it before the public registries:
+
+    <mirror_dir>/go/          GOPROXY layout (copy of $GOMODCACHE/cache/download)
+    <mirror_dir>/npm/         Package tarballs (*.tgz)
+    <mirror_dir>/terraform/   Provider mirror (`terraform providers mirror`)
+
+pip only caches what it downloads over HTTPS, so there is no directory
+mirror for it; point PIP_INDEX_URL at a team index instead.
+
+Cache sizes are reported before and after. --benchmark also times each
+manifest's dependency fetch against an empty cache and against the warmed
+one, to show the time saved on a first build.
+
+Usage:
+    ./prewarm_caches.py               # Warm the configured caches
+    ./prewarm_caches.py --benchmark   # ...and measure the time saved
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, directory_size, format_bytes, load_config
+from offline_bundle import OFFLINE_ENV
+from timings import format_duration
+
+
+STEP = {
+    'description': 'Pre-warming developer caches',
+    'tags': ['setup', 'dev'],
+    'requires': ['install_packages'],
+    'order': 100,
+    'cost': 300,
+    'probe': 'step_done',
+}
+
+
+# Defaults for the `prewarm:` config section
+PREWARM_DEFAULTS = {
+    'enabled': False,
+    'mirror_dir': None,
+    'parallel': 4,
+    'timeout_minutes': 15,
+    'manifests': {},
+}
+
+# Lines of output reported when a manifest fails
+ERROR_TAIL_LINES = 10
+
+
+def _tool_output(cmd):
+    """Get the trimmed stdout of a command, or None if it failed"""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 and result.stdout.strip() else None
+
+
+def _remove_tree(path):
+    """Delete a directory tree, including read-only files (Go's module cache)"""
+    def make_writable(function, failed_path, _):
+        os.chmod(os.path.dirname(failed_path), stat.S_IRWXU)
+        if os.path.exists(failed_path) and not os.path.isdir(failed_path):
+            os.chmod(failed_path, stat.S_IRWXU)
+        function(failed_path)
+    shutil.rmtree(path, onerror=make_writable)
+
+
+class Toolchain(ABC):
+    """
+    A toolchain whose download cache can be warmed
+
+    Subclasses describe how to find a manifest, where the cache lives and
+    which commands fill it.
+    """
+
+    name = None
+    label = None
+    tool = None
+    # File names that identify a project, in order of preference
+    manifest_names = ()
+    # Whether several manifests may fill the cache at the same time
+    concurrent = True
+    # Whether packages can come from <mirror_dir>/<name>
+    mirrored = True
+
+    def available(self):
+        return shutil.which(self.tool) is not None
+
+    def find_manifest(self, path):
+        """Resolve a configured path (a manifest or its directory) to the manifest, or None"""
+        path = Path(path)
+        if path.is_dir():
+            return next((path / name for name in self.manifest_names if (path / name).is_file()), None)
+        return path if path.is_file() else None
+
+    @abstractmethod
+    def cache_dir(self):
+        """The cache this toolchain fills"""
+
+    def seed_commands(self, cache, mirror):
+        """Commands that copy a mirror into the cache, run once before any manifest"""
+        return []
+
+    @abstractmethod
+    def commands(self, manifest, workdir, cache, mirror):
+        """
+        Commands that download a manifest's dependencies into a cache
+
+        Args:
+            manifest: Manifest file
+            workdir: Empty scratch directory, deleted afterwards
+            cache: Cache directory to fill
+            mirror: This toolchain's mirror directory, or None
+
+        Returns:
+            tuple: (list of commands, working directory, extra environment)
+        """
+
+
+class GoToolchain(Toolchain):
+    name = 'go'
+    label = 'Go module cache'
+    tool = 'go'
+    manifest_names = ('go.mod',)
+
+    def cache_dir(self):
+        return Path(_tool_output(['go', 'env', 'GOMODCACHE']) or Path.home() / 'go' / 'pkg' / 'mod')
+
+    def commands(self, manifest, workdir, cache, mirror):
+        # A copy of go.mod, so go.sum updates land in the scratch directory
+        # (relative replace directives still resolve from the project)
+        for name in ('go.mod', 'go.sum'):
+            if (manifest.parent / name).is_file():
+                shutil.copy2(manifest.parent / name, workdir / name)
+        env = {'GOMODCACHE': str(cache)}
+        if mirror:
+            upstream = _tool_output(['go', 'env', 'GOPROXY']) or 'https://proxy.golang.org,direct'
+            env['GOPROXY'] = f"{mirror.as_uri()},{upstream}"
+        return [['go', 'mod', 'download', f"-modfile={workdir / 'go.mod'}"]], manifest.parent, env
+
+
+class NpmToolchain(Toolchain):
+    name = 'npm'
+    label = 'npm cache'
+    tool = 'npm'
+    manifest_names = ('package-lock.json', 'npm-shrinkwrap.json', 'package.json')
+
+    def cache_dir(self):
+        return Path(_tool_output(['npm', 'config', 'get', 'cache']) or Path.home() / '.npm')
+
+    def commands(self, manifest, workdir, cache, mirror):
+        # Installed into the scratch directory so the project's node_modules is untouched
+        for name in ('package.json', manifest.name):
+            if (manifest.parent / name).is_file():
+                shutil.copy2(manifest.parent / name, workdir / name)
+        install = 'install' if manifest.name == 'package.json' else 'ci'
+        return [['npm', install, '--ignore-scripts', '--no-audit', '--no-fund', '--prefer-offline',
+                 '--cache', str(cache)]], workdir, {}
+
+    def seed_commands(self, cache, mirror):
+        # Cached tarballs are found by their lock file integrity, whatever registry they came from
+        tarballs = sorted(str(path) for path in mirror.glob('*.tgz'))
+        return [['npm', 'cache', 'add', *tarballs, '--cache', str(cache)]] if tarballs else []
+
+
+class PipToolchain(Toolchain):
+    name = 'pip'
+    label = 'pip cache'
+    tool = 'python3'
+    manifest_names = ('requirements.txt',)
+    mirrored = False
+
+    def cache_dir(self):
+        return Path(_tool_output(['python3', '-m', 'pip', 'cache', 'dir']) or
+                    Path.home() / 'Library' / 'Caches' / 'pip')
+
+    def commands(self, manifest, workdir, cache, mirror):
+        # Building wheels downloads every requirement and caches the wheels built from sdists
+        cmd = ['python3', '-m', 'pip', 'wheel', '--quiet', '--disable-pip-version-check',
+               '-r', str(manifest), '-w', str(workdir / 'wheels')]
+        return [cmd], manifest.parent, {'PIP_CACHE_DIR': str(cache)}
+
+
+class TerraformToolchain(Toolchain):
+    name = 'terraform'
+    label = 'Terraform plugin cache'
+    tool = 'terraform'
+    manifest_names = ('.terraform.lock.hcl', 'main.tf', 'versions.tf')
+    # Terraform's plugin cache is not safe for concurrent use
+    concurrent = False
+
+    def find_manifest(self, path):
+        path = Path(path)
+        if path.is_file():
+            path = path.parent
+        if not path.is_dir() or not (list(path.glob('*.tf')) or list(path.glob('*.tf.json'))):
+            return None
+        return next((path / name for name in self.manifest_names if (path / name).is_file()),
+                    sorted(path.glob('*.tf*'))[0])
+
+    def cache_dir(self):
+        configured = os.environ.get('TF_PLUGIN_CACHE_DIR')
+        return Path(configured).expanduser() if configured else Path.home() / '.terraform.d' / 'plugin-cache'
+
+    def commands(self, manifest, workdir, cache, mirror):
+        cache.mkdir(parents=True, exist_ok=True)
+        project = manifest.parent
+        # Working state goes to the scratch directory; the lock file is only read
+        env = {'TF_PLUGIN_CACHE_DIR': str(cache), 'TF_DATA_DIR': str(workdir / '.terraform'),
+               'TF_IN_AUTOMATION': '1', 'TF_INPUT': '0'}
+        if mirror:
+            cli_config = workdir / 'terraformrc'
+            cli_config.write_text(
+                'provider_installation {\n'
+                f'  filesystem_mirror {{\n    path = "{mirror}"\n  }}\n'
+                '  direct {}\n'
+                '}\n')
+            env['TF_CLI_CONFIG_FILE'] = str(cli_config)
+        init = ['terraform', 'init', '-backend=false', '-input=false', '-no-color']
+        if (project / '.terraform.lock.hcl').is_file():
+            init.append('-lockfile=readonly')
+        else:
+            # Without a lock file init would write one into the project
+            for path in list(project.glob('*.tf')) + list(project.glob('*.tf.json')):
+                shutil.copy2(path, workdir / path.name)
+            project = workdir
+        return [init], project, env
+
+
+TOOLCHAINS = {toolchain.name: toolchain for toolchain in
+              (GoToolchain(), NpmToolchain(), PipToolchain(), TerraformToolchain())}
+
+
+def expand_manifests(toolchain, patterns):
+    """
+    Resolve configured manifest paths and globs
+
+    Returns:
+        list: Manifest paths (missing ones are reported and left out)
+    """
+    manifests = []
+    for pattern in patterns or []:
+        expanded = os.path.expanduser(str(pattern))
+        matches = sorted(glob.glob(expanded)) if any(char in expanded for char in '*?[') else [expanded]
+        found = [manifest for manifest in map(toolchain.find_manifest, matches) if manifest]
+        if not found:
+            Logger.warning(f"  {toolchain.name}: no manifest found at {pattern}")
+        manifests.extend(manifest for manifest in found if manifest not in manifests)
+    return manifests
+
+
+def _run_commands(commands, cwd, env, timeout):
+    """
+    Run commands one after another, stopping at the first failure
+
+    Returns:
+        str: Error output, or None if every command succeeded
+    """
+    start = time.monotonic()
+    try:
+        for cmd in commands:
+            remaining = timeout - (time.monotonic() - start)
+            result = subprocess.run(cmd, cwd=cwd, env={**os.environ, **env},
+                                    capture_output=True, text=True, timeout=max(remaining, 1))
+            if result.returncode != 0:
+                output = (result.stderr or result.stdout).strip().splitlines()
+                return '\n'.join(output[-ERROR_TAIL_LINES:]) or f"exit code {result.returncode}"
+    except subprocess.TimeoutExpired:
+        return f"timed out after {format_duration(timeout)}"
+    except OSError as e:
+        return str(e)
+    return None
+
+
+def fetch_dependencies(toolchain, manifest, cache, mirror, timeout):
+    """
+    Download one manifest's dependencies into a cache
+
+    Returns:
+        tuple: (ok, seconds, error output)
+    """
+    start = time.monotonic()
+    with tempfile.TemporaryDirectory(prefix=f'prewarm-{toolchain.name}-') as tmp:
+        try:
+            commands, cwd, env = toolchain.commands(manifest, Path(tmp), cache, mirror)
+        except OSError as e:
+            return False, time.monotonic() - start, str(e)
+        error = _run_commands(commands, cwd, env, timeout)
+    return error is None, time.monotonic() - start, error or ''
+
+
+def plan_jobs(prewarm_config):
+    """
+    Find the toolchains and manifests to warm
+
+    Returns:
+        list: (toolchain, manifests, mirror directory or None) tuples
+    """
+    mirror_root = prewarm_config.get('mirror_dir')
+    mirror_root = Path(mirror_root).expanduser() if mirror_root else None
+    if mirror_root and not mirror_root.is_dir():
+        Logger.info(f"Mirror {mirror_root} not available; using the public registries")
+        mirror_root = None
+
+    plans = []
+    for name, patterns in (prewarm_config.get('manifests') or {}).items():
+        toolchain = TOOLCHAINS.get(name)
+        if toolchain is None:
+            Logger.warning(f"Unknown toolchain in prewarm.manifests: {name} "
+                           f"(expected one of: {', '.join(TOOLCHAINS)})")
+            continue
+        if not patterns:
+            continue
+        if not toolchain.available():
+            Logger.warning(f"{toolchain.tool} not installed; skipping the {toolchain.label}")
+            continue
+        manifests = expand_manifests(toolchain, patterns)
+        if manifests:
+            mirror = mirror_root / name if mirror_root and toolchain.mirrored else None
+            plans.append((toolchain, manifests, mirror if mirror and mirror.is_dir() else None))
+    return plans
+
+
+def warm_caches(plans, parallel, timeout):
+    """
+    Warm every planned cache, manifests in parallel
+
+    Toolchains whose cache does not allow concurrent writers get one worker
+    for all their manifests.
+
+    Returns:
+        tuple: (cache sizes before, cache sizes after, failed manifests), sizes by toolchain name
+    """
+    caches = {toolchain.name: toolchain.cache_dir() for toolchain, _, _ in plans}
+    before = {name: directory_size(path) for name, path in caches.items()}
+
+    # Mirrors that are copied into a cache are copied once, before its manifests run
+    seeds = [(toolchain, toolchain.seed_commands(caches[toolchain.name], mirror))
+             for toolchain, _, mirror in plans if mirror]
+
+    def seed(entry):
+        toolchain, commands = entry
+        error = _run_commands(commands, None, {}, timeout)
+        if error:
+            Logger.warning(f"  {toolchain.name}: could not copy the mirror into the cache: {error}")
+
+    units = []
+    for toolchain, manifests, mirror in plans:
+        jobs = [(toolchain, manifest, mirror) for manifest in manifests]
+        units += [jobs] if not toolchain.concurrent else [[job] for job in jobs]
+
+    def run_unit(unit):
+        failed = []
+        for toolchain, manifest, mirror in unit:
+            ok, seconds, error = fetch_dependencies(toolchain, manifest, caches[toolchain.name], mirror, timeout)
+            source = " (mirror)" if mirror else ""
+            if ok:
+                Logger.success(f"  {toolchain.name}: {manifest} ({format_duration(seconds)}){source}")
+            else:
+                Logger.warning(f"  {toolchain.name}: {manifest} failed ({format_duration(seconds)})")
+                for line in error.splitlines():
+                    Logger.output(f"      {line}")
+                failed.append(manifest)
+        return failed
+
+    total = sum(len(manifests) for _, manifests, _ in plans)
+    Logger.info(f"Warming caches from {total} manifests ({parallel} at a time)...")
+    with ThreadPoolExecutor(max_workers=max(parallel, 1)) as executor:
+        list(executor.map(seed, [entry for entry in seeds if entry[1]]))
+        failed = [manifest for unit_failed in executor.map(run_unit, units) for manifest in unit_failed]
+
+    after = {name: directory_size(path) for name, path in caches.items()}
+    return before, after, failed
+
+
+def benchmark(plans, timeout):
+    """
+    Time each manifest's dependency fetch from an empty cache and from the
+    warmed one (without the mirror, as on a fresh machine), one at a time
+
+    Returns:
+        list: (toolchain name, manifest, cold seconds, warm seconds) tuples;
+        seconds are None where the fetch failed
+    """
+    results = []
+    for toolchain, manifests, _ in plans:
+        cache = toolchain.cache_dir()
+        for manifest in manifests:
+            cold_cache = Path(tempfile.mkdtemp(prefix=f'prewarm-cold-{toolchain.name}-'))
+            try:
+                cold_ok, cold, _ = fetch_dependencies(toolchain, manifest, cold_cache, None, timeout)
+            finally:
+                _remove_tree(cold_cache)
+            warm_ok, warm, _ = fetch_dependencies(toolchain, manifest, cache, None, timeout)
+            results.append((toolchain.name, manifest, cold if cold_ok else None, warm if warm_ok else None))
+    return results
+
+
+def print_report(plans, before, after, results=None):
+    """Print cache sizes and benchmark results"""
+    Logger.info("Cache sizes:")
+    for toolchain, _, _ in plans:
+        grown = after[toolchain.name] - before[toolchain.name]
+        print(f"  {toolchain.label:<24} {format_bytes(before[toolchain.name]):>10} -> "
+              f"{format_bytes(after[toolchain.name]):>10}  (+{format_bytes(max(grown, 0))})")
+
+    if results is None:
+        return
+    Logger.info("First build dependency fetch (empty cache vs warmed cache):")
+    print(f"  {'Manifest':<48} {'Cold':>8} {'Warm':>8} {'Saved':>8}")
+    saved_total = 0.0
+    for name, manifest, cold, warm in results:
+        label = f"{name}: {manifest}"
+        label = label if len(label) <= 48 else '...' + label[-45:]
+        if cold is None or warm is None:
+            print(f"  {label:<48} {'failed':>8}")
+            continue
+        saved_total += cold - warm
+        print(f"  {label:<48} {cold:>7.1f}s {warm:>7.1f}s {cold - warm:>7.1f}s")
+    Logger.success(f"Time saved on first builds: {format_duration(saved_total)}")
+
+
+def prewarm_caches(prewarm_config, run_benchmark=False):
+    """
+    Warm the developer caches listed in the `prewarm:` config section
+
+    Args:
+        prewarm_config: The `prewarm:` config section (see PREWARM_DEFAULTS)
+        run_benchmark: Also time first builds with and without the warm cache
+
+    Returns:
+        bool: True if every manifest was processed (an empty list counts)
+    """
+    prewarm_config = {**PREWARM_DEFAULTS, **(prewarm_config or {})}
+    plans = plan_jobs(prewarm_config)
+    if not plans:
+        Logger.info("No manifests to warm caches from")
+        return True
+
+    timeout = prewarm_config['timeout_minutes'] * 60
+    start = time.monotonic()
+    before, after, failed = warm_caches(plans, prewarm_config['parallel'], timeout)
+    results = benchmark(plans, timeout) if run_benchmark else None
+    print_report(plans, before, after, results)
+
+    if failed:
+        Logger.warning(f"Caches warmed in {format_duration(time.monotonic() - start)}; "
+                       f"{len(failed)} manifests failed")
+        return False
+    Logger.success(f"Caches warmed in {format_duration(time.monotonic() - start)}")
+    return True
+
+
+def step_done():
+    """Whether there is nothing to pre-warm: disabled or offline (probe for setup.py)"""
+    return not (load_config().get('prewarm') or {}).get('enabled') or bool(os.environ.get(OFFLINE_ENV))
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Pre-warm developer toolchain caches")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Also time first-build dependency fetches with an empty and a warm cache")
+    args = parser.parse_args()
+
+    config = load_config()
+    prewarm_config = config.get('prewarm') or {}
+
+    print("=" * 60)
+    print("  Developer Cache Pre-Warming")
+    print("=" * 60)
+    print()
+
+    if not prewarm_config.get('enabled'):
+        Logger.info("Cache pre-warming disabled in config")
+        return
+    if os.environ.get(OFFLINE_ENV):
+        Logger.info("Offline: caches will fill on the first build with network access")
+        return
+
+    # A cache that could not be warmed only costs time later; never fail the setup for it
+    prewarm_caches(prewarm_config, run_benchmark=args.benchmark)
+
+
+if __name__ == "__main__":
+    main()
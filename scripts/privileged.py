@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Privileged Helper
+
+Runs the actions that need root through one helper process started with
+sudo once per run, instead of a `sudo` (and possibly a password prompt)
+per action:
+
+- installer:  install a .pkg (`installer -pkg ... -target /`)
+- chsh:       change a user's login shell (must be listed in /etc/shells)
+- defaults:   write a system-domain preference (/Library/Preferences/...)
+- mkdir:      create a directory, optionally owned by a user (an existing
+              path is left as it is)
+
+setup.py starts the helper right after asking for the sudo password. It
+listens on a Unix socket in a private (0700) directory and only accepts
+requests carrying the run's random token; both are passed to the scripts
+through MAC_BOOTSTRAP_PRIVILEGED_SOCKET and MAC_BOOTSTRAP_PRIVILEGED_TOKEN.
+Scripts queue actions in a PrivilegedBatch and send the whole batch in one
+round trip. The helper exits when setup.py closes its stdin (or dies).
+
+Scripts run on their own (no helper) fall back to `sudo` per action, with
+`sudo -n` in non-interactive runs.
+
+The helper is launched with MAC_BOOTSTRAP_PRIVILEGED_RUNNER (default
+"sudo -n"); set it to an empty string to run it as the current user, e.g.
+to try the protocol on Linux with stand-in tools on PATH.
+
+Usage:
+    ./privileged.py ping    # Check that the run's helper answers
+"""
+
+import argparse
+import hmac
+import json
+import os
+import secrets
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from logs import Logger
+
+
+PRIVILEGED_SOCKET_ENV = 'MAC_BOOTSTRAP_PRIVILEGED_SOCKET'
+PRIVILEGED_TOKEN_ENV = 'MAC_BOOTSTRAP_PRIVILEGED_TOKEN'
+PRIVILEGED_RUNNER_ENV = 'MAC_BOOTSTRAP_PRIVILEGED_RUNNER'
+# Same name as utils.NON_INTERACTIVE_ENV (utils is not imported: the helper runs as root)
+NON_INTERACTIVE_ENV = 'MAC_BOOTSTRAP_NON_INTERACTIVE'
+DEFAULT_RUNNER = 'sudo -n'
+
+SOCKET_NAME = 'helper.sock'
+# A batch may hold a pkg install; give it time
+REQUEST_TIMEOUT = 30 * 60
+STARTUP_TIMEOUT = 15
+OUTPUT_LIMIT = 4000
+DEFAULTS_TYPES = ('bool', 'int', 'float', 'string')
+SYSTEM_PREFERENCES = '/Library/Preferences/'
+
+
+class PrivilegedError(Exception):
+    """Raised for actions the helper refuses to run"""
+
+
+def _login_shells():
+    try:
+        with open('/etc/shells') as f:
+            return {line.strip() for line in f if line.strip().startswith('/')}
+    except OSError:
+        return None
+
+
+def action_commands(action):
+    """
+    Translate an action into the commands that carry it out
+
+    Only the action types listed in the module docstring are accepted, so
+    a client holding the token still cannot run arbitrary commands as root.
+
+    Returns:
+        list: Commands (argument lists), run in order
+
+    Raises:
+        PrivilegedError: Unknown or invalid action
+    """
+    kind = action.get('action')
+    if kind == 'ping':
+        return []
+    if kind == 'installer':
+        pkg = str(action.get('pkg') or '')
+        if not pkg.endswith(('.pkg', '.mpkg')):
+            raise PrivilegedError(f"not a package: {pkg!r}")
+        return [['installer', '-pkg', pkg, '-target', str(action.get('target') or '/')]]
+    if kind == 'chsh':
+        shell, user = str(action.get('shell') or ''), str(action.get('user') or '')
+        shells = _login_shells()
+        if not user or (shells is not None and shell not in shells):
+            raise PrivilegedError(f"not a login shell in /etc/shells: {shell!r}")
+        return [['chsh', '-s', shell, user]]
+    if kind == 'defaults':
+        domain, kind_ = str(action.get('domain') or ''), action.get('type')
+        if not domain.startswith(SYSTEM_PREFERENCES) or '..' in domain:
+            raise PrivilegedError(f"not a system preference domain: {domain!r}")
+        if kind_ not in DEFAULTS_TYPES or not action.get('key'):
+            raise PrivilegedError(f"invalid preference: {action.get('key')!r} ({kind_})")
+        value = str(action['value']).lower() if kind_ == 'bool' else str(action['value'])
+        return [['defaults', 'write', domain, str(action['key']), f'-{kind_}', value]]
+    if kind == 'mkdir':
+        path = str(action.get('path') or '')
+        if not path.startswith('/') or '..' in path.split('/'):
+            raise PrivilegedError(f"not an absolute path: {path!r}")
+        if os.path.lexists(path):
+            # Never chown what is already there (e.g. /etc)
+            return []
+        # The leaf is created without -p, so the chown only runs if this action made it
+        commands = [['mkdir', '-p', os.path.dirname(path.rstrip('/')) or '/'],
+                    ['mkdir', '-m', format(int(action.get('mode', 0o755)), 'o'), path]]
+        if action.get('owner'):
+            commands.append(['chown', str(action['owner']), path])
+        return commands
+    raise PrivilegedError(f"unknown action: {kind!r}")
+
+
+def _run_action(action, prefix=()):
+    """Run one action; returns its result dict"""
+    try:
+        commands = action_commands(action)
+    except PrivilegedError as e:
+        return {'ok': False, 'returncode': None, 'output': str(e)}
+    output = []
+    for cmd in commands:
+        try:
+            result = subprocess.run([*prefix, *cmd], capture_output=True, text=True,
+                                    stdin=subprocess.DEVNULL if prefix[-1:] == ('-n',) else None)
+        except OSError as e:
+            return {'ok': False, 'returncode': None, 'output': str(e)}
+        output.append((result.stdout + result.stderr).strip())
+        if result.returncode != 0:
+            return {'ok': False, 'returncode': result.returncode,
+                    'output': '\n'.join(filter(None, output))[-OUTPUT_LIMIT:]}
+    return {'ok': True, 'returncode': 0, 'output': '\n'.join(filter(None, output))[-OUTPUT_LIMIT:]}
+
+
+def run_batch(actions, stop_on_error=False, prefix=()):
+    """
+    Run actions in order
+
+    Args:
+        actions: Action dicts
+        stop_on_error: Skip the remaining actions after a failure
+        prefix: Prepended to each command (e.g. ["sudo"] without a helper)
+
+    Returns:
+        list: One {"ok", "returncode", "output"} dict per action
+    """
+    results = []
+    for action in actions:
+        if stop_on_error and results and not results[-1]['ok']:
+            results.append({'ok': False, 'returncode': None, 'output': 'skipped after an earlier failure'})
+            continue
+        results.append(_run_action(action, prefix))
+    return results
+
+
+def _recv_line(conn):
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _handle(conn, token):
+    with conn:
+        try:
+            request = json.loads(_recv_line(conn) or b'{}')
+            if not hmac.compare_digest(str(request.get('token', '')), token):
+                response = {'error': 'invalid token'}
+            else:
+                response = {'results': run_batch(request.get('actions') or [],
+                                                 bool(request.get('stop_on_error')))}
+        except (ValueError, AttributeError) as e:
+            response = {'error': f"bad request: {e}"}
+        try:
+            conn.sendall(json.dumps(response).encode() + b'\n')
+        except OSError:
+            pass
+
+
+def serve(socket_path):
+    """
+    Helper process: read the token from stdin, serve batches until stdin closes
+
+    Prints "ready" once the socket accepts connections.
+    """
+    token = sys.stdin.readline().strip()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    if os.geteuid() == 0 and os.environ.get('SUDO_UID'):
+        # The socket is created as root; hand it to the user who ran sudo
+        os.chown(socket_path, int(os.environ['SUDO_UID']), int(os.environ.get('SUDO_GID', -1)))
+    server.listen(8)
+
+    def accept_loop():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=_handle, args=(conn, token), daemon=True).start()
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    print('ready', flush=True)
+    sys.stdin.read()  # Until setup.py closes the pipe or exits
+    server.close()
+    try:
+        os.unlink(socket_path)
+    except OSError:
+        pass
+
+
+class PrivilegedHelper:
+    """The helper process, as managed by setup.py"""
+
+    def __init__(self):
+        self.process = None
+        self.directory = None
+
+    def start(self):
+        """
+        Launch the helper and export its socket and token to child processes
+
+        Returns:
+            bool: True if the helper is running
+        """
+        runner = os.environ.get(PRIVILEGED_RUNNER_ENV)
+        runner = shlex.split(DEFAULT_RUNNER if runner is None else runner)
+        self.directory = tempfile.mkdtemp(prefix='mac-bootstrap-priv-')
+        socket_path = os.path.join(self.directory, SOCKET_NAME)
+        token = secrets.token_hex(32)
+        try:
+            self.process = subprocess.Popen(
+                [*runner, sys.executable, str(Path(__file__).resolve()), 'serve', socket_path],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            self.process.stdin.write(token + '\n')
+            self.process.stdin.flush()
+        except OSError as e:
+            Logger.warning(f"Could not start the privileged helper: {e}")
+            self.stop()
+            return False
+
+        # Set on the "ready" line, and also on EOF when the helper exits (e.g. sudo -n refused)
+        ready = threading.Event()
+        first_line = []
+        threading.Thread(target=lambda: (first_line.append(self.process.stdout.readline()), ready.set()),
+                         daemon=True).start()
+        if not ready.wait(STARTUP_TIMEOUT) or first_line != ['ready\n']:
+            Logger.warning("Privileged helper did not start; privileged actions will use sudo each time")
+            self.stop()
+            return False
+        os.environ[PRIVILEGED_SOCKET_ENV] = socket_path
+        os.environ[PRIVILEGED_TOKEN_ENV] = token
+        return True
+
+    def stop(self):
+        """Shut the helper down and forget its socket"""
+        os.environ.pop(PRIVILEGED_SOCKET_ENV, None)
+        os.environ.pop(PRIVILEGED_TOKEN_ENV, None)
+        if self.process:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+            self.process = None
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+
+def helper_available():
+    """Whether this process can reach the run's helper"""
+    return bool(os.environ.get(PRIVILEGED_SOCKET_ENV) and os.environ.get(PRIVILEGED_TOKEN_ENV))
+
+
+class PrivilegedBatch:
+    """
+    Privileged actions queued up and run together
+
+        batch = PrivilegedBatch()
+        batch.chsh('/bin/zsh')
+        batch.mkdir('/usr/local/share/team', owner=os.environ['USER'])
+        for result in batch.run():
+            if not result['ok']:
+                Logger.warning(result['output'])
+    """
+
+    def __init__(self):
+        self.actions = []
+
+    def installer(self, pkg, target='/'):
+        self.actions.append({'action': 'installer', 'pkg': str(pkg), 'target': target})
+
+    def chsh(self, shell, user=None):
+        self.actions.append({'action': 'chsh', 'shell': shell,
+                             'user': user or os.environ.get('USER') or os.getlogin()})
+
+    def defaults_write(self, domain, key, kind, value):
+        """Write a system preference, e.g. ('/Library/Preferences/com.apple.loginwindow', 'SHOWFULLNAME', 'bool', True)"""
+        self.actions.append({'action': 'defaults', 'domain': domain, 'key': key, 'type': kind, 'value': value})
+
+    def mkdir(self, path, owner=None, mode=0o755):
+        self.actions.append({'action': 'mkdir', 'path': str(path), 'owner': owner, 'mode': mode})
+
+    def run(self, stop_on_error=False):
+        """
+        Run the queued actions: in one round trip to the helper if there is
+        one, otherwise with sudo per action
+
+        Returns:
+            list: One {"ok", "returncode", "output"} dict per action
+        """
+        actions, self.actions = self.actions, []
+        if not actions:
+            return []
+        if helper_available():
+            results = self._send(actions, stop_on_error)
+            if results is not None:
+                return results
+        prefix = ('sudo', '-n') if os.environ.get(NON_INTERACTIVE_ENV) == '1' else ('sudo',)
+        return run_batch(actions, stop_on_error, prefix)
+
+    def _send(self, actions, stop_on_error):
+        request = {'token': os.environ[PRIVILEGED_TOKEN_ENV], 'actions': actions, 'stop_on_error': stop_on_error}
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.settimeout(REQUEST_TIMEOUT)
+                conn.connect(os.environ[PRIVILEGED_SOCKET_ENV])
+                conn.sendall(json.dumps(request).encode() + b'\n')
+                response = json.loads(_recv_line(conn) or b'{}')
+        except (OSError, ValueError) as e:
+            Logger.warning(f"Privileged helper unavailable ({e}); using sudo")
+            return None
+        if 'error' in response:
+            Logger.warning(f"Privileged helper refused the request: {response['error']}")
+            return None
+        return response.get('results')
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Privileged helper for setup.py")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Run the helper (started by setup.py)")
+    serve_parser.add_argument("socket", help="Socket path to listen on")
+    subparsers.add_parser("ping", help="Check that the run's helper answers")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.socket)
+        return
+
+    if not helper_available():
+        Logger.error(f"No helper for this process ({PRIVILEGED_SOCKET_ENV} is not set)")
+        sys.exit(1)
+    batch = PrivilegedBatch()
+    batch.actions.append({'action': 'ping'})
+    if batch._send(batch.actions, False) is None:
+        sys.exit(1)
+    Logger.success("Privileged helper is running")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Fleet Provisioning Script
+
+Applies the setup to many Macs over SSH concurrently. For each host in the
+inventory the repository and its resolved configuration are pushed as one
+tarball, then setup.py runs non-interactively on the host. Output is
+streamed with a per-host prefix and results are summarised at the end.
+
+Usage:
+    ./provision_fleet.py inventory.yaml                # Full setup on every host
+    ./provision_fleet.py inventory.yaml --fanout 4     # At most 4 hosts at once
+    ./provision_fleet.py inventory.yaml -- --brew-only # Extra arguments for setup.py
+
+setup.py always runs with --non-interactive on the hosts.
+
+Inventory format:
+    defaults:
+      user: admin
+      profile: backend
+    hosts:
+      - host: mac-01.local
+      - host: mac-02.local
+        profile: data
+"""
+
+import argparse
+import io
+import json
+import shlex
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, Colors, load_config, load_yaml, get_project_root
+
+
+# Files and directories pushed to each host (config.yaml is replaced by the resolved config)
+PUSH_PATHS = ['setup.py', 'bootstrap.sh', 'scripts', 'dotfiles', 'profiles']
+
+_print_lock = threading.Lock()
+
+
+def load_inventory(path, fleet_config):
+    """
+    Load the host inventory
+
+    Returns:
+        list: One dict per host with host, user, profile and remote_dir
+    """
+    inventory = load_yaml(path) or {}
+
+    defaults = {
+        'user': None,
+        'profile': None,
+        'remote_dir': fleet_config.get('remote_dir', '~/Mac-bootstrap'),
+    }
+    defaults.update(inventory.get('defaults') or {})
+
+    hosts = []
+    for entry in inventory.get('hosts') or []:
+        if isinstance(entry, str):
+            entry = {'host': entry}
+        hosts.append({**defaults, **entry})
+    return hosts
+
+
+def build_payload(profile):
+    """Build a gzipped tarball of the repository with the resolved config"""
+    project_root = get_project_root()
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        for name in PUSH_PATHS:
+            path = project_root / name
+            if path.exists():
+                tar.add(path, arcname=name, filter=_exclude_caches)
+
+        # JSON is valid YAML, so the resolved config can be shipped as config.yaml
+        config = json.dumps(load_config(profile=profile), indent=2).encode()
+        info = tarfile.TarInfo('config.yaml')
+        info.size = len(config)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(config))
+    return buffer.getvalue()
+
+
+def _exclude_caches(info):
+    """tarfile filter that skips bytecode caches"""
+    if '__pycache__' in info.name or info.name.endswith('.pyc'):
+        return None
+    return info
+
+
+def remote_path(path):
+    """Quote a remote path, keeping a leading ~/ expandable"""
+    if path.startswith('~/'):
+        return '"$HOME"/' + shlex.quote(path[2:])
+    return shlex.quote(path)
+
+
+def emit(host, line, color=Colors.BLUE):
+    """Print one line of host output with a prefix"""
+    with _print_lock:
+        print(f"{color}[{host}]{Colors.NC} {line}", flush=True)
+
+
+def ssh(ssh_cmd, target, remote_cmd, host, stdin_data=None, timeout=None):
+    """
+    Run a command on a host, streaming its output
+
+    Returns:
+        int: Exit code of the remote command
+    """
+    process = subprocess.Popen(
+        ssh_cmd + [target, remote_cmd],
+        stdin=subprocess.PIPE if stdin_data is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+
+    if stdin_data is not None:
+        writer = threading.Thread(target=_feed_stdin, args=(process, stdin_data), daemon=True)
+        writer.start()
+
+    # Read in a thread so the timeout also applies while the host is producing
+    # (or withholding) output
+    reader = threading.Thread(target=_emit_output, args=(process, host), daemon=True)
+    reader.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    reader.join(timeout)
+
+    try:
+        if reader.is_alive():
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        return process.wait(timeout=None if deadline is None else max(0, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        emit(host, "timed out", Colors.RED)
+        return 124
+
+
+def _emit_output(process, host):
+    """Print a process's output line by line until it closes"""
+    for raw_line in process.stdout:
+        emit(host, raw_line.decode(errors='replace').rstrip())
+
+
+def _feed_stdin(process, data):
+    """Write data to a process's stdin and close it"""
+    try:
+        process.stdin.write(data)
+    except BrokenPipeError:
+        pass
+    finally:
+        process.stdin.close()
+
+
+def provision_host(host, ssh_cmd, setup_args, payloads, timeout=None):
+    """Push the repository to one host and run setup.py there"""
+    name = host['host']
+    target = f"{host['user']}@{name}" if host.get('user') else name
+    remote_dir = remote_path(host['remote_dir'])
+    result = {'host': name, 'profile': host.get('profile'), 'status': 'failed',
+              'push_seconds': 0.0, 'run_seconds': 0.0, 'exit_code': None}
+
+    start = time.monotonic()
+    emit(name, "pushing repository...")
+    code = ssh(ssh_cmd, target, f"mkdir -p {remote_dir} && tar -xzf - -C {remote_dir}",
+               name, stdin_data=payloads[host.get('profile')], timeout=timeout)
+    result['push_seconds'] = round(time.monotonic() - start, 2)
+    if code != 0:
+        result['exit_code'] = code
+        emit(name, f"push failed (exit {code})", Colors.RED)
+        return result
+
+    start = time.monotonic()
+    command = ' '.join(shlex.quote(arg) for arg in ['python3', 'setup.py', '--non-interactive'] + setup_args)
+    code = ssh(ssh_cmd, target, f"cd {remote_dir} && {command}", name, timeout=timeout)
+    result['run_seconds'] = round(time.monotonic() - start, 2)
+    result['exit_code'] = code
+    result['status'] = 'ok' if code == 0 else 'failed'
+    emit(name, f"finished: {result['status']}", Colors.GREEN if code == 0 else Colors.RED)
+    return result
+
+
+def provision_fleet(hosts, fanout, ssh_cmd, setup_args, timeout=None):
+    """
+    Provision all hosts with at most `fanout` running at once
+
+    Returns:
+        list: Per-host result dictionaries in inventory order
+    """
+    # Resolve and pack each distinct profile once
+    payloads = {}
+    for profile in {host.get('profile') for host in hosts}:
+        payloads[profile] = build_payload(profile)
+
+    with ThreadPoolExecutor(max_workers=max(1, fanout)) as executor:
+        futures = [
+            executor.submit(provision_host, host, ssh_cmd, setup_args, payloads, timeout)
+            for host in hosts
+        ]
+        return [future.result() for future in futures]
+
+
+def print_summary(results, elapsed):
+    """Print the per-host results table"""
+    print()
+    print("=" * 60)
+    print(f"  {'HOST':<24} {'STATUS':<8} {'PUSH':>8} {'RUN':>9}")
+    for result in results:
+        color = Colors.GREEN if result['status'] == 'ok' else Colors.RED
+        print(f"  {result['host']:<24} {color}{result['status']:<8}{Colors.NC} "
+              f"{result['push_seconds']:>7.1f}s {result['run_seconds']:>8.1f}s")
+    print("=" * 60)
+    ok_count = sum(1 for result in results if result['status'] == 'ok')
+    print(f"  {ok_count}/{len(results)} hosts succeeded in {elapsed:.1f}s")
+    print()
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(
+        description="Apply the setup to many Macs over SSH",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="Arguments after -- are passed to setup.py on each host."
+    )
+    parser.add_argument("inventory", help="Host inventory YAML file")
+    parser.add_argument(
+        "-j", "--fanout",
+        type=int,
+        help="Maximum number of hosts provisioned at once (default: fleet.fanout)"
+    )
+    parser.add_argument(
+        "--ssh",
+        help="SSH command to use (default: fleet.ssh_command)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        help="Per-host timeout in seconds for each remote command"
+    )
+    parser.add_argument(
+        "--json",
+        metavar="FILE",
+        help="Also write the per-host results to a JSON file"
+    )
+
+    # Everything after "--" is passed through to setup.py on each host
+    argv = sys.argv[1:]
+    setup_args = []
+    if '--' in argv:
+        setup_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+    args = parser.parse_args(argv)
+
+    fleet_config = load_config().get('fleet', {})
+    fanout = args.fanout or fleet_config.get('fanout', 8)
+    ssh_cmd = shlex.split(args.ssh or fleet_config.get('ssh_command', 'ssh -o BatchMode=yes'))
+
+    hosts = load_inventory(args.inventory, fleet_config)
+    if not hosts:
+        Logger.error(f"No hosts in inventory: {args.inventory}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("  Fleet Provisioning")
+    print("=" * 60)
+    print()
+    Logger.info(f"Provisioning {len(hosts)} hosts (fan-out {fanout})...")
+
+    start = time.monotonic()
+    results = provision_fleet(hosts, fanout, ssh_cmd, setup_args, timeout=args.timeout)
+    print_summary(results, time.monotonic() - start)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if any(result['status'] != 'ok' for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
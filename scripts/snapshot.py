@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Machine State Snapshots
+
+Captures everything the configure steps and copy_dotfiles.py change into
+one compressed, versioned archive, so a run can be undone:
+
+- The preference domains written by configure_* (including the Dock layout),
+  read with one `defaults export` per domain
+- The global git config (~/.gitconfig)
+- The dotfiles
+
+setup.py takes a snapshot before modifying anything; `setup.py --rollback`
+restores one with a single `defaults import` per domain.
+
+Usage:
+    ./snapshot.py capture             # Take a snapshot now
+    ./snapshot.py list                # List snapshots, newest first
+    ./snapshot.py restore latest      # Restore the newest snapshot
+    ./snapshot.py restore 20240101-120000
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, STATE_DIR, load_config, run_command, format_bytes
+
+
+STEP = {
+    'description': 'Snapshotting current settings',
+    'tags': ['setup', 'config'],
+    'order': 40,
+    'cost': 5,
+    'args': ['capture', '--reason', '{mode}'],
+}
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_DIR = STATE_DIR / 'snapshots'
+
+# (defaults flags, domain) pairs written by the configure_* scripts
+SNAPSHOT_DOMAINS = [
+    ((), 'NSGlobalDomain'),
+    (('-currentHost',), 'NSGlobalDomain'),
+    ((), 'com.apple.dock'),
+    ((), 'com.apple.finder'),
+    ((), 'com.apple.screencapture'),
+    ((), 'com.apple.driver.AppleBluetoothMultitouch.trackpad'),
+]
+# Home-relative files restored verbatim (the git config and copy_dotfiles.DOTFILES)
+SNAPSHOT_FILES = ['.gitconfig', '.zshrc', '.zsh_aliases', '.zsh_functions']
+# Processes that cache their preferences and must restart after a restore
+DOMAIN_PROCESSES = {'com.apple.dock': 'Dock', 'com.apple.finder': 'Finder',
+                    'com.apple.screencapture': 'SystemUIServer'}
+
+
+def _domain_member(flags, domain):
+    """Archive member name for an exported domain"""
+    host = 'currentHost/' if '-currentHost' in flags else ''
+    return f"defaults/{host}{domain}.plist"
+
+
+def _export_domain(flags, domain):
+    """Export one preference domain as plist bytes (None if unavailable)"""
+    try:
+        result = subprocess.run(['defaults', *flags, 'export', domain, '-'], capture_output=True)
+    except FileNotFoundError:
+        return None
+    return result.stdout if result.returncode == 0 and result.stdout else None
+
+
+def _add_bytes(tar, name, data, mtime):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    tar.addfile(info, io.BytesIO(data))
+
+
+def capture_snapshot(include_defaults=True, files=None, reason=None):
+    """
+    Capture the current machine state into a snapshot archive
+
+    Args:
+        include_defaults: Also export the preference domains
+        files: Home-relative files to include (default: SNAPSHOT_FILES)
+        reason: Free-form note stored in the manifest
+
+    Returns:
+        Path: The snapshot archive
+    """
+    start = time.monotonic()
+    home = Path.home()
+    files = SNAPSHOT_FILES if files is None else files
+    domains = SNAPSHOT_DOMAINS if include_defaults else []
+
+    # The exports are independent processes, so run them side by side
+    with ThreadPoolExecutor(max_workers=max(1, len(domains))) as executor:
+        exports = list(executor.map(lambda entry: _export_domain(*entry), domains))
+
+    now = int(time.time())
+    manifest = {
+        'version': SNAPSHOT_FORMAT_VERSION,
+        'created': now,
+        'reason': reason,
+        'domains': [],
+        'files': [],
+        'absent_files': [],
+    }
+
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    name = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+    path = SNAPSHOT_DIR / f"{name}.tar.gz"
+    suffix = 1
+    while path.exists():
+        path = SNAPSHOT_DIR / f"{name}-{suffix}.tar.gz"
+        suffix += 1
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tarfile.open(tmp_path, 'w:gz', compresslevel=6) as tar:
+        for (flags, domain), data in zip(domains, exports):
+            if data is None:
+                continue
+            member = _domain_member(flags, domain)
+            _add_bytes(tar, member, data, now)
+            manifest['domains'].append({'domain': domain, 'flags': list(flags), 'member': member})
+
+        for rel in files:
+            src = home / rel
+            if src.is_file():
+                tar.add(src, arcname=f"home/{rel}")
+                manifest['files'].append(rel)
+            else:
+                manifest['absent_files'].append(rel)
+
+        _add_bytes(tar, 'manifest.json', json.dumps(manifest, indent=2).encode(), now)
+    os.replace(tmp_path, path)
+
+    Logger.success(f"Snapshot {path.name} captured ({len(manifest['domains'])} domains, "
+                   f"{len(manifest['files'])} files, {format_bytes(path.stat().st_size)}) "
+                   f"in {time.monotonic() - start:.2f}s")
+    prune_snapshots(load_config().get('snapshot', {}).get('keep', 10))
+    return path
+
+
+def list_snapshots():
+    """Get snapshot archives, newest first"""
+    if not SNAPSHOT_DIR.exists():
+        return []
+    return sorted(SNAPSHOT_DIR.glob('*.tar.gz'), key=lambda p: p.stat().st_mtime, reverse=True)
+
+
+def prune_snapshots(keep):
+    """Delete all but the newest `keep` snapshots"""
+    for path in list_snapshots()[max(keep, 1):]:
+        path.unlink(missing_ok=True)
+
+
+def find_snapshot(snapshot):
+    """
+    Resolve a snapshot argument to an archive path
+
+    Accepts "latest", a snapshot name (with or without .tar.gz) or a path.
+    """
+    if snapshot == 'latest':
+        snapshots = list_snapshots()
+        if not snapshots:
+            raise FileNotFoundError("No snapshots found")
+        return snapshots[0]
+
+    for candidate in (Path(snapshot).expanduser(), SNAPSHOT_DIR / snapshot,
+                      SNAPSHOT_DIR / f"{snapshot}.tar.gz"):
+        if candidate.is_file():
+            return candidate
+    raise FileNotFoundError(f"Snapshot not found: {snapshot}")
+
+
+def _write_file_atomic(dst, data, mode=None):
+    tmp = dst.with_name(f".{dst.name}.restore-{os.getpid()}")
+    tmp.write_bytes(data)
+    if mode is not None:
+        os.chmod(tmp, mode)
+    os.replace(tmp, dst)
+
+
+def restore_snapshot(snapshot):
+    """
+    Restore the machine state from a snapshot
+
+    Each preference domain is replaced with one `defaults import`; files are
+    replaced atomically, and files that did not exist when the snapshot was
+    taken are removed.
+
+    Returns:
+        bool: True if everything was restored
+    """
+    path = find_snapshot(snapshot)
+    home = Path.home()
+    ok = True
+
+    with tarfile.open(path, 'r:gz') as tar:
+        manifest = json.load(tar.extractfile('manifest.json'))
+        if manifest.get('version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {manifest.get('version')}")
+        Logger.info(f"Restoring snapshot {path.name}...")
+
+        restart = set()
+        for entry in manifest['domains']:
+            data = tar.extractfile(entry['member']).read()
+            result = subprocess.run(['defaults', *entry['flags'], 'import', entry['domain'], '-'],
+                                    input=data, capture_output=True)
+            label = entry['domain'] + (' (current host)' if entry['flags'] else '')
+            if result.returncode == 0:
+                Logger.success(f"Restored {label}")
+                if entry['domain'] in DOMAIN_PROCESSES:
+                    restart.add(DOMAIN_PROCESSES[entry['domain']])
+            else:
+                Logger.error(f"Failed to restore {label}: {result.stderr.decode().strip()}")
+                ok = False
+
+        for rel in manifest['files']:
+            member = tar.getmember(f"home/{rel}")
+            _write_file_atomic(home / rel, tar.extractfile(member).read(), member.mode)
+            Logger.success(f"Restored ~/{rel}")
+
+    for rel in manifest['absent_files']:
+        if (home / rel).is_file():
+            (home / rel).unlink()
+            Logger.success(f"Removed ~/{rel} (absent in snapshot)")
+
+    for process in sorted(restart):
+        run_command(['killall', process], check=False)
+    return ok
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Capture and restore machine state snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    capture_parser = subparsers.add_parser("capture", help="Take a snapshot now")
+    capture_parser.add_argument("--reason", help="Note stored with the snapshot")
+    capture_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Capture even if snapshots are disabled in config"
+    )
+
+    subparsers.add_parser("list", help="List snapshots, newest first")
+
+    restore_parser = subparsers.add_parser("restore", help="Restore a snapshot")
+    restore_parser.add_argument("snapshot", help="Snapshot name, path or 'latest'")
+
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        if not load_config().get('snapshot', {}).get('enabled', True) and not args.force:
+            Logger.info("Snapshots disabled in config")
+            return
+        capture_snapshot(reason=args.reason)
+    elif args.command == "list":
+        for path in list_snapshots():
+            with tarfile.open(path, 'r:gz') as tar:
+                manifest = json.load(tar.extractfile('manifest.json'))
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(manifest['created']))
+            print(f"  {path.name[:-len('.tar.gz')]:<20} {created}  "
+                  f"{format_bytes(path.stat().st_size):>9}  {manifest.get('reason') or ''}")
+    else:
+        try:
+            if not restore_snapshot(args.snapshot):
+                sys.exit(1)
+        except (OSError, ValueError, KeyError, tarfile.TarError) as e:
+            Logger.error(f"Rollback failed: {e}")
+            sys.exit(1)
+        Logger.success("Rollback complete")
+
+
+if __name__ == "__main__":
+    main()
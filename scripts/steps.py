@@ -0,0 +1,193 @@
+"""
+Step registry for setup.py
+
+A setup step is a script in this directory with a module-level STEP dict:
+
+    STEP = {
+        'description': 'Installing packages',   # Shown while the step runs
+        'tags': ['setup', 'brew'],              # Selected with --tags
+        'requires': ['install_homebrew'],       # Run after these when they run too
+        'order': 20,                            # Tie-break between independent steps
+        'cost': 600,                            # Estimated seconds before any history
+        'sudo': True,                           # Needs the sudo session
+        'probe': 'step_done',                   # Function returning True if nothing is left to do
+        'args': [...],                          # Arguments ({mode} is the run mode)
+        'args_with': {'snapshot': [...]},       # Extra arguments when another step runs too
+    }
+
+The dict must be a literal closed by a `}` in column 0. The dicts are read
+with `ast` without importing the scripts, so listing and
+selecting steps costs no third-party imports and no probes. A step's module
+is only imported if it is selected and declares a probe; the probe runs just
+before the step, so it sees what earlier steps did.
+
+setup.py runs the steps tagged `setup` by default; `--brew-only`,
+`--config-only` and `--upgrade` select the `brew`, `config` and `upgrade`
+tags, and `--only`, `--skip` and `--tags` pick any registered steps.
+"""
+
+import ast
+import heapq
+import importlib
+import sys
+from pathlib import Path
+
+from timings import format_duration
+
+
+SCRIPTS_DIR = Path(__file__).parent
+DEFAULT_COST = 60.0
+STEP_FIELDS = {'description', 'tags', 'requires', 'order', 'cost', 'sudo', 'probe', 'args', 'args_with'}
+
+
+class StepError(Exception):
+    """Invalid step metadata or selection"""
+
+
+class Step:
+    """A setup script and its declared metadata"""
+
+    def __init__(self, name, path, meta):
+        unknown = set(meta) - STEP_FIELDS
+        if unknown:
+            raise StepError(f"{path.name}: unknown STEP fields: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.path = path
+        self.description = meta.get('description') or name
+        self.tags = list(meta.get('tags') or [])
+        self.requires = list(meta.get('requires') or [])
+        self.order = meta.get('order', 1000)
+        self.cost = float(meta.get('cost', DEFAULT_COST))
+        self.sudo = bool(meta.get('sudo'))
+        self.probe = meta.get('probe')
+        self.args = list(meta.get('args') or [])
+        self.args_with = dict(meta.get('args_with') or {})
+
+    def command_args(self, mode, selected=()):
+        """Arguments for this run: declared args plus those for other selected steps"""
+        args = [arg.format(mode=mode) for arg in self.args]
+        for other, extra in self.args_with.items():
+            if other in selected:
+                args += extra
+        return args
+
+    def is_satisfied(self):
+        """
+        Run the step's probe (importing its module)
+
+        Returns:
+            bool: True if the probe reports nothing to do; a missing or failing
+            probe counts as work to do
+        """
+        if not self.probe:
+            return False
+        if str(self.path.parent) not in sys.path:
+            sys.path.insert(0, str(self.path.parent))
+        try:
+            return bool(getattr(importlib.import_module(self.name), self.probe)())
+        except Exception:
+            return False
+
+
+def read_step_meta(path):
+    """
+    Get the STEP dict of a script without importing it
+
+    Returns:
+        dict: The metadata, or None if the script is not a step
+    """
+    source = path.read_text()
+    start = source.find('\nSTEP = {')
+    if start < 0:
+        return None
+    # Parse just the assignment (it ends at the first closing brace in column 0)
+    end = source.find('\n}', start)
+    try:
+        node = ast.parse(source[start + 1:end + 2], str(path)).body[0]
+        return ast.literal_eval(node.value)
+    except (SyntaxError, ValueError, IndexError):
+        raise StepError(f"{path.name}: STEP must be a literal dict ending with '}}' in column 0")
+
+
+def discover(scripts_dir=SCRIPTS_DIR):
+    """
+    Find the registered steps
+
+    Returns:
+        dict: Step name -> Step
+    """
+    registry = {}
+    for path in sorted(Path(scripts_dir).glob('*.py')):
+        meta = read_step_meta(path)
+        if meta is not None:
+            registry[path.stem] = Step(path.stem, path, meta)
+    for step in registry.values():
+        for name in step.requires:
+            if name not in registry:
+                raise StepError(f"{step.name} requires unknown step: {name}")
+    return registry
+
+
+def _names(values):
+    """Flatten repeated and comma-separated option values"""
+    return [name.strip() for value in values or [] for name in value.split(',') if name.strip()]
+
+
+def select(registry, tags=None, only=None, skip=None):
+    """
+    Pick steps and order them
+
+    Args:
+        registry: discover() result
+        tags: Run the steps carrying any of these tags
+        only: Run exactly these steps (takes precedence over tags)
+        skip: Leave these steps out
+
+    Returns:
+        list: Steps in run order (requirements first, then `order`, then name)
+
+    Raises:
+        StepError: Unknown step or tag, or a requirement cycle
+    """
+    only, skip, tags = _names(only), _names(skip), _names(tags)
+    known_tags = {tag for step in registry.values() for tag in step.tags}
+    for name in only + skip:
+        if name not in registry:
+            raise StepError(f"Unknown step: {name} (known: {', '.join(sorted(registry))})")
+    for tag in tags:
+        if tag not in known_tags:
+            raise StepError(f"Unknown tag: {tag} (known: {', '.join(sorted(known_tags))})")
+
+    if only:
+        chosen = set(only)
+    else:
+        chosen = {name for name, step in registry.items() if set(step.tags) & set(tags)}
+    chosen -= set(skip)
+
+    # Kahn's algorithm; requirements outside the selection are assumed done
+    waiting = {name: {req for req in registry[name].requires if req in chosen} for name in chosen}
+    ready = [(registry[name].order, name) for name, reqs in waiting.items() if not reqs]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        _, name = heapq.heappop(ready)
+        ordered.append(registry[name])
+        for other, reqs in waiting.items():
+            if name in reqs:
+                reqs.discard(name)
+                if not reqs:
+                    heapq.heappush(ready, (registry[other].order, other))
+    if len(ordered) != len(chosen):
+        cycle = sorted(chosen - {step.name for step in ordered})
+        raise StepError(f"Step requirements form a cycle: {', '.join(cycle)}")
+    return ordered
+
+
+def print_steps(steps, db=None):
+    """Print steps with their tags, requirements and estimated duration"""
+    print(f"  {'Step':<20} {'Tags':<22} {'Estimate':>9}  Requires")
+    for step in steps:
+        estimate = db.step_estimate(step.name, step.cost) if db else step.cost
+        flags = ' (sudo)' if step.sudo else ''
+        print(f"  {step.name:<20} {','.join(step.tags):<22} {format_duration(estimate):>9}  "
+              f"{', '.join(step.requires) or '-'}{flags}")
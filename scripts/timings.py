@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Historical Timing Database
+
+Records how long every step and every package install took in a small
+SQLite database, so later runs can plan with real numbers:
+
+- setup.py prints a progress percentage and ETA before each step
+- install_packages.py prefetches downloads longest-first, so the slowest
+  downloads (e.g. docker) start earliest and overlap the short ones
+
+Runs are identified by their log directory name (see logs.py); scripts run
+by setup.py inherit it through MAC_BOOTSTRAP_LOG_DIR.
+
+Usage:
+    ./timings.py stats              # Per-step history
+    ./timings.py stats --packages   # Slowest packages
+    ./timings.py stats --runs       # Recent runs
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from logs import LOG_DIR_ENV, Logger
+
+
+TIMINGS_DB = Path.home() / '.cache' / 'mac-bootstrap' / 'timings.db'
+# Successful samples an estimate is based on (median of the most recent)
+ESTIMATE_SAMPLES = 5
+# Used for steps and packages without history
+DEFAULT_STEP_SECONDS = 10.0
+DEFAULT_PACKAGE_SECONDS = 20.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS steps (
+    run TEXT NOT NULL,
+    step TEXT NOT NULL,
+    duration REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS steps_by_name ON steps (step, finished);
+CREATE TABLE IF NOT EXISTS packages (
+    run TEXT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    duration REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_by_name ON packages (kind, name, phase, finished);
+"""
+
+
+def current_run():
+    """Get the run this process belongs to (the log directory name), if any"""
+    log_dir = os.environ.get(LOG_DIR_ENV)
+    return Path(log_dir).name if log_dir else None
+
+
+def format_duration(seconds):
+    """Format seconds as e.g. "45s" or "3m 10s" """
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+class TimingDB:
+    """
+    The timing database
+
+    Every statement commits on its own, so setup.py and the scripts it runs
+    can write concurrently; one instance may be shared between threads.
+    Failures to open or write the database are logged once and otherwise
+    ignored: timings are advisory.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else TIMINGS_DB
+        self._conn = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None and not self._failed:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None,
+                                             check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                Logger.warning(f"Timing database unavailable: {e}")
+                self._conn = None
+                self._failed = True
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return []
+            try:
+                return conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                Logger.warning(f"Timing database error: {e}")
+                return []
+
+    def record_step(self, step, duration, ok, run=None):
+        """Record a finished step"""
+        self._execute("INSERT INTO steps VALUES (?, ?, ?, ?, ?)",
+                      (run or current_run() or '', step, duration, int(ok), time.time()))
+
+    def record_package(self, kind, name, phase, duration, ok, run=None):
+        """
+        Record a package download or install
+
+        Args:
+            kind: "formula" or "cask"
+            name: Package name
+            phase: "fetch" (download only) or "install"
+        """
+        self._execute("INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                      (run or current_run(), kind, name, phase, duration, int(ok), time.time()))
+
+    def _median(self, rows, default):
+        durations = [row[0] for row in rows]
+        return statistics.median(durations) if durations else default
+
+    def step_estimate(self, step, default=DEFAULT_STEP_SECONDS):
+        """Estimated duration of a step: median of its recent successful runs"""
+        return self._median(self._execute(
+            "SELECT duration FROM steps WHERE step = ? AND ok = 1 ORDER BY finished DESC LIMIT ?",
+            (step, ESTIMATE_SAMPLES)), default)
+
+    def package_estimate(self, kind, name, phase, default=DEFAULT_PACKAGE_SECONDS):
+        """Estimated duration of a package download or install"""
+        return self._median(self._execute(
+            "SELECT duration FROM packages WHERE kind = ? AND name = ? AND phase = ? AND ok = 1 "
+            "ORDER BY finished DESC LIMIT ?",
+            (kind, name, phase, ESTIMATE_SAMPLES)), default)
+
+    def step_stats(self):
+        """
+        Per-step history
+
+        Returns:
+            list: (step, runs, failures, median seconds, last seconds) tuples, slowest first
+        """
+        stats = []
+        for (step,) in self._execute("SELECT DISTINCT step FROM steps"):
+            rows = self._execute("SELECT duration, ok FROM steps WHERE step = ? ORDER BY finished DESC",
+                                 (step,))
+            ok_durations = [duration for duration, ok in rows if ok]
+            stats.append((step, len(rows), sum(1 for _, ok in rows if not ok),
+                          statistics.median(ok_durations) if ok_durations else None, rows[0][0]))
+        return sorted(stats, key=lambda entry: entry[3] or 0, reverse=True)
+
+    def package_stats(self, limit=20):
+        """
+        Slowest packages by median install plus download time
+
+        Returns:
+            list: (kind, name, samples, median fetch seconds, median install seconds) tuples
+        """
+        stats = []
+        for kind, name in self._execute("SELECT DISTINCT kind, name FROM packages"):
+            medians = []
+            samples = 0
+            for phase in ('fetch', 'install'):
+                rows = self._execute(
+                    "SELECT duration FROM packages WHERE kind = ? AND name = ? AND phase = ? AND ok = 1",
+                    (kind, name, phase))
+                samples += len(rows)
+                medians.append(statistics.median(row[0] for row in rows) if rows else None)
+            stats.append((kind, name, samples, *medians))
+        stats.sort(key=lambda entry: (entry[3] or 0) + (entry[4] or 0), reverse=True)
+        return stats[:limit]
+
+    def run_steps(self, run):
+        """
+        Steps of one run
+
+        Returns:
+            list: (step, seconds, ok) tuples in the order they finished
+        """
+        return self._execute("SELECT step, duration, ok FROM steps WHERE run = ? ORDER BY finished", (run,))
+
+    def run_stats(self, limit=10):
+        """
+        Recent runs
+
+        Returns:
+            list: (run, steps, failed steps, total seconds) tuples, newest first
+        """
+        return self._execute(
+            "SELECT run, COUNT(*), SUM(1 - ok), SUM(duration) FROM steps "
+            "GROUP BY run ORDER BY MAX(finished) DESC LIMIT ?", (limit,))
+
+
+class Progress:
+    """
+    Progress and ETA over a list of steps, weighted by estimated duration
+
+    A finished step counts as its estimate, not its actual duration, so a
+    step that overruns does not change the share of the steps after it.
+    """
+
+    def __init__(self, db, steps, defaults=None):
+        """
+        Args:
+            db: TimingDB with step history
+            steps: Step names
+            defaults: Estimates for steps without history (step name -> seconds)
+        """
+        defaults = defaults or {}
+        self.estimates = {step: db.step_estimate(step, defaults.get(step, DEFAULT_STEP_SECONDS))
+                          for step in steps}
+        self.total = sum(self.estimates.values()) or 1.0
+        self.done = 0.0
+        self.started = time.monotonic()
+
+    def finished(self, step):
+        """Mark a step as finished"""
+        self.done += self.estimates.get(step, 0.0)
+
+    def summary(self):
+        """Get e.g. "40% done, ETA 3m 10s" """
+        remaining = max(self.total - self.done, 0.0)
+        percent = 100 * self.done / self.total
+        return f"{percent:.0f}% done, ETA {format_duration(remaining)}"
+
+
+def longest_first(items, estimate):
+    """Order items by descending estimated duration (stable for ties)"""
+    return sorted(items, key=estimate, reverse=True)
+
+
+def print_stats(db, packages=False, runs=False, limit=20):
+    """Print the timing history"""
+    if runs:
+        rows = db.run_stats(limit)
+        print(f"  {'Run':<20} {'Steps':>5} {'Failed':>6} {'Total':>9}")
+        for run, steps, failed, total in rows:
+            print(f"  {run or '-':<20} {steps:>5} {failed:>6} {format_duration(total):>9}")
+    elif packages:
+        rows = db.package_stats(limit)
+        print(f"  {'Package':<30} {'Kind':<8} {'Samples':>7} {'Download':>9} {'Install':>9}")
+        for kind, name, samples, fetch, install in rows:
+            print(f"  {name:<30} {kind:<8} {samples:>7} "
+                  f"{format_duration(fetch) if fetch is not None else '-':>9} "
+                  f"{format_duration(install) if install is not None else '-':>9}")
+    else:
+        rows = db.step_stats()
+        print(f"  {'Step':<24} {'Runs':>5} {'Failed':>6} {'Median':>9} {'Last':>9}")
+        for step, count, failed, median, last in rows:
+            print(f"  {step:<24} {count:>5} {failed:>6} "
+                  f"{format_duration(median) if median is not None else '-':>9} {format_duration(last):>9}")
+    if not rows:
+        Logger.info(f"No timings recorded yet ({db.path})")
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Query the historical timing database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="Show recorded timings")
+    stats_parser.add_argument("--packages", action="store_true", help="Show the slowest packages")
+    stats_parser.add_argument("--runs", action="store_true", help="Show recent runs")
+    stats_parser.add_argument("--limit", type=int, default=20, help="Rows to show (default: 20)")
+    args = parser.parse_args()
+
+    print_stats(TimingDB(), packages=args.packages, runs=args.runs, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Package Upgrade Script
+
+Upgrades outdated Homebrew formulae, casks, fonts and personal apps that
+are listed in the configuration. The outdated set is computed with a single
+`brew outdated` query and everything is upgraded in one batched call.
+Configured names are matched through aliases and old names (golang -> go,
+python -> python@3.12) using one `brew info --installed` query.
+
+Usage:
+    ./upgrade_packages.py            # Upgrade outdated configured packages
+    ./upgrade_packages.py --greedy   # Also upgrade auto-updating casks
+    ./upgrade_packages.py --dry-run  # Only show what would be upgraded
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import Logger, load_config, run_command, command_exists
+from install_personal_apps import get_personal_apps
+from brew_plan import FormulaIndex, short_name
+
+
+STEP = {
+    'description': 'Upgrading packages',
+    'tags': ['upgrade'],
+    'requires': ['install_homebrew'],
+    'order': 25,
+    'cost': 300,
+    'sudo': True,
+}
+
+
+def get_outdated(greedy=False):
+    """
+    Query Homebrew for all outdated packages
+
+    Returns:
+        dict: Package name -> (installed version, latest version), or None on failure
+    """
+    cmd = ["brew", "outdated", "--json=v2"]
+    if greedy:
+        cmd.append("--greedy")
+
+    result = run_command(cmd, check=False)
+    if not result or result.returncode != 0:
+        return None
+
+    try:
+        data = json.loads(result.stdout or '{}')
+    except json.JSONDecodeError as e:
+        Logger.error(f"Could not parse brew outdated output: {e}")
+        return None
+
+    outdated = {}
+    for entry in data.get('formulae', []) + data.get('casks', []):
+        installed = entry.get('installed_versions', [])
+        if isinstance(installed, str):
+            installed = [installed]
+        outdated[short_name(entry['name'])] = (
+            ', '.join(installed) or '?',
+            entry.get('current_version', '?'),
+        )
+    return outdated
+
+
+def get_installed_names():
+    """
+    Map every name of the installed packages to the name `brew outdated` uses
+
+    Formulae are looked up by alias, full name and old name; casks by full
+    and old tokens.
+
+    Returns:
+        tuple: (FormulaIndex, dict of cask name -> token), or None on failure
+    """
+    result = run_command(["brew", "info", "--json=v2", "--installed"], check=False)
+    if not result or result.returncode != 0:
+        return None
+    try:
+        data = json.loads(result.stdout or '{}')
+    except json.JSONDecodeError:
+        return None
+
+    casks = {}
+    for entry in data.get('casks', []):
+        for name in [entry['token'], entry.get('full_token')] + entry.get('old_tokens', []):
+            if name:
+                casks[short_name(name)] = entry['token']
+    return FormulaIndex(data.get('formulae', [])), casks
+
+
+def get_configured_packages(config, installed=None):
+    """
+    Get every package managed by the configuration
+
+    Args:
+        config: Configuration dictionary
+        installed: get_installed_names() result used to resolve aliases and
+                   old names (names are only stripped of their tap if None)
+
+    Returns:
+        dict: Canonical package name -> configured name
+    """
+    formulae = list(config.get('brew_formulae') or [])
+    casks = list(config.get('brew_fonts') or []) + list(config.get('brew_casks') or [])
+    casks.extend(config['personal_apps'] if 'personal_apps' in config else get_personal_apps())
+    index, cask_tokens = installed or (FormulaIndex(), {})
+
+    packages = {}
+    for name in formulae:
+        packages.setdefault(index.resolve(name) or short_name(name), name)
+    for name in casks:
+        packages.setdefault(cask_tokens.get(short_name(name), short_name(name)), name)
+    return packages
+
+
+def upgrade_packages(greedy=None, dry_run=False):
+    """Upgrade outdated configured packages in a single brew call"""
+    config = load_config()
+    upgrade_config = config.get('upgrade', {})
+
+    if not command_exists("brew"):
+        Logger.error("Homebrew not installed. Run install_homebrew.py first")
+        return False
+
+    if greedy is None:
+        greedy = upgrade_config.get('greedy_casks', False)
+
+    start = time.monotonic()
+    Logger.info("Checking for outdated packages...")
+    outdated = get_outdated(greedy=greedy)
+    if outdated is None:
+        Logger.error("Failed to query outdated packages")
+        return False
+
+    if not outdated:
+        Logger.success("All configured packages are up to date")
+        return True
+
+    installed = get_installed_names()
+    if installed is None:
+        Logger.warning("Could not query installed packages (matching configured names as written)")
+    configured = get_configured_packages(config, installed)
+    to_upgrade = sorted(configured.keys() & outdated.keys())
+    if not to_upgrade:
+        Logger.success("All configured packages are up to date")
+        return True
+
+    Logger.info(f"{len(to_upgrade)} outdated packages:")
+    for name in to_upgrade:
+        current, latest = outdated[name]
+        alias = f" [{configured[name]}]" if short_name(configured[name]) != name else ""
+        print(f"  - {name}{alias} ({current} -> {latest})")
+
+    if dry_run:
+        Logger.info("Dry run (nothing upgraded)")
+        return True
+
+    cmd = ["brew", "upgrade"]
+    if greedy:
+        cmd.append("--greedy")
+    result = run_command(cmd + to_upgrade, check=False, stream="lines")
+
+    elapsed = time.monotonic() - start
+    if not result or result.returncode != 0:
+        Logger.error(f"Upgrade finished with errors after {elapsed:.1f}s")
+        return False
+
+    Logger.success(f"Upgraded {len(to_upgrade)} packages in {elapsed:.1f}s")
+    return True
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Upgrade outdated configured packages")
+    parser.add_argument(
+        "--greedy",
+        action="store_true",
+        default=None,
+        help="Also upgrade casks that update themselves (overrides config)"
+    )
+    parser.add_argument(
+        "-n", "--dry-run",
+        action="store_true",
+        help="Only show what would be upgraded"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Package Upgrade")
+    print("=" * 60)
+    print()
+
+    if not upgrade_packages(greedy=args.greedy, dry_run=args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
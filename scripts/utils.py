@@ -5,93 +5,326 @@ This module provides common functionality used across all setup scripts
 including logging, command execution, and configuration loading.
 """
 
+import hashlib
+import json
+import os
+import random
+import re
+import signal
 import subprocess
 import sys
+import threading
+import time
+from collections import deque
 from pathlib import Path
 
-try:
-    import yaml
-except ImportError:
-    print("PyYAML not installed. Installing...")
-    subprocess.run([sys.executable, "-m", "pip", "install", "pyyaml"], check=True)
-    import yaml
+# Re-exported: scripts import Logger and Colors from utils
+from logs import Colors, Logger
 
 
-class Colors:
-    """ANSI color codes for terminal output"""
-    RED = '\033[0;31m'
-    GREEN = '\033[0;32m'
-    YELLOW = '\033[1;33m'
-    BLUE = '\033[0;34m'
-    NC = '\033[0m'  # No Color
+# Per-user state (timestamps, caches) shared between runs
+STATE_DIR = Path.home() / '.cache' / 'mac-bootstrap'
 
+# Configuration profiles (overlays on config.yaml) live in this directory
+PROFILES_DIR = 'profiles'
+PROFILE_ENV = 'MAC_BOOTSTRAP_PROFILE'
 
-class Logger:
-    """Simple logging utility with color support"""
+# Set by setup.py --non-interactive; scripts must not prompt when it is set
+NON_INTERACTIVE_ENV = 'MAC_BOOTSTRAP_NON_INTERACTIVE'
 
-    @staticmethod
-    def info(msg):
-        print(f"{Colors.BLUE}[INFO]{Colors.NC} {msg}")
+# Resolved configurations as JSON, keyed by content hash (see load_config)
+CONFIG_CACHE_DIR = STATE_DIR / 'config'
+# Bump when the merge rules change to invalidate cached resolved configs
+CONFIG_CACHE_VERSION = 1
+_config_memo = {}
 
-    @staticmethod
-    def success(msg):
-        print(f"{Colors.GREEN}[SUCCESS]{Colors.NC} {msg}")
+# Transient network failures worth retrying, matched against command output
+RETRYABLE_ERRORS = {
+    'dns': re.compile(r'Could not resolve host|Name or service not known|nodename nor servname'
+                      r'|Temporary failure in name resolution', re.I),
+    'tls': re.compile(r'SSL_ERROR_SYSCALL|SSL connect error|SSL_connect|gnutls_handshake'
+                      r'|TLS handshake timeout', re.I),
+    'http_5xx': re.compile(r'returned error: 5\d\d|HTTP/[\d.]+ 5\d\d|error: 50[0-4]\b'),
+    'git_eof': re.compile(r'early EOF|unexpected disconnect|RPC failed'
+                          r'|remote end hung up unexpectedly|invalid index-pack output', re.I),
+    'connection': re.compile(r'Connection (reset|refused|timed out)|Operation timed out'
+                             r'|Failed to connect|Could not connect', re.I),
+}
 
-    @staticmethod
-    def warning(msg):
-        print(f"{Colors.YELLOW}[WARNING]{Colors.NC} {msg}")
+# curl exit codes for transient failures (DNS, connect, timeout, TLS, empty/partial reply)
+CURL_RETRYABLE_EXIT_CODES = {
+    5: 'dns', 6: 'dns', 7: 'connection', 28: 'connection', 35: 'tls',
+    52: 'connection', 55: 'connection', 56: 'connection',
+}
 
-    @staticmethod
-    def error(msg):
-        print(f"{Colors.RED}[ERROR]{Colors.NC} {msg}")
+# Retry defaults for network-bound commands
+RETRY_ATTEMPTS = 4
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+BREAKER_THRESHOLD = 3  # Consecutive failed commands before an endpoint is skipped
+BREAKER_COOLDOWN = 300  # Seconds an open circuit stays open
 
+# Bytes of each output stream kept by streamed commands for error reporting
+STREAM_TAIL_BYTES = 64 * 1024
+STREAM_ERROR_LINES = 20  # Tail lines logged when a streamed command fails
+PROGRESS_INTERVAL = 0.1  # Minimum seconds between progress line updates
 
-def load_config(config_path="config.yaml"):
+# Environment injected into every brew invocation. Homebrew is updated once
+# per run by install_homebrew.py, so the implicit auto-update before each
+# `brew install` (and the cleanup after it) is pure overhead.
+HOMEBREW_ENV = {
+    'HOMEBREW_NO_AUTO_UPDATE': '1',
+    'HOMEBREW_NO_INSTALL_CLEANUP': '1',
+    'HOMEBREW_NO_ANALYTICS': '1',
+    'HOMEBREW_NO_ENV_HINTS': '1',
+    'HOMEBREW_NO_INSTALL_UPGRADE': '1',
+}
+
+
+def get_project_root():
+    """Get the project root (parent of the scripts directory)"""
+    if Path(__file__).parent.name == 'scripts':
+        return Path(__file__).parent.parent
+    return Path(__file__).parent
+
+
+def active_profile():
+    """Get the profile selected for this run (set by setup.py --profile)"""
+    return os.environ.get(PROFILE_ENV) or None
+
+
+def is_non_interactive():
+    """Check whether the run is unattended (setup.py --non-interactive)"""
+    return os.environ.get(NON_INTERACTIVE_ENV) == '1'
+
+
+def list_profiles():
+    """
+    List available configuration profiles
+
+    Returns:
+        list: Profile names (file stems in the profiles directory)
+    """
+    profiles_dir = get_project_root() / PROFILES_DIR
+    return sorted(path.stem for path in profiles_dir.glob('*.yaml'))
+
+
+def merge_config(base, overlay):
+    """
+    Merge an overlay configuration onto a base configuration
+
+    Mappings are merged recursively and other values are replaced.
+    List keys suffixed with '+' append items and keys suffixed with '-'
+    remove items, e.g. `brew_casks+: [slack]` or `brew_formulae-: [golang]`.
+
+    Args:
+        base: Base configuration dictionary
+        overlay: Overlay configuration dictionary
+
+    Returns:
+        dict: New merged configuration
+    """
+    result = dict(base)
+    for key, value in overlay.items():
+        if key == 'extends':
+            continue
+        if key.endswith('+'):
+            name = key[:-1]
+            current = list(result.get(name) or [])
+            result[name] = current + [item for item in value or [] if item not in current]
+        elif key.endswith('-'):
+            name = key[:-1]
+            result[name] = [item for item in result.get(name) or [] if item not in (value or [])]
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge_config(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def load_yaml(path):
+    """
+    Parse a YAML file
+
+    PyYAML is used when it is installed; otherwise the built-in miniyaml
+    reader handles the subset the config, profiles and inventories use.
+    Both are imported on first use, so runs served from the resolved
+    config cache never load a YAML parser.
+
+    Returns:
+        The parsed document (None for an empty file)
+
+    Raises:
+        ValueError: The file is not valid YAML
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+    try:
+        import yaml
+    except ImportError:
+        import miniyaml
+        return miniyaml.loads(text)
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(str(e)) from e
+
+
+def _read_yaml(path):
+    """Read a YAML file, exiting with an error if it does not exist or is invalid"""
+    if not path.exists():
+        Logger.error(f"Config file not found: {path}")
+        sys.exit(1)
+    try:
+        return load_yaml(path) or {}
+    except ValueError as e:
+        Logger.error(f"Invalid YAML in {path}: {e}")
+        sys.exit(1)
+
+
+def _resolve_profile(project_root, config_path, profile, seen=()):
+    """Resolve a profile and everything it extends into one dictionary"""
+    if profile in (None, 'base'):
+        return _read_yaml(project_root / config_path)
+
+    if profile in seen:
+        Logger.error(f"Profile inheritance cycle: {' -> '.join(seen + (profile,))}")
+        sys.exit(1)
+
+    overlay = _read_yaml(project_root / PROFILES_DIR / f"{profile}.yaml")
+    base = _resolve_profile(project_root, config_path, overlay.get('extends', 'base'), seen + (profile,))
+    return merge_config(base, overlay)
+
+
+def config_sources(project_root=None, config_path="config.yaml"):
+    """Every file a resolved configuration can depend on"""
+    project_root = project_root or get_project_root()
+    return [project_root / config_path] + sorted((project_root / PROFILES_DIR).glob('*.yaml'))
+
+
+def _config_digest(project_root, config_path, profile):
+    """Hash every file a resolved configuration can depend on"""
+    digest = hashlib.sha256(f"{CONFIG_CACHE_VERSION}:{config_path}:{profile}".encode())
+    for source in config_sources(project_root, config_path):
+        try:
+            digest.update(source.name.encode() + b'\0' + source.read_bytes() + b'\0')
+        except OSError:
+            continue
+    return digest.hexdigest()
+
+
+def compile_config(profile=None, config_path="config.yaml"):
+    """
+    Resolve a configuration without consulting the cache
+
+    Used to ship precompiled configs (see build_zipapp.py): a file named
+    `<cache key>.json` in CONFIG_CACHE_DIR is served by load_config without
+    parsing any YAML.
+
+    Returns:
+        tuple: (cache key, resolved config)
+    """
+    project_root = get_project_root()
+    return (_config_digest(project_root, config_path, profile),
+            _resolve_profile(project_root, config_path, profile))
+
+
+def load_config(config_path="config.yaml", profile=None):
     """
     Load configuration from YAML file
 
+    When a profile is given (or selected with setup.py --profile) the
+    profile is merged onto the configuration it extends. Resolved
+    configurations are cached as JSON keyed by the content hash of the
+    config and profile files, so each is only parsed and merged once and
+    later runs do not load a YAML parser at all.
+
     Args:
         config_path: Path to config file (relative to project root)
+        profile: Profile name in the profiles directory (default: active profile)
 
     Returns:
         dict: Configuration dictionary
     """
-    # Get project root (parent of scripts directory)
-    if Path(__file__).parent.name == 'scripts':
-        project_root = Path(__file__).parent.parent
-    else:
-        project_root = Path(__file__).parent
-
-    config_file = project_root / config_path
+    project_root = get_project_root()
+    profile = profile or active_profile()
 
-    if not config_file.exists():
-        Logger.error(f"Config file not found: {config_file}")
+    if not (project_root / config_path).exists():
+        Logger.error(f"Config file not found: {project_root / config_path}")
         sys.exit(1)
 
-    with open(config_file, 'r') as f:
-        return yaml.safe_load(f)
+    digest = _config_digest(project_root, config_path, profile)
+    if digest in _config_memo:
+        return _config_memo[digest]
+
+    cache_file = CONFIG_CACHE_DIR / f"{digest}.json"
+    try:
+        with open(cache_file, 'r') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = _resolve_profile(project_root, config_path, profile)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(config, f, default=str)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+
+    _config_memo[digest] = config
+    return config
 
 
-def run_command(cmd, check=True, shell=False, capture_output=True):
+def brew_env():
+    """
+    Get the environment for brew invocations
+
+    Variables already set by the user take precedence over HOMEBREW_ENV.
+
+    Returns:
+        dict: Environment variables
+    """
+    return {**HOMEBREW_ENV, **os.environ}
+
+
+def is_brew_command(cmd):
+    """Check whether a command invokes brew"""
+    if isinstance(cmd, str):
+        cmd = cmd.split()
+    return bool(cmd) and Path(cmd[0]).name == 'brew'
+
+
+def run_command(cmd, check=True, shell=False, capture_output=True, stream=None):
     """
     Run a shell command with error handling
 
+    brew commands are run with the HOMEBREW_ENV environment.
+
     Args:
         cmd: Command to run (list or string)
         check: Raise exception on non-zero exit code
         shell: Run command in shell
         capture_output: Capture stdout/stderr
+        stream: Forward output while the command runs instead of capturing
+            it all: "lines" logs every line, "progress" condenses it into one
+            updating progress line (see stream_command)
 
     Returns:
         subprocess.CompletedProcess or None
     """
+    if stream:
+        return stream_command(cmd, check=check, shell=shell, progress=(stream == 'progress'))
+
+    env = brew_env() if is_brew_command(cmd) else None
     try:
         result = subprocess.run(
             cmd,
             check=check,
             shell=shell,
             capture_output=capture_output,
-            text=True
+            text=True,
+            env=env
         )
         return result
     except subprocess.CalledProcessError as e:
@@ -103,6 +336,128 @@ def run_command(cmd, check=True, shell=False, capture_output=True):
         return None
 
 
+class OutputTail:
+    """Keeps only the last `limit` bytes written to it"""
+
+    def __init__(self, limit=STREAM_TAIL_BYTES):
+        self.limit = limit
+        self.total = 0
+        self._chunks = deque()
+        self._size = 0
+
+    def append(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+        self.total += len(data)
+        while self._size - len(self._chunks[0]) >= self.limit:
+            self._size -= len(self._chunks.popleft())
+
+    def text(self):
+        return b''.join(self._chunks)[-self.limit:].decode(errors='replace')
+
+
+LINE_BREAK_RE = re.compile(rb'\r\n|\r|\n')
+
+
+def _pump(pipe, tail, on_lines):
+    """Read a pipe to the end, keeping its tail and passing on each batch of complete lines"""
+    partial = b''
+    for chunk in iter(lambda: pipe.read1(65536), b''):
+        tail.append(chunk)
+        *lines, partial = LINE_BREAK_RE.split(partial + chunk)
+        # A runaway line without breaks must not grow without bound
+        partial = partial[-tail.limit:]
+        if lines:
+            on_lines(lines)
+    if partial:
+        on_lines([partial])
+    pipe.close()
+
+
+def stream_command(cmd, check=True, shell=False, prefix='', progress=False,
+                   tail_bytes=STREAM_TAIL_BYTES, timeout=None):
+    """
+    Run a command, forwarding its output as it is produced
+
+    Output is never held in full: each stream keeps only its last
+    `tail_bytes`, which become the result's stdout/stderr and are reported
+    if the command fails. Memory use stays flat however much is printed.
+
+    Args:
+        cmd: Command to run (list or string)
+        check: Raise CalledProcessError on non-zero exit code
+        shell: Run command in shell
+        prefix: Prepended to each forwarded line
+        progress: Condense output into one updating progress line
+            (the full tail is still reported on failure)
+        tail_bytes: Bytes of stdout and of stderr to keep
+        timeout: Seconds after which the command is killed (it then fails
+            with a negative return code, or raises TimeoutExpired if check)
+
+    Returns:
+        subprocess.CompletedProcess: stdout/stderr hold the tails
+    """
+    if progress:
+        last = [0.0]
+        lock = threading.Lock()
+
+        def on_lines(lines):
+            # Only the newest line of a batch is shown, at most every PROGRESS_INTERVAL
+            now = time.monotonic()
+            if now - last[0] < PROGRESS_INTERVAL:
+                return
+            line = next((line for line in reversed(lines) if line.strip()), b'')
+            with lock:
+                if line:
+                    last[0] = now
+                    Logger.progress(prefix + line.decode(errors='replace').strip())
+    else:
+        def on_lines(lines):
+            for line in lines:
+                Logger.output(prefix + line.decode(errors='replace'))
+
+    env = brew_env() if is_brew_command(cmd) else None
+    # With a timeout the command gets its own process group, so children
+    # holding the pipes open are killed along with it
+    process = subprocess.Popen(cmd, shell=shell, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               start_new_session=timeout is not None)
+    tails = (OutputTail(tail_bytes), OutputTail(tail_bytes))
+    readers = [
+        threading.Thread(target=_pump, args=(pipe, tail, on_lines), daemon=True)
+        for pipe, tail in zip((process.stdout, process.stderr), tails)
+    ]
+    for reader in readers:
+        reader.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for reader in readers:
+        reader.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    timed_out = any(reader.is_alive() for reader in readers)
+    if timed_out:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+        for reader in readers:
+            reader.join(1)
+    returncode = process.wait()
+
+    result = subprocess.CompletedProcess(cmd, returncode, tails[0].text(), tails[1].text())
+    if returncode != 0 or timed_out:
+        command = ' '.join(cmd) if isinstance(cmd, list) else cmd
+        if timed_out:
+            Logger.error(f"Command timed out after {timeout:.0f}s: {command}")
+        else:
+            Logger.error(f"Command failed: {command}")
+        output = (result.stderr or result.stdout).rstrip().splitlines()
+        for line in output[-STREAM_ERROR_LINES:]:
+            Logger.output(f"  {line}")
+        if check and timed_out:
+            raise subprocess.TimeoutExpired(cmd, timeout, result.stdout, result.stderr)
+        if check:
+            raise subprocess.CalledProcessError(returncode, cmd, result.stdout, result.stderr)
+    return result
+
+
 def command_exists(command):
     """
     Check if a command exists in PATH
@@ -117,3 +472,252 @@ def command_exists(command):
         ["which", command],
         capture_output=True
     ).returncode == 0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a command targets an endpoint whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures per endpoint
+
+    After `threshold` consecutive failed commands against the same endpoint,
+    further commands fail immediately until `cooldown` seconds have passed.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened_at = {}
+
+    def allow(self, endpoint):
+        opened_at = self._opened_at.get(endpoint)
+        if opened_at is None:
+            return True
+        if time.monotonic() - opened_at >= self.cooldown:
+            # Half-open: let one command through to probe the endpoint
+            del self._opened_at[endpoint]
+            self._failures[endpoint] = self.threshold - 1
+            return True
+        return False
+
+    def record_success(self, endpoint):
+        self._failures.pop(endpoint, None)
+        self._opened_at.pop(endpoint, None)
+
+    def record_failure(self, endpoint):
+        self._failures[endpoint] = self._failures.get(endpoint, 0) + 1
+        if self._failures[endpoint] >= self.threshold:
+            self._opened_at[endpoint] = time.monotonic()
+
+
+# Shared by every retried command in this process
+circuit_breaker = CircuitBreaker()
+
+
+def command_endpoint(cmd):
+    """
+    Get the remote host a command talks to
+
+    Args:
+        cmd: Command (list or string)
+
+    Returns:
+        str: Host name from the first URL in the command, or None
+    """
+    text = cmd if isinstance(cmd, str) else ' '.join(str(arg) for arg in cmd)
+    match = re.search(r'[a-z][a-z0-9+.-]*://(?:[^@/\s]+@)?([^/:\s"\']+)|[\w.-]+@([\w.-]+):', text)
+    if not match:
+        return None
+    return match.group(1) or match.group(2)
+
+
+def classify_failure(cmd, returncode, output):
+    """
+    Classify a failed command as a transient network error
+
+    Args:
+        cmd: Command that failed (list or string)
+        returncode: Exit code
+        output: Captured stderr/stdout text
+
+    Returns:
+        str: Error category (dns, tls, http_5xx, git_eof, connection) or None if not retryable
+    """
+    program = Path((cmd if isinstance(cmd, str) else cmd[0]).split()[0]).name
+    if program == 'curl' and returncode in CURL_RETRYABLE_EXIT_CODES:
+        return CURL_RETRYABLE_EXIT_CODES[returncode]
+    for category, pattern in RETRYABLE_ERRORS.items():
+        if output and pattern.search(output):
+            return category
+    return None
+
+
+def backoff_delay(attempt, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY):
+    """Exponential backoff with full jitter for the given attempt (1-based)"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def run_with_retry(cmd, attempts=RETRY_ATTEMPTS, check=True, capture_output=True,
+                   endpoint=None, breaker=None, sleep=time.sleep, **kwargs):
+    """
+    Run a network-bound command, retrying transient failures
+
+    Failures are retried with exponential backoff and jitter only when
+    classify_failure() recognises them as transient. Each endpoint has a
+    circuit breaker so a dead mirror fails fast instead of being retried
+    by every command; only transient failures count towards opening it.
+
+    Args:
+        cmd: Command to run (list or string)
+        attempts: Maximum number of attempts
+        check: Raise CalledProcessError if the command ultimately fails
+        capture_output: Capture stdout (stderr is always captured for classification
+            and echoed when not capturing)
+        endpoint: Circuit breaker key (default: host of the first URL in cmd)
+        breaker: CircuitBreaker to use (default: the shared circuit_breaker)
+        sleep: Sleep function (for tests)
+        **kwargs: Passed to subprocess.run
+
+    Returns:
+        subprocess.CompletedProcess
+
+    Raises:
+        CircuitOpenError: The endpoint's circuit is open
+        subprocess.CalledProcessError: The command failed and check is True
+    """
+    breaker = breaker or circuit_breaker
+    endpoint = endpoint or command_endpoint(cmd)
+    if endpoint and not breaker.allow(endpoint):
+        raise CircuitOpenError(f"Skipping {endpoint}: too many recent failures")
+
+    for attempt in range(1, attempts + 1):
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE if capture_output else None,
+            stderr=subprocess.PIPE,
+            text=True,
+            **kwargs
+        )
+        if not capture_output and result.stderr:
+            sys.stderr.write(result.stderr)
+        if result.returncode == 0:
+            if endpoint:
+                breaker.record_success(endpoint)
+            return result
+
+        category = classify_failure(cmd, result.returncode, f"{result.stderr}\n{result.stdout or ''}")
+        if category is None or attempt == attempts:
+            break
+        delay = backoff_delay(attempt)
+        Logger.warning(f"Transient {category} error, retrying in {delay:.1f}s ({attempt}/{attempts - 1})...")
+        sleep(delay)
+
+    # Only transient failures say anything about the endpoint; a permanent one
+    # (404, unknown formula) leaves its failure count untouched
+    if endpoint and category is not None:
+        breaker.record_failure(endpoint)
+    if check:
+        raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+    return result
+
+
+def stamp_is_fresh(name, ttl_seconds):
+    """
+    Check whether a state stamp was touched within the TTL
+
+    Args:
+        name: Stamp file name (inside STATE_DIR)
+        ttl_seconds: Maximum age in seconds
+
+    Returns:
+        bool: True if the stamp exists and is younger than the TTL
+    """
+    try:
+        age = time.time() - (STATE_DIR / name).stat().st_mtime
+    except OSError:
+        return False
+    return 0 <= age < ttl_seconds
+
+
+def touch_stamp(name):
+    """Record the current time in a state stamp"""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    (STATE_DIR / name).touch()
+
+
+def _scandir_size(path):
+    """Sum file sizes below a directory using an iterative scandir walk"""
+    total = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def directory_size(path, max_workers=8):
+    """
+    Measure the total size of a directory tree
+
+    Top-level subdirectories are walked in parallel, each with a single
+    scandir pass, so large caches are measured quickly.
+
+    Args:
+        path: Directory to measure
+        max_workers: Number of parallel walkers
+
+    Returns:
+        int: Size in bytes (0 if the directory does not exist)
+    """
+    path = Path(path)
+    if not path.is_dir():
+        return 0
+
+    total = 0
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+
+    if subdirs:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            total += sum(executor.map(_scandir_size, subdirs))
+    return total
+
+
+def format_bytes(size):
+    """
+    Format a byte count for display
+
+    Args:
+        size: Number of bytes
+
+    Returns:
+        str: Human-readable size (e.g. "1.5 GB")
+    """
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} TB"
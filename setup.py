@@ -10,50 +10,105 @@ Usage:
     ./setup.py --brew-only      # Install only Homebrew packages
     ./setup.py --config-only    # Only apply system configurations
     ./setup.py --dotfiles-only  # Only copy dotfiles
+    ./setup.py --upgrade        # Upgrade outdated configured packages
+    ./setup.py --only configure_git,configure_dock  # Run only these steps
+    ./setup.py --tags config --skip configure_dock  # Run steps by tag
+    ./setup.py steps            # List the registered steps
+    ./setup.py --profile data   # Use profiles/data.yaml on top of config.yaml
+    ./setup.py --non-interactive --on-failure continue  # Unattended run
+    ./setup.py bundle -o lab.tar.gz      # Build an offline bundle
+    ./setup.py zipapp -o mac-bootstrap.pyz  # Package as one file for the stock Python
+    ./setup.py stats                     # Step and package timing history
+    ./setup.py --offline lab.tar.gz      # Install from an offline bundle
+    ./setup.py --watch                   # Report drift from config.yaml periodically
+    ./setup.py --rollback latest         # Undo the last run's configuration changes
+    ./setup.py -n --log-format json      # Machine-readable output
+
+Steps are the scripts in scripts/ that declare STEP metadata (see
+scripts/steps.py); the full setup, --brew-only, --config-only and --upgrade
+run the steps tagged setup, brew, config and upgrade.
+
+Every run writes full per-step logs to ~/.cache/mac-bootstrap/logs/<run>/
+and records step durations in ~/.cache/mac-bootstrap/timings.db, which
+later runs use for progress and ETA estimates.
 """
 
 import argparse
+import codecs
+import os
+import re
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
-
-
-class Colors:
-    """ANSI color codes"""
-    RED = '\033[0;31m'
-    GREEN = '\033[0;32m'
-    YELLOW = '\033[1;33m'
-    BLUE = '\033[0;34m'
-    NC = '\033[0m'
-
-
-class Logger:
-    """Simple logger"""
-
-    @staticmethod
-    def info(msg):
-        print(f"{Colors.BLUE}[INFO]{Colors.NC} {msg}")
-
-    @staticmethod
-    def success(msg):
-        print(f"{Colors.GREEN}[SUCCESS]{Colors.NC} {msg}")
-
-    @staticmethod
-    def warning(msg):
-        print(f"{Colors.YELLOW}[WARNING]{Colors.NC} {msg}")
-
-    @staticmethod
-    def error(msg):
-        print(f"{Colors.RED}[ERROR]{Colors.NC} {msg}")
+from select import select as select_fds
+
+sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
+import logs
+from logs import Logger, LogRecord
+from timings import Progress, TimingDB, format_duration, print_stats
+from offline_bundle import OFFLINE_ENV
+from privileged import PrivilegedHelper
+from steps import StepError, discover, print_steps, select
+from utils import NON_INTERACTIVE_ENV, PROFILE_ENV
+
+
+# Seconds a partial line of script output waits for its newline before it is
+# shown anyway (it is most likely a prompt)
+PROMPT_DELAY = 0.2
+LINE_BREAK_RE = re.compile(r'\r\n|\r|\n')
+
+
+class SudoKeepalive:
+    """Keeps the sudo timestamp fresh in a background thread"""
+
+    def __init__(self, interval=60):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            subprocess.run(
+                ["sudo", "-n", "-v"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
 
 
 class SetupOrchestrator:
     """Main orchestrator for setup scripts"""
 
-    def __init__(self):
+    def __init__(self, non_interactive=False, on_failure=None, retries=2, log_format='plain', probes=True):
         self.scripts_dir = Path(__file__).parent / 'scripts'
-
-    def run_script(self, script_name, description):
+        self.non_interactive = non_interactive
+        self.on_failure = on_failure or ('abort' if non_interactive else 'prompt')
+        self.retries = retries
+        self.probes = probes
+        self.failed_steps = []
+        self.sudo_keepalive = None
+        self.privileged_helper = None
+
+        # Scripts send their records back as JSON lines, which are rendered
+        # here and written to the step logs along with any other output
+        self.log_dir = logs.new_run_dir()
+        self.log_format = log_format
+        self.hub = logs.configure('setup', log_format, self.log_dir)
+        os.environ[logs.LOG_DIR_ENV] = str(self.log_dir)
+        os.environ[logs.LOG_FORMAT_ENV] = 'json'
+        self.timings = TimingDB()
+
+    def run_script(self, script_name, description, args=()):
         """Run a setup script"""
         Logger.info(f"{description}...")
 
@@ -62,92 +117,236 @@ class SetupOrchestrator:
             Logger.error(f"Script not found: {script_path}")
             return False
 
+        command = [sys.executable, str(script_path), *args]
+        env = {**os.environ, logs.STEP_ENV: script_name}
+        start = time.monotonic()
+        self.hub.step_started(script_name, description)
         try:
-            result = subprocess.run(
-                [sys.executable, str(script_path)],
-                check=True
-            )
-            return result.returncode == 0
-        except subprocess.CalledProcessError as e:
-            Logger.error(f"Script failed: {script_name}")
-            return False
+            returncode = self._run_piped(command, env, script_name)
         except Exception as e:
             Logger.error(f"Error running {script_name}: {e}")
-            return False
+            returncode = None
 
-    def run_full_setup(self):
-        """Run complete setup process"""
-        print("═" * 60)
-        print("  macOS Fresh Install Setup")
-        print("═" * 60)
-        print()
-
-        # Display interactive steps warning
-        Logger.warning("INTERACTIVE STEPS REQUIRED:")
-        print("  • Sudo password (required upfront)")
-        print("  • Some installations may ask for confirmation")
-        print()
-        print("  Automated installations will proceed automatically.")
-        print("  See README.md for post-setup manual steps (browsers, NvChad, etc.)")
-        print()
-
-        # Ask for sudo password upfront
+        ok = returncode == 0
+        elapsed = time.monotonic() - start
+        self.hub.step_finished(script_name, ok, elapsed)
+        self.timings.record_step(script_name, elapsed, ok, run=self.log_dir.name)
+        if returncode:
+            Logger.error(f"Script failed: {script_name} (log: {self.log_dir / script_name}.log)")
+        return ok
+
+    def _run_piped(self, command, env, script_name):
+        """
+        Run a script with its output parsed into log records
+
+        Everything the script writes (records, print output, tool output,
+        tracebacks) goes through the hub, so it is shown and kept in the
+        step log. A partial line left waiting for PROMPT_DELAY seconds,
+        such as an input() prompt, is shown without waiting for its newline.
+        """
+        process = subprocess.Popen(
+            command,
+            env=env,
+            # Fail fast on any unexpected prompt instead of hanging
+            stdin=subprocess.DEVNULL if self.non_interactive else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+        fd = process.stdout.fileno()
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        partial = ''
+        while True:
+            if partial and not select_fds([fd], [], [], PROMPT_DELAY)[0]:
+                self._dispatch_line(partial, script_name)
+                partial = ''
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            *lines, partial = LINE_BREAK_RE.split(partial + decoder.decode(chunk))
+            for line in lines:
+                self._dispatch_line(line, script_name)
+        partial += decoder.decode(b'', final=True)
+        if partial:
+            self._dispatch_line(partial, script_name)
+        process.stdout.close()
+        return process.wait()
+
+    def _dispatch_line(self, line, script_name):
+        """Route one line of script output to the hub"""
+        record = LogRecord.from_json(line, script_name)
+        if record is None:
+            record = LogRecord('output', line, script_name)
+        if record.level != 'step':
+            self.hub.dispatch(record)
+
+    def run_step(self, script_name, description, args=()):
+        """Run a setup script, applying the failure policy if it fails"""
+        attempts = 1 + (self.retries if self.on_failure == 'retry' else 0)
+        for attempt in range(1, attempts + 1):
+            if self.run_script(script_name, description, args):
+                return True
+            if attempt < attempts:
+                Logger.warning(f"Retrying {script_name} ({attempt}/{self.retries})...")
+
+        self.failed_steps.append(script_name)
+        if self.on_failure == 'prompt':
+            if input(f"\nContinue anyway? (y/n): ").lower() != 'y':
+                sys.exit(1)
+        elif self.on_failure != 'continue':
+            Logger.error(f"Aborting after failed step: {script_name}")
+            sys.exit(1)
+        return False
+
+    def run_steps(self, steps, mode, spacing=False):
+        """
+        Run steps in order, reporting progress against their historical durations
+
+        Steps with a probe are skipped when it reports nothing to do.
+
+        Args:
+            steps: Steps from steps.select()
+            mode: Run mode, passed to step arguments (e.g. the snapshot reason)
+            spacing: Print a blank line after each step
+        """
+        names = [step.name for step in steps]
+        progress = Progress(self.timings, names, {step.name: step.cost for step in steps})
+        Logger.info(f"Estimated time: {format_duration(progress.total)}")
+        for step in steps:
+            Logger.info(f"Progress: {progress.summary()}")
+            if self.probes and step.is_satisfied():
+                Logger.info(f"{step.description}: nothing to do (skipping)")
+            else:
+                self.run_step(step.name, step.description, step.command_args(mode, names))
+            progress.finished(step.name)
+            if spacing:
+                Logger.output()  # Blank line between steps
+
+    def run_selected(self, steps, mode, spacing=False):
+        """Run steps, holding sudo for the run if any of them needs it"""
+        needs_sudo = any(step.sudo for step in steps)
+        if needs_sudo:
+            self.acquire_sudo()
+        try:
+            self.run_steps(steps, mode, spacing)
+        finally:
+            # Also on an aborted run or Ctrl+C, so the helper and its socket go away
+            if needs_sudo:
+                self.release_sudo()
+
+    def acquire_sudo(self):
+        """
+        Ask for sudo once, keep the timestamp fresh for the whole run and
+        start the privileged helper the steps send their root actions to
+        """
         Logger.info("This script requires sudo access...")
-        subprocess.run(["sudo", "-v"], check=True)
-
-        # Define setup steps
-        steps = [
-            ("install_homebrew", "Installing Homebrew"),
-            ("install_packages", "Installing packages"),
-            ("configure_finder", "Configuring Finder"),
-            ("configure_system", "Configuring system preferences"),
-            ("configure_git", "Configuring Git"),
-            ("install_zsh", "Installing Zsh and Oh My Zsh"),
-            ("install_nvchad", "Installing NvChad"),
-            ("copy_dotfiles", "Copying dotfiles"),
-            ("configure_dock", "Configuring Dock"),  # Last step - only adds installed apps
-        ]
-
-        # Execute each step
-        for script_name, description in steps:
-            if not self.run_script(script_name, description):
-                if input(f"\nContinue anyway? (y/n): ").lower() != 'y':
-                    sys.exit(1)
-            print()  # Blank line between steps
-
-        print("═" * 60)
-        Logger.success("macOS setup complete!")
-        print("═" * 60)
-        print()
-        print("Manual steps remaining:")
-        print("  1. Sign in to 1Password and sync passwords")
-        print("  2. Run 'nvim' to complete NvChad setup")
-        print("  3. Configure SSH keys:")
-        print("     ssh-keygen -t ed25519 -C \"your_email@example.com\"")
-        print("  4. Set up VS Code Settings Sync")
-        print("  5. Install browsers manually (Chrome, Firefox, Arc)")
-        print("  6. Restart your Mac for all changes to take effect")
-        print("  7. Open iTerm2 and set JetBrains Mono Nerd Font")
-        print()
-
-    def run_brew_only(self):
+        if self.non_interactive and not sys.stdin.isatty():
+            # No terminal to prompt on: only cached credentials or NOPASSWD work
+            if subprocess.run(["sudo", "-n", "-v"], stderr=subprocess.DEVNULL).returncode != 0:
+                Logger.warning("sudo requires a password; privileged steps may fail")
+                return
+        else:
+            subprocess.run(["sudo", "-v"], check=True)
+
+        # Homebrew's cask installers still call sudo themselves
+        self.sudo_keepalive = SudoKeepalive()
+        self.sudo_keepalive.start()
+        self.privileged_helper = PrivilegedHelper()
+        if not self.privileged_helper.start():
+            self.privileged_helper = None
+
+    def release_sudo(self):
+        """Stop the privileged helper and the sudo keepalive thread"""
+        if self.privileged_helper:
+            self.privileged_helper.stop()
+            self.privileged_helper = None
+        if self.sudo_keepalive:
+            self.sudo_keepalive.stop()
+            self.sudo_keepalive = None
+
+    def run_full_setup(self, steps):
+        """Run complete setup process"""
+        Logger.output("═" * 60)
+        Logger.output("  macOS Fresh Install Setup")
+        Logger.output("═" * 60)
+        Logger.output()
+
+        if self.non_interactive:
+            Logger.info(f"Running non-interactively (on failure: {self.on_failure})")
+        else:
+            # Display interactive steps warning
+            Logger.warning("INTERACTIVE STEPS REQUIRED:")
+            Logger.output("  • Sudo password (required upfront)")
+            Logger.output("  • Some installations may ask for confirmation")
+            Logger.output()
+            Logger.output("  Automated installations will proceed automatically.")
+            Logger.output("  See README.md for post-setup manual steps (browsers, NvChad, etc.)")
+        Logger.output()
+
+        # Asks for the sudo password upfront
+        self.run_selected(steps, 'setup', spacing=True)
+
+        Logger.output("═" * 60)
+        if self.failed_steps:
+            Logger.warning(f"macOS setup finished with failed steps: {', '.join(self.failed_steps)}")
+        else:
+            Logger.success("macOS setup complete!")
+        Logger.output("═" * 60)
+        Logger.output()
+        Logger.output("Manual steps remaining:")
+        Logger.output("  1. Sign in to 1Password and sync passwords")
+        Logger.output("  2. Run 'nvim' to check NvChad (plugins are pre-installed)")
+        Logger.output("  3. Configure SSH keys:")
+        Logger.output("     ssh-keygen -t ed25519 -C \"your_email@example.com\"")
+        Logger.output("  4. Set up VS Code Settings Sync")
+        Logger.output("  5. Install browsers manually (Chrome, Firefox, Arc)")
+        Logger.output("  6. Restart your Mac for all changes to take effect")
+        Logger.output("  7. Open iTerm2 and set JetBrains Mono Nerd Font")
+        Logger.output()
+
+    def run_brew_only(self, steps):
         """Install only Homebrew and packages"""
         Logger.info("Running Homebrew-only installation...")
-        self.run_script("install_homebrew", "Installing Homebrew")
-        self.run_script("install_packages", "Installing packages")
+        self.run_selected(steps, 'brew-only')
 
-    def run_config_only(self):
+    def run_config_only(self, steps):
         """Apply only system configurations"""
         Logger.info("Applying system configurations only...")
-        self.run_script("configure_finder", "Configuring Finder")
-        self.run_script("configure_system", "Configuring system preferences")
-        self.run_script("configure_git", "Configuring Git")
-        self.run_script("configure_dock", "Configuring Dock")  # Last - only adds installed apps
+        self.run_selected(steps, 'config-only')
+
+    def run_upgrade(self, steps):
+        """Upgrade outdated configured packages"""
+        Logger.info("Upgrading outdated packages...")
+        self.run_selected(steps, 'upgrade')
+
+    def run_partial(self, steps):
+        """Run steps picked with --only or --tags"""
+        Logger.info(f"Running steps: {', '.join(step.name for step in steps)}")
+        self.run_selected(steps, 'partial')
+
+    def run_bundle(self, output):
+        """Build an offline bundle for the resolved configuration"""
+        Logger.info("Building offline bundle...")
+        self.run_step("offline_bundle", "Bundling artifacts", args=["build", "-o", output])
+
+    def run_zipapp(self, output):
+        """Package the tool as a single zipapp"""
+        Logger.info("Building zipapp...")
+        self.run_step("build_zipapp", "Packaging zipapp", args=["-o", output])
+
+    def run_watch(self, remediate=False):
+        """Watch for drift from the configuration"""
+        self.run_script("check_drift", "Watching for drift", ["--watch"] + (["--remediate"] if remediate else []))
 
     def run_dotfiles_only(self):
         """Copy only dotfiles"""
         Logger.info("Copying dotfiles only...")
-        self.run_script("copy_dotfiles", "Copying dotfiles")
+        self.run_step("copy_dotfiles", "Copying dotfiles")
+
+    def run_rollback(self, snapshot):
+        """Restore settings and dotfiles from a snapshot"""
+        Logger.info(f"Rolling back to snapshot: {snapshot}")
+        self.run_step("snapshot", "Restoring snapshot", ["restore", snapshot])
 
 
 def main():
@@ -161,6 +360,27 @@ Examples:
   ./setup.py --brew-only      Install only Homebrew and packages
   ./setup.py --config-only    Apply only system configurations
   ./setup.py --dotfiles-only  Copy only dotfiles
+  ./setup.py --upgrade        Upgrade outdated configured packages
+  ./setup.py --only configure_git,configure_dock
+                              Run only these steps (in dependency order)
+  ./setup.py --tags config,shell --skip configure_dock
+                              Run the steps with these tags, except one
+  ./setup.py steps            List the registered steps (honours the
+                              selection options)
+  ./setup.py --profile data   Use profiles/data.yaml on top of config.yaml
+  ./setup.py --non-interactive --on-failure retry --retries 3
+                              Unattended run, retrying failed steps
+  ./setup.py bundle -o lab.tar.gz
+                              Bundle all downloads for air-gapped machines
+  ./setup.py zipapp -o mac-bootstrap.pyz
+                              Package the tool as one file that runs with the
+                              stock python3 (no pip step)
+  ./setup.py stats            Show step and package durations from past runs
+  ./setup.py --offline lab.tar.gz
+                              Install from a bundle without network access
+  ./setup.py --watch          Report drift from config.yaml as JSON
+  ./setup.py --rollback latest
+                              Restore the snapshot taken before the last run
 
 Individual scripts can also be run directly:
   ./scripts/install_homebrew.py
@@ -169,6 +389,23 @@ Individual scripts can also be run directly:
         """
     )
 
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["bundle", "zipapp", "stats", "steps"],
+        help="Build an offline bundle or a zipapp, show timing history or list "
+             "the steps, instead of running the setup"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        help="Archive to write with the bundle or zipapp command "
+             "(default: mac-bootstrap-bundle.tar.gz or mac-bootstrap.pyz)"
+    )
+    parser.add_argument(
+        "--offline",
+        metavar="BUNDLE",
+        help="Install from an offline bundle built with the bundle command"
+    )
     parser.add_argument(
         "--brew-only",
         action="store_true",
@@ -184,19 +421,170 @@ Individual scripts can also be run directly:
         action="store_true",
         help="Copy only dotfiles"
     )
+    parser.add_argument(
+        "--upgrade",
+        action="store_true",
+        help="Upgrade outdated configured packages"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Periodically check for drift from the configuration"
+    )
+    parser.add_argument(
+        "--remediate",
+        action="store_true",
+        help="With --watch, fix drifted items automatically"
+    )
+    parser.add_argument(
+        "--rollback",
+        metavar="SNAPSHOT",
+        help="Restore a snapshot (name, path or 'latest'; see scripts/snapshot.py list)"
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        metavar="STEPS",
+        help="Run only these steps (comma-separated, repeatable)"
+    )
+    parser.add_argument(
+        "--tags",
+        action="append",
+        metavar="TAGS",
+        help="Run the steps with any of these tags, e.g. brew,config (comma-separated, repeatable)"
+    )
+    parser.add_argument(
+        "--skip",
+        action="append",
+        metavar="STEPS",
+        help="Leave these steps out of the run (comma-separated, repeatable)"
+    )
+    parser.add_argument(
+        "--no-probes",
+        action="store_true",
+        help="Run selected steps even if their probe reports nothing to do"
+    )
+    parser.add_argument(
+        "--profile",
+        help="Configuration profile from profiles/ to apply on top of config.yaml"
+    )
+
+    parser.add_argument(
+        "-n", "--non-interactive",
+        action="store_true",
+        help="Never prompt; every step runs as if confirmed with -y"
+    )
+    parser.add_argument(
+        "--on-failure",
+        choices=["prompt", "abort", "continue", "retry"],
+        help="What to do when a step fails (default: prompt, or abort when non-interactive)"
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["auto", "plain", "status", "json"],
+        default="auto",
+        help="Console output: plain lines, a live status view, or JSON lines "
+             "(default: status when non-interactive on a terminal, else plain)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Retries per failed step with --on-failure retry (default: 2)"
+    )
 
     args = parser.parse_args()
 
-    orchestrator = SetupOrchestrator()
+    mode_flags = [flag for flag, on in (("--brew-only", args.brew_only), ("--config-only", args.config_only),
+                                        ("--dotfiles-only", args.dotfiles_only), ("--upgrade", args.upgrade),
+                                        ("--watch", args.watch), ("--rollback", args.rollback)) if on]
+    if (args.only or args.tags) and mode_flags:
+        parser.error(f"--only/--tags cannot be combined with {mode_flags[0]}")
+
+    # Read from the scripts' STEP metadata without importing them
+    tags = ['brew'] if args.brew_only else ['config'] if args.config_only else \
+        ['upgrade'] if args.upgrade else args.tags or ['setup']
+    try:
+        steps = select(discover(), tags=tags, only=args.only, skip=args.skip)
+    except StepError as e:
+        parser.error(str(e))
+
+    if args.command == "steps":
+        print_steps(steps, TimingDB())
+        return
+
+    if args.command == "stats":
+        db = TimingDB()
+        for heading, options in (("Steps", {}), ("Slowest packages", {'packages': True}),
+                                 ("Recent runs", {'runs': True})):
+            Logger.output(heading)
+            print_stats(db, **options)
+            Logger.output()
+        return
+
+    log_format = args.log_format
+    if log_format == 'auto':
+        # The live view needs the terminal to itself, so only when nothing prompts
+        log_format = 'status' if args.non_interactive and sys.stdout.isatty() else 'plain'
+    elif log_format != 'plain' and not args.non_interactive:
+        parser.error(f"--log-format {log_format} requires --non-interactive")
+
+    if args.non_interactive:
+        if args.on_failure == 'prompt':
+            parser.error("--on-failure prompt cannot be used with --non-interactive")
+        os.environ[NON_INTERACTIVE_ENV] = '1'
+        # Also honoured by the Homebrew installer
+        os.environ['NONINTERACTIVE'] = '1'
+
+    orchestrator = SetupOrchestrator(
+        non_interactive=args.non_interactive,
+        on_failure=args.on_failure,
+        retries=args.retries,
+        log_format=log_format,
+        probes=not args.no_probes
+    )
 
-    if args.brew_only:
-        orchestrator.run_brew_only()
+    if args.profile:
+        profile_path = Path(__file__).parent / 'profiles' / f"{args.profile}.yaml"
+        if not profile_path.exists():
+            Logger.error(f"Profile not found: {profile_path}")
+            sys.exit(1)
+        # Inherited by every script so they all read the same resolved config
+        os.environ[PROFILE_ENV] = args.profile
+        Logger.info(f"Using profile: {args.profile}")
+
+    if args.offline:
+        bundle_path = Path(args.offline).expanduser().resolve()
+        if not bundle_path.is_file():
+            Logger.error(f"Bundle not found: {bundle_path}")
+            sys.exit(1)
+        # Read by every install script (see scripts/offline_bundle.py)
+        os.environ[OFFLINE_ENV] = str(bundle_path)
+
+    if args.command == "bundle":
+        orchestrator.run_bundle(args.output or "mac-bootstrap-bundle.tar.gz")
+    elif args.command == "zipapp":
+        orchestrator.run_zipapp(args.output or "mac-bootstrap.pyz")
+    elif args.rollback:
+        orchestrator.run_rollback(args.rollback)
+    elif args.brew_only:
+        orchestrator.run_brew_only(steps)
     elif args.config_only:
-        orchestrator.run_config_only()
+        orchestrator.run_config_only(steps)
     elif args.dotfiles_only:
         orchestrator.run_dotfiles_only()
+    elif args.upgrade:
+        orchestrator.run_upgrade(steps)
+    elif args.watch:
+        orchestrator.run_watch(remediate=args.remediate)
+    elif args.only or args.tags:
+        orchestrator.run_partial(steps)
     else:
-        orchestrator.run_full_setup()
+        orchestrator.run_full_setup(steps)
+
+    Logger.info(f"Logs: {orchestrator.log_dir}")
+    if orchestrator.failed_steps:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""
+macOS tool simulator
+
+Runs the setup off a Mac: a Simulator is a temporary directory holding a
+home directory, an Applications folder for casks and a bin directory of
+stateful fake `brew`, `defaults`, `dockutil`, `killall`, `git`, `chsh`
+(and the few other tools the scripts call; see tools.py). Putting the bin
+directory first on PATH lets setup.py and every script run unmodified
+against the simulated machine:
+
+    sim = Simulator(latency={'default': 0.01, 'brew install': 0.2})
+    subprocess.run([sys.executable, 'setup.py', '-n'], env=sim.env())
+    sim.state()['formulae']      # What brew installed
+    sim.calls()                  # Every tool call, tagged with its setup step
+    sim.release('git', '2.0.0')  # brew outdated now lists git
+
+Nothing outside the simulator directory is touched: HOME, the state
+directory (~/.cache/mac-bootstrap), casks' --appdir and the Homebrew cache
+all live inside it. `python -m simulator` runs the end-to-end performance
+harness (see __main__.py).
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from . import tools
+from .tools import SIM_DIR_ENV, TOOLS
+
+SHIM_TEMPLATE = '''#!{python}
+import sys
+sys.path.insert(0, {package_parent!r})
+from simulator.tools import main
+sys.exit(main({tool!r}, sys.argv[1:]))
+'''
+
+
+class Simulator:
+    """A simulated Mac in a temporary directory"""
+
+    def __init__(self, latency=None, root=None, network=True):
+        """
+        Args:
+            latency: Seconds each call sleeps: {"default": s, "brew": s, "brew install": s, ...}
+            root: Directory to use instead of a new temporary one
+            network: False to make every download fail (see tools.py)
+        """
+        self.root = Path(root or tempfile.mkdtemp(prefix='mac-bootstrap-sim-'))
+        self.home = self.root / 'home'
+        self.bin = self.root / 'bin'
+        self.applications = self.root / 'Applications'
+        for directory in (self.home, self.bin, self.applications):
+            directory.mkdir(parents=True, exist_ok=True)
+        with open(self.root / 'sim.json', 'w') as f:
+            json.dump({'latency': latency or {}, 'network': network}, f)
+        self._write_shims()
+
+    def _write_shims(self):
+        package_parent = str(Path(__file__).resolve().parent.parent)
+        for tool in TOOLS:
+            shim = self.bin / tool
+            shim.write_text(SHIM_TEMPLATE.format(python=sys.executable, package_parent=package_parent, tool=tool))
+            shim.chmod(0o755)
+
+    def env(self, base=None):
+        """Environment for processes that should see the simulated Mac"""
+        env = dict(os.environ if base is None else base)
+        env.update({
+            SIM_DIR_ENV: str(self.root),
+            'HOME': str(self.home),
+            'PATH': f"{self.bin}{os.pathsep}{env.get('PATH', '')}",
+            'HOMEBREW_CASK_OPTS': f"--appdir={self.applications}",
+            'SHELL': '/bin/bash',
+            'USER': env.get('USER') or 'user',
+            'PYTHONDONTWRITEBYTECODE': '1',
+        })
+        return env
+
+    def state(self):
+        """The simulated machine: installed formulae and casks, preferences, login shells"""
+        try:
+            with open(self.root / 'state.json') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def release(self, name, version):
+        """Publish a new version of a formula or cask: `brew outdated` lists it once installed"""
+        with tools.state(self.root) as data:
+            data['latest'][name] = version
+
+    def calls(self):
+        """Every tool call so far (dicts with tool, args, step, seconds, returncode)"""
+        try:
+            with open(self.root / 'calls.jsonl') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except OSError:
+            return []
+
+    def reset_calls(self):
+        """Forget the recorded calls (e.g. between runs)"""
+        try:
+            (self.root / 'calls.jsonl').unlink()
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,273 @@
+"""
+End-to-end performance harness
+
+Runs setup.py unmodified against a fresh Simulator, then once more on the
+now set-up machine (what every later `./setup.py` is), and reports per
+phase and step:
+
+- correctness: setup.py exits 0, check_drift.py finds no drift (packages,
+  preferences, Dock, dotfiles), Oh My Zsh and NvChad are in place and the
+  login shell is zsh
+- performance: wall time (from the run's timing database) and tool calls,
+  i.e. subprocesses of the simulated tools (from the simulator's call log)
+
+With --save-baseline the measurements are written to a JSON file; with
+--baseline they are compared against one. A step that makes more tool calls
+than in the baseline is a regression, and so is a step (or a whole phase)
+slower than its baseline by more than --tolerance and by more than --slack
+seconds or --slack-ratio times its baseline, whichever is larger (so steps
+of a few milliseconds do not flap). Wall times depend on the machine:
+record the baseline where it is checked. Exits 1 on a failed check or a
+regression.
+
+Usage:
+    python -m simulator                                    # Run and report
+    python -m simulator --latency 0.01 --latency "brew install=0.2"
+    python -m simulator --save-baseline baseline.json
+    python -m simulator --baseline baseline.json --tolerance 0.5
+    python -m simulator --profile data -- --skip prewarm_caches
+                                                           # Extra setup.py arguments after --
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from . import Simulator
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
+from logs import Logger
+from timings import TimingDB, format_duration
+
+PHASES = ('fresh', 'rerun')
+SETUP_ARGS = ['--non-interactive', '--on-failure', 'continue', '--log-format', 'plain']
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_SLACK = 1.0
+DEFAULT_SLACK_RATIO = 0.0
+TOP_TOOLS = 3
+
+
+def parse_latency(values):
+    """Turn ["0.01", "brew install=0.2"] into {"default": 0.01, "brew install": 0.2}"""
+    latency = {}
+    for value in values or []:
+        key, _, seconds = value.rpartition('=')
+        latency[key.strip() or 'default'] = float(seconds)
+    return latency
+
+
+def run_setup(sim, setup_args, log_path):
+    """Run setup.py in the simulator; returns (exit status, wall seconds)"""
+    start = time.monotonic()
+    with open(log_path, 'w') as log:
+        returncode = subprocess.run(
+            [sys.executable, str(PROJECT_ROOT / 'setup.py'), *SETUP_ARGS, *setup_args],
+            env=sim.env(), stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            cwd=PROJECT_ROOT).returncode
+    return returncode, time.monotonic() - start
+
+
+def measure(sim):
+    """Per-step wall time and tool calls of the last run in the simulator"""
+    db = TimingDB(sim.home / '.cache' / 'mac-bootstrap' / 'timings.db')
+    runs = db.run_stats(limit=1)
+    steps = {}
+    for step, seconds, ok in (db.run_steps(runs[0][0]) if runs else []):
+        steps[step] = {'seconds': round(seconds, 3), 'ok': bool(ok), 'calls': 0, 'tools': {}}
+    for step, tools in _calls_by_step(sim.calls()).items():
+        entry = steps.setdefault(step, {'seconds': None, 'ok': True, 'calls': 0, 'tools': {}})
+        entry['calls'] = sum(tools.values())
+        entry['tools'] = dict(tools.most_common())
+    return steps
+
+
+def _calls_by_step(calls):
+    by_step = {}
+    for call in calls:
+        by_step.setdefault(call['step'], Counter())[call['tool']] += 1
+    return by_step
+
+
+def check_drift(sim, profile):
+    """Run check_drift.py in the simulator; returns the drifted items"""
+    env = sim.env()
+    if profile:
+        env['MAC_BOOTSTRAP_PROFILE'] = profile
+    result = subprocess.run([sys.executable, str(PROJECT_ROOT / 'scripts' / 'check_drift.py')],
+                            env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    # The report is the indented JSON document after the log lines
+    start = result.stdout.find('\n{')
+    try:
+        return json.loads(result.stdout[start + 1:] if start >= 0 else result.stdout).get('drift', [])
+    except ValueError:
+        return [{'item': 'check_drift.py', 'expected': 'a report', 'actual': result.stdout[-500:]}]
+
+
+def zsh_is_login_shell():
+    """Whether the privileged helper may set zsh here (it only allows shells in /etc/shells)"""
+    try:
+        with open('/etc/shells') as f:
+            return '/bin/zsh' in {line.strip() for line in f}
+    except OSError:
+        return True
+
+
+def verify(sim, returncode, profile):
+    """
+    Check the simulated machine after a run
+
+    Returns:
+        list: (check, status, detail) tuples; status is ok, failed or skipped
+    """
+    checks = [('setup.py exit status', 'ok' if returncode == 0 else 'failed', str(returncode))]
+
+    drift = check_drift(sim, profile)
+    checks.append(('no drift from config', 'failed' if drift else 'ok',
+                   '; '.join(f"{item.get('item')}: {item.get('actual')!r}" for item in drift[:5])))
+
+    for label, path in (('Oh My Zsh installed', sim.home / '.oh-my-zsh'),
+                        ('NvChad installed', sim.home / '.config' / 'nvim')):
+        checks.append((label, 'ok' if path.exists() else 'failed', str(path)))
+
+    shell = sim.state().get('shells', {}).get(sim.env()['USER'])
+    if zsh_is_login_shell():
+        checks.append(('login shell is zsh', 'ok' if shell == '/bin/zsh' else 'failed', str(shell)))
+    else:
+        checks.append(('login shell is zsh', 'skipped', "/bin/zsh is not in this host's /etc/shells"))
+    return checks
+
+
+def slower(seconds, base, tolerance, slack, slack_ratio=DEFAULT_SLACK_RATIO):
+    """Whether a wall time exceeds its baseline by more than the tolerance and the slack"""
+    if seconds is None or base is None:
+        return False
+    return seconds > base * (1 + tolerance) and seconds - base > max(slack, slack_ratio * base)
+
+
+def compare(phases, baseline, tolerance, slack, slack_ratio=DEFAULT_SLACK_RATIO):
+    """
+    Find phases and steps that got slower, and steps that make more tool
+    calls, than in the baseline
+
+    Args:
+        tolerance: Allowed slowdown as a fraction of the baseline
+        slack: Slowdowns of at most this many seconds are ignored...
+        slack_ratio: ...or of at most this many times the baseline, if more
+
+    Returns:
+        list: Regression descriptions
+    """
+    regressions = []
+    for phase, result in phases.items():
+        base_phase = baseline.get('phases', {}).get(phase) or {}
+        if slower(result['seconds'], base_phase.get('seconds'), tolerance, slack, slack_ratio):
+            regressions.append(f"{phase}: {result['seconds']:.2f}s wall (baseline {base_phase['seconds']:.2f}s)")
+        base_steps = base_phase.get('steps', {})
+        for step, entry in result['steps'].items():
+            base = base_steps.get(step)
+            if base is None:
+                continue
+            if entry['calls'] > base['calls']:
+                regressions.append(f"{phase}/{step}: {entry['calls']} tool calls (baseline {base['calls']})")
+            if slower(entry['seconds'], base.get('seconds'), tolerance, slack, slack_ratio):
+                regressions.append(f"{phase}/{step}: {entry['seconds']:.2f}s (baseline {base['seconds']:.2f}s)")
+    return regressions
+
+
+def print_phase(phase, result):
+    steps = result['steps']
+    Logger.output(f"Phase {phase}: {format_duration(result['seconds'])} wall, "
+                  f"{sum(entry['calls'] for entry in steps.values())} tool calls")
+    Logger.output(f"  {'Step':<20} {'Seconds':>8} {'Calls':>6}  Tools")
+    for step, entry in steps.items():
+        seconds = '-' if entry['seconds'] is None else f"{entry['seconds']:.2f}"
+        tools = ', '.join(f"{tool} {count}" for tool, count in list(entry['tools'].items())[:TOP_TOOLS])
+        flag = '' if entry['ok'] else '  (failed)'
+        Logger.output(f"  {step:<20} {seconds:>8} {entry['calls']:>6}  {tools}{flag}")
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(prog="python -m simulator",
+                                     description="Run setup.py end-to-end against simulated macOS tools")
+    parser.add_argument("--latency", action="append", metavar="[TOOL [SUBCOMMAND]=]SECONDS",
+                        help="Delay of simulated calls, e.g. 0.01 or 'brew install=0.2' (repeatable)")
+    parser.add_argument("--profile", help="Configuration profile to run with")
+    parser.add_argument("--runs", type=int, choices=[1, 2], default=2,
+                        help="1: fresh machine only; 2: also re-run on the set-up machine (default)")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against a saved baseline")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write the measurements as a baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown per step as a fraction (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--slack", type=float, default=DEFAULT_SLACK,
+                        help=f"Slowdowns below this many seconds are ignored (default: {DEFAULT_SLACK})")
+    parser.add_argument("--slack-ratio", type=float, default=DEFAULT_SLACK_RATIO,
+                        help="Slowdowns below this many times the baseline are ignored, "
+                             f"if more than --slack (default: {DEFAULT_SLACK_RATIO})")
+    parser.add_argument("--keep", action="store_true", help="Keep the simulator directory for inspection")
+    parser.add_argument("setup_args", nargs="*", help="Extra setup.py arguments (after --)")
+    args = parser.parse_args()
+
+    latency = parse_latency(args.latency)
+    setup_args = list(args.setup_args) + (["--profile", args.profile] if args.profile else [])
+    sim = Simulator(latency=latency)
+    Logger.info(f"Simulator: {sim.root}")
+
+    failed = False
+    phases = {}
+    try:
+        for phase in PHASES[:args.runs]:
+            sim.reset_calls()
+            Logger.info(f"Running setup.py ({phase})...")
+            returncode, seconds = run_setup(sim, setup_args, sim.root / f"setup-{phase}.log")
+            phases[phase] = {'seconds': round(seconds, 3), 'steps': measure(sim)}
+            print_phase(phase, phases[phase])
+            for check, status, detail in verify(sim, returncode, args.profile):
+                line = f"  {check}: {status}" + (f" ({detail})" if detail and status != 'ok' else '')
+                if status == 'failed':
+                    failed = True
+                    Logger.error(line)
+                elif status == 'skipped':
+                    Logger.warning(line)
+                else:
+                    Logger.success(line)
+            if returncode != 0:
+                Logger.info(f"setup.py output: {sim.root / f'setup-{phase}.log'}")
+            Logger.output()
+    finally:
+        if not args.keep and not failed:
+            sim.cleanup()
+        else:
+            Logger.info(f"Simulator kept: {sim.root}")
+
+    result = {'latency': latency, 'setup_args': setup_args, 'phases': phases}
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+            f.write('\n')
+        Logger.success(f"Baseline saved: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('latency') != latency or baseline.get('setup_args') != setup_args:
+            Logger.warning("Baseline was recorded with other --latency or setup arguments")
+        regressions = compare(phases, baseline, args.tolerance, args.slack, args.slack_ratio)
+        for regression in regressions:
+            Logger.error(f"Regression: {regression}")
+        if regressions:
+            failed = True
+        else:
+            Logger.success(f"No regressions against {args.baseline}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,594 @@
+"""
+Fake macOS tools
+
+Each fake keeps its state in <sim dir>/state.json (guarded by a file lock,
+since install_packages.py runs `brew fetch` in parallel) and appends one
+line per call to <sim dir>/calls.jsonl: the tool, its arguments, the setup
+step that ran it (MAC_BOOTSTRAP_STEP), its duration and exit status.
+Before doing anything a call sleeps for its configured latency. A
+simulator created with network=False has no network: downloads fail unless
+Homebrew's cache ($HOMEBREW_CACHE, e.g. an offline bundle's) already holds them.
+
+The fakes cover what the scripts use:
+
+- brew:      info --json=v2, list, install, fetch, tap, update, outdated,
+             upgrade, cleanup, autoremove, --cache, --prefix, --version
+- defaults:  read, write, delete, export, import (-currentHost too)
+- dockutil:  --list, --add, --remove; kept in com.apple.dock
+             persistent-apps like the real tool, so check_drift.py sees it
+- killall, chsh, nvim
+- git:       clones of remote URLs come from a real stand-in repository
+             (so `bundle create` works); pull, fetch and maintenance are
+             simulated, everything else runs the real git
+- curl:      serves stand-in installer scripts
+- sudo:      runs the command as the current user
+- which:     the real which, counted like the fakes
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import plistlib
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+SIM_DIR_ENV = 'MAC_BOOTSTRAP_SIM_DIR'
+STEP_ENV = 'MAC_BOOTSTRAP_STEP'  # Same as logs.STEP_ENV
+ORCHESTRATOR_STEP = '(setup)'
+
+DEFAULT_VERSION = '1.0.0'
+
+# Formula dependency graph modelled on Homebrew's (name -> dependencies).
+# Brew only knows the formulae listed here (or as a dependency) and the casks
+# in CASKS: add new packages from config.yaml or a profile to them.
+FORMULA_DEPENDENCIES = {
+    '1password-cli': [],
+    'apache-spark': ['openjdk@17'],
+    'dockutil': [],
+    'duckdb': [],
+    'fzf': [],
+    'gh': [],
+    'helm': [],
+    'kubectl': [],
+    'postgresql@16': ['icu4c', 'krb5', 'lz4', 'openssl@3', 'readline', 'zstd'],
+    'redis': ['openssl@3'],
+    'terraform': [],
+    'git': ['gettext', 'pcre2'],
+    'go': [],
+    'node': ['brotli', 'c-ares', 'icu4c', 'libnghttp2', 'libuv', 'openssl@3'],
+    'python@3.12': ['mpdecimal', 'openssl@3', 'sqlite', 'xz'],
+    'neovim': ['gettext', 'libuv', 'lpeg', 'luajit', 'luv', 'tree-sitter', 'unibilium', 'utf8proc'],
+    'tmux': ['libevent', 'ncurses', 'utf8proc'],
+    'wget': ['libidn2', 'openssl@3'],
+    'jq': ['oniguruma'],
+    'bat': ['libgit2', 'oniguruma'],
+    'eza': ['libgit2'],
+    'ripgrep': ['pcre2'],
+    'libgit2': ['libssh2', 'openssl@3'],
+    'libssh2': ['openssl@3'],
+    'openssl@3': ['ca-certificates'],
+    'libidn2': ['libunistring'],
+    'gettext': ['libunistring'],
+}
+FORMULA_ALIASES = {
+    'go': ['golang'],
+    'python@3.12': ['python', 'python3'],
+}
+CASKS = {
+    '1password', 'anydesk', 'appcleaner', 'balenaetcher', 'bruno', 'cyberduck', 'dbeaver-community',
+    'discord', 'docker', 'figma', 'font-jetbrains-mono-nerd-font', 'google-drive', 'handbrake',
+    'iterm2', 'jagex-launcher', 'jetbrains-toolbox', 'keka', 'runelite', 'slack', 'steam',
+    'sublime-text', 'veracrypt', 'visual-studio-code', 'vlc', 'wireshark',
+}
+# Casks whose display or bundle name differs from the token
+CASK_APPS = {
+    'iterm2': ('iTerm2', 'iTerm.app'),
+    '1password': ('1Password', '1Password.app'),
+    'visual-studio-code': ('Visual Studio Code', 'Visual Studio Code.app'),
+    'jetbrains-toolbox': ('JetBrains Toolbox', 'JetBrains Toolbox.app'),
+}
+
+STAND_IN_INSTALLERS = {
+    'ohmyzsh': '''#!/bin/sh
+mkdir -p "$HOME/.oh-my-zsh/custom/plugins" "$HOME/.oh-my-zsh/custom/themes"
+echo "# oh-my-zsh (simulated)" > "$HOME/.oh-my-zsh/oh-my-zsh.sh"
+echo 'export ZSH="$HOME/.oh-my-zsh"' > "$HOME/.zshrc"
+''',
+    'Homebrew': '#!/bin/sh\necho "Homebrew is already installed (simulated)"\n',
+}
+
+
+def sim_dir():
+    return Path(os.environ[SIM_DIR_ENV])
+
+
+def sim_config():
+    try:
+        with open(sim_dir() / 'sim.json') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def network_available():
+    return sim_config().get('network', True)
+
+
+def offline_error(host):
+    print(f"curl: (6) Could not resolve host: {host} (simulated: no network)", file=sys.stderr)
+    return 6
+
+
+def latency(tool, args):
+    """Seconds a call sleeps: "tool subcommand", then "tool", then the default"""
+    table = sim_config().get('latency') or {}
+    subcommand = next((arg for arg in args if not arg.startswith('-')), '')
+    for key in (f"{tool} {subcommand}", tool):
+        if key in table:
+            return float(table[key])
+    return float(table.get('default', 0.0))
+
+
+@contextmanager
+def state(root=None):
+    """Locked read-modify-write access to the simulated machine"""
+    root = Path(root) if root else sim_dir()
+    path = root / 'state.json'
+    with open(root / 'state.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        for key in ('formulae', 'casks', 'defaults', 'shells', 'killed', 'taps', 'latest'):
+            data.setdefault(key, {})
+        yield data
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+
+def record_call(tool, args, seconds, returncode):
+    entry = {'tool': tool, 'args': args, 'step': os.environ.get(STEP_ENV) or ORCHESTRATOR_STEP,
+             'seconds': round(seconds, 4), 'returncode': returncode}
+    # One write per line in append mode: concurrent calls do not interleave
+    fd = os.open(sim_dir() / 'calls.jsonl', os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps(entry) + '\n').encode())
+    finally:
+        os.close(fd)
+
+
+def real_tool(name):
+    """The tool of that name found on PATH after the simulator's bin directory"""
+    bin_dir = str(sim_dir() / 'bin')
+    path = os.pathsep.join(p for p in os.environ.get('PATH', '').split(os.pathsep) if p != bin_dir)
+    return shutil.which(name, path=path)
+
+
+def run_real(name, args):
+    """Run the real tool of that name"""
+    real = real_tool(name)
+    if not real:
+        print(f"{name}: not found outside the simulator", file=sys.stderr)
+        return 127
+    return subprocess.run([real, *args]).returncode
+
+
+# --- brew -------------------------------------------------------------------
+
+def short_name(name):
+    return name.rsplit('/', 1)[-1]
+
+
+KNOWN_FORMULAE = set(FORMULA_DEPENDENCIES).union(*FORMULA_DEPENDENCIES.values())
+
+
+def resolve_formula(name):
+    name = short_name(name)
+    for canonical, aliases in FORMULA_ALIASES.items():
+        if name in aliases:
+            return canonical
+    return name
+
+
+def latest_version(name, data):
+    """Newest published version of a formula or cask (see Simulator.release)"""
+    return data['latest'].get(name, DEFAULT_VERSION)
+
+
+def unknown_package(names, cask):
+    """Report the first name brew does not know like brew does; True if there was one"""
+    for name in names:
+        if cask and short_name(name) not in CASKS:
+            print(f"Error: Cask '{short_name(name)}' is unavailable: No Cask with this name exists.",
+                  file=sys.stderr)
+            return True
+        if not cask and resolve_formula(name) not in KNOWN_FORMULAE:
+            print(f'Error: No available formula with the name "{name}".', file=sys.stderr)
+            return True
+    return False
+
+
+def formula_entry(name, data):
+    version = data['formulae'].get(name)
+    return {
+        'name': name, 'full_name': name,
+        'aliases': FORMULA_ALIASES.get(name, []), 'oldnames': [],
+        'dependencies': FORMULA_DEPENDENCIES.get(name, []),
+        'versions': {'stable': latest_version(name, data)},
+        'installed': [{'version': version}] if version else [],
+    }
+
+
+def cask_appdir():
+    options = shlex.split(os.environ.get('HOMEBREW_CASK_OPTS', ''))
+    for i, option in enumerate(options):
+        if option.startswith('--appdir='):
+            return Path(option.split('=', 1)[1]).expanduser()
+        if option == '--appdir' and i + 1 < len(options):
+            return Path(options[i + 1]).expanduser()
+    return Path('/Applications')
+
+
+def cask_app(token):
+    """(display name, app bundle) of a cask; fonts install no app"""
+    if token.startswith('font-'):
+        return token, None
+    if token in CASK_APPS:
+        return CASK_APPS[token]
+    name = ' '.join(word.capitalize() for word in token.split('-'))
+    return name, f"{name}.app"
+
+
+def cask_entry(token, data):
+    name, app = cask_app(token)
+    return {
+        'token': token, 'full_token': token, 'old_tokens': [], 'name': [name],
+        'version': latest_version(token, data), 'installed': data['casks'].get(token),
+        'artifacts': [{'app': [app]}] if app else [{'font': [f"{token}.ttf"]}],
+    }
+
+
+def brew_cache():
+    return Path(os.environ.get('HOMEBREW_CACHE') or sim_dir() / 'brew-cache')
+
+
+def download(name, data):
+    """Cached bottle or cask payload of a package (None if it cannot be downloaded)"""
+    path = brew_cache() / f"{short_name(name)}--{latest_version(short_name(name), data)}.tar.gz"
+    if not path.exists():
+        if not network_available():
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'\0' * 4096)
+    return path
+
+
+def formula_closure(name, skip=()):
+    """A formula and its dependencies (minus those in skip), dependencies first"""
+    name = resolve_formula(name)
+    closure = []
+    for dep in FORMULA_DEPENDENCIES.get(name, []):
+        if dep not in skip:
+            closure += [formula for formula in formula_closure(dep, skip) if formula not in closure]
+    return closure + [name]
+
+
+def install_formula(name, data):
+    """Pour a formula and its missing dependencies"""
+    for formula in formula_closure(name, data['formulae']):
+        data['formulae'][formula] = latest_version(formula, data)
+
+
+def install_cask(token, data):
+    token = short_name(token)
+    _, app = cask_app(token)
+    if app:
+        bundle = cask_appdir() / app
+        (bundle / 'Contents').mkdir(parents=True, exist_ok=True)
+        (bundle / 'Contents' / 'Info.plist').write_bytes(plistlib.dumps({'CFBundleName': app[:-4]}))
+    data['casks'][token] = latest_version(token, data)
+
+
+def outdated_entries(table, data):
+    """`brew outdated --json=v2` entries for installed packages behind their latest version"""
+    return [{'name': name, 'installed_versions': [version], 'current_version': latest_version(name, data)}
+            for name, version in sorted(data[table].items()) if version != latest_version(name, data)]
+
+
+def brew(args):
+    cask = '--cask' in args
+    names = [arg for arg in args[1:] if not arg.startswith('-')]
+    command = args[0] if args else ''
+    cache = brew_cache()
+
+    if command == '--version':
+        print("Homebrew 4.3.0 (simulated)")
+    elif command == '--prefix':
+        print(sim_dir() / 'homebrew')
+    elif command == '--cache':
+        print(cache)
+    elif command == 'update':
+        if not network_available():
+            return offline_error('github.com')
+        print("Already up-to-date.")
+    elif command == 'autoremove':
+        pass
+    elif command == 'tap':
+        with state() as data:
+            for name in names:
+                data['taps'][name] = True
+    elif command == 'info':
+        if '--installed' not in args and unknown_package(names, cask):
+            return 1
+        with state() as data:
+            if '--installed' in args:
+                output = {'formulae': [formula_entry(name, data) for name in sorted(data['formulae'])],
+                          'casks': [cask_entry(token, data) for token in sorted(data['casks'])]}
+            elif cask:
+                output = {'formulae': [], 'casks': [cask_entry(short_name(name), data) for name in names]}
+            else:
+                output = {'formulae': [formula_entry(resolve_formula(name), data) for name in names],
+                          'casks': []}
+        print(json.dumps(output))
+    elif command == 'list':
+        with state() as data:
+            installed = data['casks'] if cask else data['formulae']
+            if not names:
+                print('\n'.join(sorted(installed)))
+                return 0
+            resolve = short_name if cask else resolve_formula
+            missing = [name for name in names if resolve(name) not in installed]
+            for name in missing:
+                print(f"Error: No such keg: {name}", file=sys.stderr)
+            return 1 if missing else 0
+    elif command == 'fetch':
+        if unknown_package(names, cask):
+            return 1
+        with state() as data:
+            if '--deps' in args and not cask:
+                names = list(dict.fromkeys(formula for name in names for formula in formula_closure(name)))
+            for name in names:
+                if download(name, data) is None:
+                    return offline_error('ghcr.io')
+                print(f"==> Fetching {name}")
+    elif command == 'install':
+        if unknown_package(names, cask):
+            return 1
+        with state() as data:
+            needed = names if cask else [formula for name in names
+                                         for formula in formula_closure(name, data['formulae'])]
+            for name in needed:
+                if download(name, data) is None:
+                    print(f"Error: {name}: Failed to download resource", file=sys.stderr)
+                    return offline_error('ghcr.io')
+            for name in names:
+                print(f"==> Installing {name}")
+                if cask:
+                    install_cask(name, data)
+                else:
+                    install_formula(name, data)
+    elif command == 'outdated':
+        with state() as data:
+            output = {'formulae': [] if cask else outdated_entries('formulae', data),
+                      'casks': outdated_entries('casks', data) if cask or '--formula' not in args else []}
+        print(json.dumps(output))
+    elif command == 'upgrade':
+        with state() as data:
+            if not names:
+                names = [entry['name'] for entry in outdated_entries('formulae', data) + outdated_entries('casks', data)]
+            for name in names:
+                name = short_name(name) if short_name(name) in data['casks'] else resolve_formula(name)
+                table = data['casks'] if name in data['casks'] else data['formulae']
+                if name not in table:
+                    print(f"Error: {name} not installed", file=sys.stderr)
+                    return 1
+                print(f"==> Upgrading {name} {table[name]} -> {latest_version(name, data)}")
+                table[name] = latest_version(name, data)
+    elif command == 'cleanup':
+        shutil.rmtree(cache, ignore_errors=True)
+    else:
+        print(f"Error: Unknown command: {command} (not simulated)", file=sys.stderr)
+        return 1
+    return 0
+
+
+# --- defaults and dockutil --------------------------------------------------
+
+DEFAULTS_TYPES = {
+    '-string': str, '-int': int, '-integer': int, '-float': float,
+    '-bool': lambda v: v.lower() in ('true', 'yes', '1'),
+    '-boolean': lambda v: v.lower() in ('true', 'yes', '1'),
+}
+
+
+def defaults(args):
+    current_host = '-currentHost' in args
+    args = [arg for arg in args if arg != '-currentHost']
+    if len(args) < 2:
+        print("Usage: defaults [-currentHost] <command> <domain> ...", file=sys.stderr)
+        return 1
+    command, domain, rest = args[0], args[1], args[2:]
+    if current_host:
+        domain = f"currentHost/{domain}"
+
+    with state() as data:
+        prefs = data['defaults'].setdefault(domain, {})
+        if command == 'write':
+            if len(rest) == 3 and rest[1] in DEFAULTS_TYPES:
+                prefs[rest[0]] = DEFAULTS_TYPES[rest[1]](rest[2])
+            elif len(rest) == 2:
+                prefs[rest[0]] = rest[1]
+            else:
+                print(f"defaults: unsupported write: {rest}", file=sys.stderr)
+                return 1
+        elif command == 'read':
+            if rest and rest[0] not in prefs:
+                print(f"The domain/default pair of ({domain}, {rest[0]}) does not exist", file=sys.stderr)
+                return 1
+            value = prefs[rest[0]] if rest else prefs
+            print(int(value) if isinstance(value, bool) else value)
+        elif command == 'delete':
+            if rest:
+                prefs.pop(rest[0], None)
+            else:
+                data['defaults'].pop(domain, None)
+        elif command == 'export':
+            sys.stdout.write(plistlib.dumps(prefs).decode())
+        elif command == 'import':
+            data['defaults'][domain] = plistlib.loads(sys.stdin.buffer.read())
+        else:
+            print(f"defaults: unsupported command: {command}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def _dock_tile(path):
+    return {'tile-data': {'file-label': Path(path).stem,
+                          'file-data': {'_CFURLString': f"file://{path.rstrip('/')}/", '_CFURLStringType': 15}}}
+
+
+def dockutil(args):
+    with state() as data:
+        dock = data['defaults'].setdefault('com.apple.dock', {})
+        apps = dock.setdefault('persistent-apps', [])
+        if '--list' in args:
+            for tile in apps:
+                info = tile['tile-data']
+                print(f"{info['file-label']}\t{info['file-data']['_CFURLString']}\tpersistentApps")
+        elif '--remove' in args:
+            target = args[args.index('--remove') + 1]
+            dock['persistent-apps'] = [] if target == 'all' else \
+                [tile for tile in apps if tile['tile-data']['file-label'] != target]
+        elif '--add' in args:
+            path = args[args.index('--add') + 1]
+            if not Path(path).exists():
+                print(f"{path} does not seem to be a home directory or a directory", file=sys.stderr)
+                return 1
+            apps.append(_dock_tile(path))
+        else:
+            print("dockutil: unsupported arguments", file=sys.stderr)
+            return 1
+    return 0
+
+
+# --- everything else ----------------------------------------------------------
+
+def killall(args):
+    with state() as data:
+        for process in args:
+            data['killed'][process] = data['killed'].get(process, 0) + 1
+    return 0
+
+
+def chsh(args):
+    if '-s' not in args:
+        print("chsh: only -s is simulated", file=sys.stderr)
+        return 1
+    rest = args[args.index('-s') + 1:]
+    with state() as data:
+        user = rest[1] if len(rest) > 1 else os.environ.get('USER', 'user')
+        data['shells'][user] = rest[0]
+    return 0
+
+
+def nvim(args):
+    return 0
+
+
+def is_remote(source):
+    return '://' in source or source.startswith('git@')
+
+
+def upstream_repo(url):
+    """A real repository standing in for a remote one (created on first use)"""
+    name = url.rstrip('/').rsplit('/', 1)[-1].removesuffix('.git')
+    repo = sim_dir() / 'remotes' / f"{hashlib.sha1(url.encode()).hexdigest()[:12]}-{name}"
+    git = real_tool('git')
+    with open(sim_dir() / 'remotes.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not (repo / '.git').exists():
+            repo.mkdir(parents=True, exist_ok=True)
+            (repo / 'README.md').write_text(f"Simulated clone of {url}\n")
+            for command in (['init', '--quiet'], ['add', 'README.md'],
+                            ['-c', 'user.name=Simulator', '-c', 'user.email=sim@localhost',
+                             'commit', '--quiet', '-m', 'Initial commit']):
+                subprocess.run([git, '-C', str(repo), *command], check=True, capture_output=True)
+    return repo
+
+
+def git(args):
+    position = [arg for arg in args if not arg.startswith('-')]
+    if args[:1] == ['-C']:
+        position = [arg for arg in args[2:] if not arg.startswith('-')]
+    command = position[0] if position else ''
+    if command == 'clone' and len(position) > 1 and is_remote(position[1]):
+        url = position[1]
+        if not network_available():
+            print(f"fatal: unable to access '{url}': Could not resolve host (simulated: no network)",
+                  file=sys.stderr)
+            return 128
+        dest = position[2] if len(position) > 2 else url.rstrip('/').rsplit('/', 1)[-1].removesuffix('.git')
+        returncode = run_real('git', [str(upstream_repo(url)) if arg == url else arg for arg in args])
+        if returncode == 0:
+            returncode = run_real('git', ['-C', dest, 'remote', 'set-url', 'origin', url])
+        return returncode
+    if command in ('pull', 'fetch'):
+        return 0 if network_available() else 128
+    if command == 'maintenance':
+        return 0
+    return run_real('git', args)
+
+
+def curl(args):
+    url = next((arg for arg in reversed(args) if '://' in arg), '')
+    if not network_available():
+        return offline_error(url.split('/')[2] if url.count('/') >= 2 else url)
+    body = next((script for key, script in STAND_IN_INSTALLERS.items() if key in url), '')
+    if '-o' in args:
+        Path(args[args.index('-o') + 1]).write_text(body)
+    else:
+        sys.stdout.write(body)
+    return 0
+
+
+def sudo(args):
+    while args and args[0].startswith('-'):
+        option = args.pop(0)
+        if option in ('-v', '-k', '-K'):
+            return 0
+        if option in ('-u', '-g') and args:
+            args.pop(0)
+    if not args:
+        return 0
+    return subprocess.run(args).returncode
+
+
+TOOLS = {
+    'brew': brew, 'defaults': defaults, 'dockutil': dockutil, 'killall': killall,
+    'chsh': chsh, 'nvim': nvim, 'git': git, 'curl': curl, 'sudo': sudo,
+    'which': lambda args: run_real('which', args),
+}
+
+
+def main(tool, args):
+    """Entry point of the shims in <sim dir>/bin; returns the exit status"""
+    start = time.monotonic()
+    time.sleep(latency(tool, args))
+    returncode = 1
+    try:
+        returncode = TOOLS[tool](list(args)) or 0
+    finally:
+        sys.stdout.flush()
+        record_call(tool, args, time.monotonic() - start, returncode)
+    return returncode
@@ -0,0 +1,19 @@
+"""Shared fixtures: make the scripts importable and keep state out of the real HOME"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def home_env(tmp_path):
+    """Environment for subprocesses with HOME in a temporary directory"""
+    home = tmp_path / 'home'
+    home.mkdir()
+    return {**os.environ, 'HOME': str(home), 'PYTHONDONTWRITEBYTECODE': '1'}
@@ -0,0 +1,109 @@
+"""The install planner on canned `brew info --json=v2` output"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+import brew_plan
+from brew_plan import FormulaIndex, brew_info, canned_query, plan_casks, plan_formulae, plan_installs
+from simulator import Simulator
+from simulator.__main__ import PROJECT_ROOT
+
+
+def formula(name, deps=(), installed=False, aliases=()):
+    return {'name': name, 'full_name': name, 'aliases': list(aliases), 'oldnames': [],
+            'dependencies': list(deps), 'installed': [{'version': '1.0'}] if installed else []}
+
+
+# bat and eza share libgit2 (and its missing dependencies); openssl@3 is installed
+FORMULAE = [
+    formula('bat', ['libgit2', 'oniguruma']),
+    formula('eza', ['libgit2']),
+    formula('libgit2', ['libssh2', 'openssl@3']),
+    formula('libssh2', ['openssl@3']),
+    formula('openssl@3', installed=True),
+    formula('oniguruma'),
+    formula('go', aliases=['golang']),
+    formula('jq', ['oniguruma'], installed=True),
+]
+
+CASKS = [
+    {'token': 'iterm2', 'full_token': 'iterm2', 'old_tokens': [], 'installed': '3.5'},
+    {'token': 'visual-studio-code', 'full_token': 'visual-studio-code', 'old_tokens': ['vscode'],
+     'installed': None},
+]
+
+
+def test_formulae_are_planned_dependencies_first():
+    plan = plan_formulae(['bat', 'eza', 'golang', 'jq', 'nope'], FormulaIndex(FORMULAE))
+    order = plan['order']
+    assert sorted(order) == ['bat', 'eza', 'golang', 'libgit2', 'libssh2', 'oniguruma']
+    assert order.index('libssh2') < order.index('libgit2') < order.index('bat')
+    assert order.index('libgit2') < order.index('eza')
+    # libgit2 is wanted by two formulae, oniguruma by one: the shared one goes first
+    assert order.index('libgit2') < order.index('oniguruma')
+    # openssl@3 is already installed: neither installed again nor a dependency to install
+    assert plan['dependencies'] == [name for name in order if name in ('libgit2', 'libssh2', 'oniguruma')]
+    assert plan['satisfied'] == ['jq']
+    assert plan['unknown'] == ['nope']
+    # bat and eza share libgit2, so they are downloaded by one worker; go is independent
+    assert sorted(sorted(group) for group in plan['groups']) == [['bat', 'eza'], ['golang']]
+
+
+def test_casks_are_split_by_old_tokens():
+    assert plan_casks(['iterm2', 'homebrew/cask/vscode', 'nope'], CASKS) == \
+        (['homebrew/cask/vscode'], ['iterm2'], ['nope'])
+
+
+def test_dependency_levels_are_queried_once_each():
+    asked = []
+    query = canned_query(FORMULAE)
+
+    def counting_query(names):
+        asked.append(sorted(names))
+        return query(names)
+
+    plan = plan_installs(['bat', 'eza'], [], formula_query=counting_query, cask_entries=[])
+    assert asked == [['bat', 'eza'], ['libgit2', 'oniguruma'], ['libssh2', 'openssl@3']]
+    assert plan['casks'] == plan['casks_unknown'] == []
+
+
+def test_unknown_names_are_dropped_and_queried_again(monkeypatch):
+    sim = Simulator()
+    try:
+        for key, value in sim.env().items():
+            monkeypatch.setenv(key, value)
+        entries = brew_info(['jq', 'nope', 'golang', 'also-nope'])
+        assert [entry['name'] for entry in entries] == ['jq', 'go']
+        assert brew_info(['nope', 'also-nope']) == []
+        casks = brew_info(['iterm2', 'not-a-cask'], cask=True)
+        assert [entry['token'] for entry in casks] == ['iterm2']
+        info_calls = [call for call in sim.calls() if call['args'][:1] == ['info']]
+        assert len(info_calls) == 3 + 2 + 2
+    finally:
+        sim.cleanup()
+
+
+def test_other_brew_failures_fail_the_query(monkeypatch):
+    monkeypatch.setattr(brew_plan, 'run_command', lambda cmd, check=True: subprocess.CompletedProcess(
+        cmd, 1, '', 'Error: Permission denied @ rb_sysopen'))
+    assert brew_info(['jq']) is None
+
+
+def test_plan_from_saved_json(tmp_path, home_env):
+    formula_json = tmp_path / 'formulae.json'
+    formula_json.write_text(json.dumps({'formulae': FORMULAE}))
+    cask_json = tmp_path / 'casks.json'
+    cask_json.write_text(json.dumps({'casks': CASKS}))
+
+    result = subprocess.run([sys.executable, str(PROJECT_ROOT / 'scripts' / 'brew_plan.py'), '--json',
+                             '--formula-json', str(formula_json), '--cask-json', str(cask_json)],
+                            env=home_env, capture_output=True, text=True, cwd=PROJECT_ROOT, check=True)
+    plan = json.loads(result.stdout)
+    # Only the formulae in the saved output are known (config.yaml lists more)
+    assert {'bat', 'eza', 'golang'} <= set(plan['order'])
+    assert plan['satisfied'] == ['jq']
+    assert 'git' in plan['unknown']
+    assert 'iterm2' in plan['casks_installed']
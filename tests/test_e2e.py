@@ -0,0 +1,128 @@
+"""
+setup.py end to end against the macOS tool simulator
+
+Runs the full setup on a fresh simulated Mac and again on the set-up one,
+then checks the result and compares each step's tool calls and wall time
+(and each phase's) with e2e_baseline.json; finally runs --upgrade after new
+versions were released. After an intended change in calls, re-record it:
+
+    python -m simulator --save-baseline tests/e2e_baseline.json
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from simulator import Simulator
+from simulator.__main__ import PHASES, compare, measure, run_setup, verify
+
+BASELINE = Path(__file__).parent / 'e2e_baseline.json'
+# Wall times vary between machines: a step (or phase) fails when it takes
+# over three times its baseline longer, and at least a second longer
+TOLERANCE = 2.0
+SLACK = 1.0
+SLACK_RATIO = 3.0
+
+
+@pytest.fixture(scope='module')
+def sim(tmp_path_factory):
+    return Simulator(root=tmp_path_factory.mktemp('sim'))
+
+
+@pytest.fixture(scope='module')
+def runs(sim):
+    """Run setup.py twice in one simulator: {phase: (exit status, checks, measurements)}"""
+    results = {}
+    for phase in PHASES:
+        sim.reset_calls()
+        returncode, seconds = run_setup(sim, [], sim.root / f"setup-{phase}.log")
+        # Measure before verifying: the drift check's own tool calls are logged too
+        steps = measure(sim)
+        results[phase] = {
+            'returncode': returncode,
+            'log': sim.root / f"setup-{phase}.log",
+            'seconds': round(seconds, 3),
+            'steps': steps,
+            'checks': verify(sim, returncode, None),
+        }
+    return results
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    with open(BASELINE) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('phase', PHASES)
+def test_setup_succeeds_without_drift(runs, phase):
+    run = runs[phase]
+    assert run['returncode'] == 0, run['log'].read_text()[-3000:]
+    failed = [(check, detail) for check, status, detail in run['checks'] if status == 'failed']
+    assert failed == []
+
+
+@pytest.mark.parametrize('phase', PHASES)
+def test_every_step_finished(runs, baseline, phase):
+    steps = runs[phase]['steps']
+    expected = set(baseline['phases'][phase]['steps'])
+    assert set(steps) == expected
+    assert [step for step, entry in steps.items() if not entry['ok']] == []
+
+
+def test_rerun_skips_finished_work(runs):
+    fresh, rerun = runs['fresh']['steps'], runs['rerun']['steps']
+    # The probes skip Homebrew and the installed shell setup entirely
+    assert 'install_homebrew' not in rerun
+    assert rerun['install_zsh']['calls'] == 0
+    assert rerun['install_packages']['calls'] < fresh['install_packages']['calls']
+    assert 'brew install' not in json.dumps(rerun['install_packages']['tools'])
+    assert sum(entry['calls'] for entry in rerun.values()) < sum(entry['calls'] for entry in fresh.values())
+
+
+@pytest.mark.parametrize('phase', PHASES)
+def test_call_counts_match_the_baseline(runs, baseline, phase):
+    calls = {step: entry['calls'] for step, entry in runs[phase]['steps'].items()}
+    expected = {step: entry['calls'] for step, entry in baseline['phases'][phase]['steps'].items()}
+    assert calls == expected
+
+
+def test_no_regressions_against_the_baseline(runs, baseline):
+    phases = {phase: {'seconds': run['seconds'], 'steps': run['steps']} for phase, run in runs.items()}
+    assert compare(phases, baseline, TOLERANCE, SLACK, SLACK_RATIO) == []
+
+
+def test_slowdowns_scale_with_the_baseline():
+    baseline = {'phases': {'fresh': {'seconds': 10.0, 'steps': {
+        'short': {'seconds': 0.1, 'calls': 1}, 'long': {'seconds': 5.0, 'calls': 1}}}}}
+
+    def run(phase_seconds, short, long):
+        return {'fresh': {'seconds': phase_seconds, 'steps': {
+            'short': {'seconds': short, 'calls': 1}, 'long': {'seconds': long, 'calls': 1}}}}
+
+    assert compare(run(12.0, 1.0, 19.0), baseline, TOLERANCE, SLACK, SLACK_RATIO) == []
+    assert compare(run(12.0, 1.2, 21.0), baseline, TOLERANCE, SLACK, SLACK_RATIO) == \
+        ['fresh/short: 1.20s (baseline 0.10s)', 'fresh/long: 21.00s (baseline 5.00s)']
+    # The phase is checked on its own: slow steps outside the baseline still count
+    assert compare(run(41.0, 0.1, 5.0), baseline, TOLERANCE, SLACK, SLACK_RATIO) == \
+        ['fresh: 41.00s wall (baseline 10.00s)']
+
+
+def test_upgrade_upgrades_released_versions(runs, sim):
+    sim.release('jq', '1.7.1')
+    sim.release('go', '1.23.0')
+    sim.release('iterm2', '3.5.4')
+    sim.release('libgit2', '1.8.0')  # Installed as a dependency only: not upgraded
+    sim.reset_calls()
+    returncode, _ = run_setup(sim, ['--upgrade'], sim.root / 'setup-upgrade.log')
+    assert returncode == 0, (sim.root / 'setup-upgrade.log').read_text()[-3000:]
+
+    state = sim.state()
+    assert state['formulae']['jq'] == '1.7.1'
+    assert state['formulae']['go'] == '1.23.0'  # Configured by its alias golang
+    assert state['casks']['iterm2'] == '3.5.4'
+    assert state['formulae']['libgit2'] == '1.0.0'
+    upgrades = [call['args'] for call in sim.calls() if call['tool'] == 'brew' and call['args'][:1] == ['upgrade']]
+    assert len(upgrades) == 1
+    assert set(upgrades[0][1:]) == {'go', 'iterm2', 'jq'}
@@ -0,0 +1,111 @@
+"""installers.get_installer against a local HTTP server"""
+
+import hashlib
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import installers
+import utils
+from installers import InstallerVerificationError, get_installer
+
+SCRIPT = b'#!/bin/sh\necho "installed"\n'
+DIGEST = hashlib.sha256(SCRIPT).hexdigest()
+
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Serve install.sh from a temporary directory; server.stop() takes it offline"""
+    root = tmp_path / 'www'
+    root.mkdir()
+    (root / 'install.sh').write_bytes(SCRIPT)
+    handler = type('Handler', (CountingHandler,), {'requests': 0})
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=str(root)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{httpd.server_address[1]}/install.sh"
+    server.root = root
+    server.requests = lambda: handler.requests
+    server.stop = lambda: (httpd.shutdown(), httpd.server_close())
+    yield server
+    if thread.is_alive():
+        server.stop()
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    """Keep the installer cache and the shared circuit breaker out of the real state"""
+    cache_dir = tmp_path / 'installers'
+    monkeypatch.setattr(installers, 'CACHE_DIR', cache_dir)
+    monkeypatch.setattr(installers, 'INDEX_FILE', cache_dir / 'index.json')
+    monkeypatch.setattr(installers, 'run_with_retry', partial(utils.run_with_retry,
+                                                              breaker=utils.CircuitBreaker(), attempts=1))
+    monkeypatch.setenv(utils.NON_INTERACTIVE_ENV, '1')
+    return cache_dir
+
+
+def config(url, **entry):
+    return {'installers': {'test': {'url': url, **entry}}}
+
+
+def test_pinned_installer_is_cached_and_reused_offline(server, cache):
+    path = get_installer('test', config(server.url, sha256=DIGEST))
+    assert path == cache / DIGEST
+    assert path.read_bytes() == SCRIPT
+    assert server.requests() == 1
+
+    # Cache hit: no second download
+    assert get_installer('test', config(server.url, sha256=DIGEST)) == path
+    assert server.requests() == 1
+
+    server.stop()
+    assert get_installer('test', config(server.url, sha256=DIGEST)) == path
+
+
+def test_digest_mismatch_is_refused(server, cache):
+    with pytest.raises(InstallerVerificationError, match='checksum mismatch'):
+        get_installer('test', config(server.url, sha256='0' * 64))
+    assert not (cache / DIGEST).exists()
+
+    # A tampered cached copy is not used either: it is downloaded and checked again
+    get_installer('test', config(server.url, sha256=DIGEST))
+    (cache / DIGEST).write_bytes(b'#!/bin/sh\nrm -rf /\n')
+    (server.root / 'install.sh').write_bytes(b'#!/bin/sh\necho "tampered"\n')
+    with pytest.raises(InstallerVerificationError):
+        get_installer('test', config(server.url, sha256=DIGEST))
+
+
+def test_unpinned_installer_is_refused_unattended(server, cache):
+    with pytest.raises(InstallerVerificationError, match='not pinned'):
+        get_installer('test', config(server.url))
+    assert not (cache / DIGEST).exists()
+
+
+def test_unpinned_installer_asks_interactively(server, cache, monkeypatch):
+    monkeypatch.delenv(utils.NON_INTERACTIVE_ENV)
+    answers = iter(['n', 'y'])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    with pytest.raises(InstallerVerificationError):
+        get_installer('test', config(server.url))
+    assert get_installer('test', config(server.url)) == cache / DIGEST
+
+
+def test_allowed_unpinned_installer_is_reused_offline(server, cache):
+    path = get_installer('test', config(server.url, allow_unpinned=True))
+    assert path == cache / DIGEST
+    server.stop()
+    # Accepted once, then served from the cache without asking again
+    assert get_installer('test', config(server.url)) == path
@@ -0,0 +1,68 @@
+"""miniyaml resolves plain scalars the way PyYAML's safe_load does"""
+
+import datetime
+import math
+
+import pytest
+
+import miniyaml
+
+# Plain scalar -> what yaml.safe_load returns for it
+SCALARS = {
+    '010': 8,
+    '007': 7,
+    '08': '08',
+    '0x1F': 31,
+    '0b101': 5,
+    '-0o7': '-0o7',
+    '1_000': 1000,
+    '+12': 12,
+    '1:30': 90,
+    '1e3': '1e3',
+    '1.0e3': '1.0e3',
+    '1.0e+3': 1000.0,
+    '1.5': 1.5,
+    '1.': 1.0,
+    '-.5': '-.5',
+    '.5': 0.5,
+    '-.inf': -math.inf,
+    '3.12': 3.12,
+    '2024-01-05': datetime.date(2024, 1, 5),
+    '2024-1-5': '2024-1-5',
+    '2001-12-14 21:59:43.10 Z': datetime.datetime(2001, 12, 14, 21, 59, 43, 100000, datetime.timezone.utc),
+    '2001-12-14t21:59:43.10-05:00': datetime.datetime(
+        2001, 12, 14, 21, 59, 43, 100000, datetime.timezone(-datetime.timedelta(hours=5))),
+    'yes': True,
+    'Off': False,
+    'TRUE': True,
+    'tRUE': 'tRUE',
+    'Null': None,
+    'nULL': 'nULL',
+    '~': None,
+    'python@3.12': 'python@3.12',
+}
+
+
+@pytest.mark.parametrize('text, expected', SCALARS.items())
+def test_plain_scalars(text, expected):
+    assert miniyaml.loads(f"key: {text}\n") == {'key': expected}
+    assert miniyaml.loads(f"- {text}\n") == [expected]
+
+
+def test_quoted_scalars_stay_strings():
+    assert miniyaml.loads("a: '010'\nb: \"2024-01-05\"\nc: 'yes'\n") == {'a': '010', 'b': '2024-01-05', 'c': 'yes'}
+
+
+def test_nan():
+    assert math.isnan(miniyaml.loads("key: .NaN\n")['key'])
+
+
+def test_invalid_date_is_an_error():
+    with pytest.raises(miniyaml.MiniYAMLError):
+        miniyaml.loads("key: 2024-02-30\n")
+
+
+def test_matches_pyyaml():
+    yaml = pytest.importorskip('yaml')
+    document = ''.join(f"k{i}: {text}\n" for i, text in enumerate(SCALARS))
+    assert miniyaml.loads(document) == yaml.safe_load(document)
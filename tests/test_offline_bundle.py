@@ -0,0 +1,124 @@
+"""Offline bundles: verification, unsafe archives and an install from a bundle"""
+
+import hashlib
+import io
+import json
+import subprocess
+import sys
+import tarfile
+
+import pytest
+
+import offline_bundle
+from offline_bundle import BUNDLE_FORMAT_VERSION, MANIFEST_NAME, BundleError, open_bundle, verify_bundle
+from simulator import Simulator
+from simulator.__main__ import PROJECT_ROOT, SETUP_ARGS, verify
+
+FILES = {
+    'installers/homebrew.sh': b'#!/bin/sh\necho "installed"\n',
+    'brew-cache/jq--1.0.0.tar.gz': b'\0' * 4096,
+}
+
+
+def manifest_for(files):
+    return {
+        'version': BUNDLE_FORMAT_VERSION,
+        'files': {name: {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+                  for name, data in files.items()},
+    }
+
+
+def write_bundle(path, files, manifest=None, members=()):
+    """Write a bundle archive: files, their manifest and any extra TarInfo members"""
+    manifest = manifest or manifest_for(files)
+    with tarfile.open(path, 'w:gz') as tar:
+        for name, data in [(MANIFEST_NAME, json.dumps(manifest).encode()), *files.items()]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        for member in members:
+            tar.addfile(member, io.BytesIO(b'x' * member.size) if member.isfile() else None)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def extract_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'bundles'
+    monkeypatch.setattr(offline_bundle, 'EXTRACT_DIR', directory)
+    return directory
+
+
+def test_intact_bundle_is_verified(tmp_path):
+    bundle = open_bundle(write_bundle(tmp_path / 'ok.tar.gz', FILES))
+    assert set(bundle.manifest['files']) == set(FILES)
+    assert (bundle.root / 'installers/homebrew.sh').read_bytes() == FILES['installers/homebrew.sh']
+
+
+def test_tampered_file_is_rejected(tmp_path):
+    tampered = {**FILES, 'installers/homebrew.sh': b'#!/bin/sh\necho "tampered"\n'}
+    with pytest.raises(BundleError, match='failed verification: installers/homebrew.sh'):
+        open_bundle(write_bundle(tmp_path / 'tampered.tar.gz', tampered, manifest_for(FILES)))
+
+
+def test_file_missing_from_the_archive_is_rejected(tmp_path):
+    files = {name: data for name, data in FILES.items() if name != 'brew-cache/jq--1.0.0.tar.gz'}
+    with pytest.raises(BundleError, match='failed verification: brew-cache/jq'):
+        open_bundle(write_bundle(tmp_path / 'missing.tar.gz', files, manifest_for(FILES)))
+
+
+def test_file_without_a_manifest_entry_is_rejected(tmp_path):
+    manifest = manifest_for({'installers/homebrew.sh': FILES['installers/homebrew.sh']})
+    with pytest.raises(BundleError, match='not in manifest: brew-cache/jq'):
+        open_bundle(write_bundle(tmp_path / 'unlisted.tar.gz', FILES, manifest))
+
+
+def test_tampered_extracted_bundle_fails_verify(tmp_path):
+    bundle = open_bundle(write_bundle(tmp_path / 'ok.tar.gz', FILES))
+    (bundle.root / 'brew-cache/jq--1.0.0.tar.gz').write_bytes(b'\1' * 4096)
+    with pytest.raises(BundleError):
+        verify_bundle(bundle.root)
+
+
+@pytest.mark.parametrize('name, kind', [
+    ('../escaped.sh', tarfile.REGTYPE),
+    ('/tmp/absolute.sh', tarfile.REGTYPE),
+    ('installers/link.sh', tarfile.SYMTYPE),
+])
+def test_unsafe_members_are_rejected(tmp_path, name, kind):
+    member = tarfile.TarInfo(name)
+    member.type = kind
+    if kind == tarfile.SYMTYPE:
+        member.linkname = '/etc/passwd'
+    else:
+        member.size = 4
+    with pytest.raises(BundleError, match='Unsafe path'):
+        open_bundle(write_bundle(tmp_path / 'unsafe.tar.gz', FILES, members=[member]))
+    assert not (tmp_path / 'escaped.sh').exists()
+    assert not (tmp_path / 'bundles' / 'escaped.sh').exists()
+
+
+def test_offline_install_from_a_bundle(tmp_path):
+    """Build a bundle on a simulated Mac, then set up one without network from it"""
+    online = Simulator(root=tmp_path / 'online')
+    offline = Simulator(root=tmp_path / 'offline', network=False)
+    bundle = tmp_path / 'lab.tar.gz'
+
+    result = subprocess.run([sys.executable, str(PROJECT_ROOT / 'setup.py'), '--non-interactive',
+                             'bundle', '-o', str(bundle)],
+                            env=online.env(), stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                            cwd=PROJECT_ROOT)
+    assert result.returncode == 0, result.stdout[-3000:]
+    with tarfile.open(bundle) as tar:
+        names = tar.getnames()
+    assert any(name.startswith('git/') and name.endswith('-ohmyzsh.bundle') for name in names)
+
+    result = subprocess.run([sys.executable, str(PROJECT_ROOT / 'setup.py'), *SETUP_ARGS,
+                             '--offline', str(bundle)],
+                            env=offline.env(), stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                            cwd=PROJECT_ROOT)
+    assert result.returncode == 0, result.stdout[-3000:]
+    assert [check for check in verify(offline, result.returncode, None) if check[1] == 'failed'] == []
+    assert 'jq' in offline.state()['formulae']
+    # Nothing was downloaded: every failed call would be a network access
+    assert [call for call in offline.calls() if call['returncode'] not in (0, 1)] == []
+    assert (offline.home / '.oh-my-zsh' / 'custom' / 'plugins' / 'zsh-autosuggestions' / 'README.md').exists()
@@ -0,0 +1,165 @@
+"""prewarm_caches with stub go and npm tools and a directory mirror"""
+
+import json
+import os
+import re
+import sys
+
+import pytest
+
+from prewarm_caches import Toolchain, benchmark, plan_jobs, prewarm_caches as warm, warm_caches
+
+# Seconds a stub tool takes per package it downloads from the "registry"
+DOWNLOAD_SECONDS = 0.1
+
+GO = '''
+import os, shutil, sys, time
+from pathlib import Path
+args = sys.argv[1:]
+cache = Path(os.environ.get('GOMODCACHE') or Path.home() / 'go' / 'pkg' / 'mod')
+if args[:1] == ['env']:
+    print({'GOMODCACHE': str(cache), 'GOPROXY': os.environ.get('GOPROXY', 'https://proxy.golang.org,direct')}[args[1]])
+    sys.exit(0)
+modfile = next(arg.split('=', 1)[1] for arg in args if arg.startswith('-modfile='))
+mirrors = [Path(entry[len('file://'):]) for entry in os.environ.get('GOPROXY', '').split(',')
+           if entry.startswith('file://')]
+for line in Path(modfile).read_text().splitlines():
+    parts = line.split()
+    if len(parts) != 2 or '/' not in parts[0]:
+        continue
+    module, version = parts
+    target = cache / 'cache' / 'download' / module / '@v' / f"{version}.zip"
+    if target.exists():
+        continue
+    target.parent.mkdir(parents=True, exist_ok=True)
+    mirrored = [mirror / module / '@v' / f"{version}.zip" for mirror in mirrors]
+    source = next((path for path in mirrored if path.exists()), None)
+    if source:
+        shutil.copy(source, target)
+    else:
+        time.sleep(DOWNLOAD_SECONDS)
+        target.write_bytes(b'm' * 8192)
+'''
+
+NPM = '''
+import json, os, shutil, sys, time
+from pathlib import Path
+args = sys.argv[1:]
+cache = Path(args[args.index('--cache') + 1]) if '--cache' in args else Path.home() / '.npm'
+store = cache / '_cacache'
+if args[:3] == ['config', 'get', 'cache']:
+    print(cache)
+    sys.exit(0)
+store.mkdir(parents=True, exist_ok=True)
+if args[:2] == ['cache', 'add']:
+    for tarball in args[2:args.index('--cache')]:
+        shutil.copy(tarball, store / Path(tarball).name)
+    sys.exit(0)
+lock = json.loads(Path('package-lock.json').read_text())
+for path, package in lock['packages'].items():
+    if not path:
+        continue
+    tarball = store / f"{path.split('node_modules/')[-1]}-{package['version']}.tgz"
+    if not tarball.exists():
+        time.sleep(DOWNLOAD_SECONDS)
+        tarball.write_bytes(b'n' * 4096)
+'''
+
+GO_MODULES = {'github.com/pkg/errors': 'v0.9.1', 'golang.org/x/sync': 'v0.7.0',
+              'github.com/google/uuid': 'v1.6.0'}
+NPM_PACKAGES = {'left-pad': '1.3.0', 'is-odd': '3.0.1'}
+
+
+@pytest.fixture
+def tools(tmp_path, monkeypatch):
+    """Stub go and npm first on PATH, with their default caches in a temporary HOME"""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    for name, body in (('go', GO), ('npm', NPM)):
+        stub = bin_dir / name
+        stub.write_text(f"#!{sys.executable}\nDOWNLOAD_SECONDS = {DOWNLOAD_SECONDS}\n{body}")
+        stub.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}:{os.environ['PATH']}")
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    monkeypatch.delenv('GOMODCACHE', raising=False)
+    monkeypatch.delenv('GOPROXY', raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def projects(tmp_path):
+    go_project = tmp_path / 'src' / 'service'
+    go_project.mkdir(parents=True)
+    (go_project / 'go.mod').write_text('module example.com/service\n\ngo 1.22\n\nrequire (\n' +
+                                       ''.join(f"\t{module} {version}\n" for module, version in GO_MODULES.items()) +
+                                       ')\n')
+    web = tmp_path / 'src' / 'web'
+    web.mkdir(parents=True)
+    (web / 'package.json').write_text(json.dumps({'name': 'web'}))
+    (web / 'package-lock.json').write_text(json.dumps({'packages': {
+        '': {'name': 'web'},
+        **{f"node_modules/{name}": {'version': version} for name, version in NPM_PACKAGES.items()},
+    }}))
+    return {'go': [str(go_project / 'go.mod')], 'npm': [str(web)]}
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """One Go module and one npm tarball in a file-based mirror"""
+    root = tmp_path / 'mirror'
+    module = root / 'go' / 'github.com/pkg/errors' / '@v'
+    module.mkdir(parents=True)
+    (module / 'v0.9.1.zip').write_bytes(b'z' * 8192)
+    (root / 'npm').mkdir()
+    (root / 'npm' / 'left-pad-1.3.0.tgz').write_bytes(b't' * 4096)
+    return root
+
+
+def test_toolchain_requires_cache_dir_and_commands():
+    class Incomplete(Toolchain):
+        name = 'incomplete'
+
+        def cache_dir(self):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_caches_are_warmed_from_the_mirror_first(tools, projects, mirror):
+    plans = plan_jobs({'manifests': projects, 'mirror_dir': str(mirror)})
+    assert [(toolchain.name, mirror_dir) for toolchain, _, mirror_dir in plans] == \
+        [('go', mirror / 'go'), ('npm', mirror / 'npm')]
+
+    before, after, failed = warm_caches(plans, parallel=2, timeout=60)
+    assert failed == []
+    assert before == {'go': 0, 'npm': 0}
+    assert after == {'go': 8192 * len(GO_MODULES), 'npm': 4096 * len(NPM_PACKAGES)}
+    gomodcache = tools / 'home' / 'go' / 'pkg' / 'mod' / 'cache' / 'download'
+    assert (gomodcache / 'github.com/pkg/errors' / '@v' / 'v0.9.1.zip').read_bytes() == b'z' * 8192
+    assert (tools / 'home' / '.npm' / '_cacache' / 'left-pad-1.3.0.tgz').read_bytes() == b't' * 4096
+
+
+def test_benchmark_reports_cold_and_warm_fetches(tools, projects, capsys):
+    assert warm({'manifests': projects}, run_benchmark=True)
+    report = capsys.readouterr().out.splitlines()
+    assert any('Go module cache' in line and '(+24.0 KB)' in line for line in report)
+    assert any('npm cache' in line and '(+8.0 KB)' in line for line in report)
+    # One cold/warm/saved row per manifest
+    for manifest in ('go.mod', 'package-lock.json'):
+        row = next(line for line in report if line.rstrip().endswith('s') and manifest in line)
+        assert len(re.findall(r'\d+\.\ds', row)) == 3
+
+    plans = plan_jobs({'manifests': projects})
+    results = {name: (cold, warm_seconds) for name, _, cold, warm_seconds in benchmark(plans, timeout=60)}
+    for name, packages in (('go', GO_MODULES), ('npm', NPM_PACKAGES)):
+        cold, warm_seconds = results[name]
+        assert cold >= DOWNLOAD_SECONDS * len(packages)
+        assert warm_seconds < cold
+
+
+def test_failed_manifest_is_reported(tools, projects, tmp_path):
+    broken = tmp_path / 'src' / 'broken'
+    broken.mkdir()
+    (broken / 'package-lock.json').write_text('not json')
+    assert not warm({'manifests': {'npm': [str(broken)]}})
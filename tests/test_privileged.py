@@ -0,0 +1,61 @@
+"""Privileged helper: action validation and startup, run as the current user"""
+
+import getpass
+import os
+import time
+
+import pytest
+
+import privileged
+from privileged import PrivilegedBatch, PrivilegedError, PrivilegedHelper, action_commands
+
+
+def test_mkdir_leaves_existing_paths_alone(tmp_path):
+    assert action_commands({'action': 'mkdir', 'path': '/etc', 'owner': 'nobody'}) == []
+    assert action_commands({'action': 'mkdir', 'path': str(tmp_path), 'owner': 'nobody'}) == []
+
+
+def test_mkdir_chowns_only_the_directory_it_creates(tmp_path):
+    path = tmp_path / 'a' / 'team'
+    commands = action_commands({'action': 'mkdir', 'path': str(path), 'owner': 'nobody', 'mode': 0o750})
+    assert commands == [['mkdir', '-p', str(tmp_path / 'a')],
+                        ['mkdir', '-m', '750', str(path)],
+                        ['chown', 'nobody', str(path)]]
+
+
+@pytest.mark.parametrize('path', ['relative/dir', '/tmp/../etc', ''])
+def test_mkdir_rejects_other_paths(path):
+    with pytest.raises(PrivilegedError):
+        action_commands({'action': 'mkdir', 'path': path})
+
+
+@pytest.fixture
+def helper(monkeypatch):
+    """Run the helper as the current user"""
+    monkeypatch.setenv(privileged.PRIVILEGED_RUNNER_ENV, '')
+    helper = PrivilegedHelper()
+    yield helper
+    helper.stop()
+
+
+def test_helper_runs_batches(helper, tmp_path):
+    assert helper.start()
+    batch = PrivilegedBatch()
+    batch.mkdir(tmp_path / 'new' / 'dir', owner=getpass.getuser())
+    batch.mkdir(tmp_path)
+    results = batch.run()
+    assert [result['ok'] for result in results] == [True, True]
+    assert (tmp_path / 'new' / 'dir').is_dir()
+    directory = helper.directory
+    helper.stop()
+    assert not os.path.exists(directory)
+    assert privileged.PRIVILEGED_SOCKET_ENV not in os.environ
+
+
+def test_helper_that_exits_fails_fast(monkeypatch):
+    monkeypatch.setenv(privileged.PRIVILEGED_RUNNER_ENV, 'false')
+    helper = PrivilegedHelper()
+    start = time.monotonic()
+    assert not helper.start()
+    assert time.monotonic() - start < privileged.STARTUP_TIMEOUT / 3
+    assert helper.directory is None
@@ -0,0 +1,69 @@
+"""provision_fleet.py against a local stand-in for ssh"""
+
+import json
+import subprocess
+import sys
+import time
+
+from conftest import PROJECT_ROOT
+
+import provision_fleet
+
+SCRIPT = PROJECT_ROOT / 'scripts' / 'provision_fleet.py'
+
+
+def make_ssh(tmp_path, body='exec sh -c "$2"'):
+    """An executable taking `ssh TARGET COMMAND` and running COMMAND locally"""
+    path = tmp_path / 'fake-ssh'
+    path.write_text(f'#!/bin/sh\n{body}\n')
+    path.chmod(0o755)
+    return [str(path)]
+
+
+def provision(tmp_path, env, ssh, *extra):
+    inventory = tmp_path / 'inventory.yaml'
+    inventory.write_text(f"defaults:\n  remote_dir: {tmp_path / 'remote'}\nhosts:\n  - host: mac-01.local\n")
+    results = tmp_path / 'results.json'
+    start = time.monotonic()
+    process = subprocess.run([sys.executable, str(SCRIPT), str(inventory), '--ssh', ssh[0],
+                              '--json', str(results), *extra],
+                             env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    return process, json.loads(results.read_text()), time.monotonic() - start
+
+
+def test_ssh_streams_output_and_exit_code(tmp_path, capsys):
+    ssh = make_ssh(tmp_path)
+    assert provision_fleet.ssh(ssh, 'mac', 'echo one; echo two; exit 3', 'mac') == 3
+    assert capsys.readouterr().out.splitlines()[-2:] == ['\x1b[0;34m[mac]\x1b[0m one', '\x1b[0;34m[mac]\x1b[0m two']
+
+
+def test_ssh_timeout_fires_while_the_command_is_silent(tmp_path):
+    ssh = make_ssh(tmp_path, body='sleep 30')
+    start = time.monotonic()
+    assert provision_fleet.ssh(ssh, 'mac', 'true', 'mac', timeout=1) == 124
+    assert time.monotonic() - start < 5
+
+
+def test_ssh_timeout_fires_while_the_command_prints(tmp_path):
+    ssh = make_ssh(tmp_path, body='while true; do echo tick; sleep 0.1; done')
+    start = time.monotonic()
+    assert provision_fleet.ssh(ssh, 'mac', 'true', 'mac', timeout=1) == 124
+    assert time.monotonic() - start < 5
+
+
+def test_provision_pushes_and_runs_setup(tmp_path, home_env):
+    process, results, _ = provision(tmp_path, home_env, make_ssh(tmp_path), '--', 'steps')
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert results[0]['status'] == 'ok'
+    assert (tmp_path / 'remote' / 'setup.py').exists()
+    assert json.loads((tmp_path / 'remote' / 'config.yaml').read_text())['brew_formulae']
+    assert 'install_homebrew' in process.stdout
+
+
+def test_provision_reports_a_hung_host(tmp_path, home_env):
+    ssh = make_ssh(tmp_path, body='cat >/dev/null; sleep 30')
+    process, results, elapsed = provision(tmp_path, home_env, ssh, '--timeout', '2')
+    assert process.returncode == 1
+    assert results[0]['status'] == 'failed'
+    assert results[0]['exit_code'] == 124
+    assert elapsed < 10
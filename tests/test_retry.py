@@ -0,0 +1,137 @@
+"""run_with_retry and CircuitBreaker against a command that fails the first K times"""
+
+import subprocess
+import sys
+
+import pytest
+
+import utils
+from utils import CircuitBreaker, CircuitOpenError, classify_failure, run_with_retry
+
+FLAKY = '''
+import sys
+from pathlib import Path
+counter = Path(sys.argv[1])
+calls = int(counter.read_text()) + 1 if counter.exists() else 1
+counter.write_text(str(calls))
+if calls <= int(sys.argv[2]):
+    sys.stderr.write(sys.argv[3] + "\\n")
+    sys.exit(1)
+print("ok")
+'''
+
+URL = 'https://mirror.example.com/pkg.tar.gz'
+
+
+@pytest.fixture
+def flaky(tmp_path):
+    """Build a command that fails `failures` times with `message`, then succeeds"""
+    script = tmp_path / 'flaky.py'
+    script.write_text(FLAKY)
+    counter = tmp_path / 'calls'
+
+    def make(failures, message='curl: (6) Could not resolve host: mirror.example.com'):
+        return [sys.executable, str(script), str(counter), str(failures), message, URL]
+    make.calls = lambda: int(counter.read_text()) if counter.exists() else 0
+    return make
+
+
+@pytest.fixture
+def sleeps():
+    """Fake sleep that records the backoff delays"""
+    return []
+
+
+def test_transient_failures_are_retried_with_backoff(flaky, sleeps):
+    result = run_with_retry(flaky(2), breaker=CircuitBreaker(), sleep=sleeps.append)
+    assert result.returncode == 0
+    assert result.stdout == 'ok\n'
+    assert flaky.calls() == 3
+    assert len(sleeps) == 2
+    assert all(0 <= delay <= utils.RETRY_BASE_DELAY * 2 ** n for n, delay in enumerate(sleeps))
+
+
+def test_retries_stop_after_the_attempt_limit(flaky, sleeps):
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        run_with_retry(flaky(10), attempts=4, breaker=CircuitBreaker(), sleep=sleeps.append)
+    assert 'Could not resolve host' in error.value.stderr
+    assert flaky.calls() == 4
+    assert len(sleeps) == 3
+
+
+def test_permanent_failures_are_not_retried(flaky, sleeps):
+    result = run_with_retry(flaky(1, 'Error: No available formula with the name "nope"'),
+                            check=False, breaker=CircuitBreaker(), sleep=sleeps.append)
+    assert result.returncode == 1
+    assert flaky.calls() == 1
+    assert sleeps == []
+
+
+@pytest.mark.parametrize('cmd, returncode, output, category', [
+    (['curl', '-fsSL', URL], 6, '', 'dns'),
+    (['curl', '-fsSL', URL], 28, '', 'connection'),
+    (['curl', '-fsSL', URL], 22, 'The requested URL returned error: 503', 'http_5xx'),
+    (['git', 'clone', URL], 128, 'fatal: early EOF', 'git_eof'),
+    (['brew', 'install', 'x'], 1, 'SSL_ERROR_SYSCALL in connection', 'tls'),
+    (['curl', '-fsSL', URL], 22, 'The requested URL returned error: 404', None),
+    (['brew', 'install', 'x'], 1, 'Error: No available formula', None),
+])
+def test_classify_failure(cmd, returncode, output, category):
+    assert classify_failure(cmd, returncode, output) == category
+
+
+def test_breaker_opens_after_consecutive_failed_commands(flaky, sleeps):
+    breaker = CircuitBreaker(threshold=2, cooldown=300)
+    for _ in range(2):
+        run_with_retry(flaky(100), attempts=2, check=False, breaker=breaker, sleep=sleeps.append)
+    calls = flaky.calls()
+    assert calls == 4
+
+    with pytest.raises(CircuitOpenError):
+        run_with_retry(flaky(100), breaker=breaker, sleep=sleeps.append)
+    assert flaky.calls() == calls
+
+    # Other endpoints are unaffected
+    assert run_with_retry([sys.executable, '-c', 'pass'], endpoint='other.example.com',
+                          breaker=breaker, sleep=sleeps.append).returncode == 0
+
+
+def test_breaker_half_opens_after_cooldown(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    breaker.record_failure('mirror')
+    assert breaker.allow('mirror')
+    breaker.record_failure('mirror')
+    assert not breaker.allow('mirror')
+
+    now[0] += 60
+    assert breaker.allow('mirror')
+    # One more failure while half-open reopens the circuit
+    breaker.record_failure('mirror')
+    assert not breaker.allow('mirror')
+
+    now[0] += 60
+    assert breaker.allow('mirror')
+    breaker.record_success('mirror')
+    breaker.record_failure('mirror')
+    assert breaker.allow('mirror')
+
+
+def test_permanent_failures_do_not_count_towards_the_breaker(flaky, sleeps):
+    breaker = CircuitBreaker(threshold=2)
+    for _ in range(3):
+        run_with_retry(flaky(100, 'The requested URL returned error: 404'),
+                       check=False, breaker=breaker, sleep=sleeps.append)
+    assert breaker.allow('mirror.example.com')
+    breaker.record_failure('mirror.example.com')
+    assert breaker.allow('mirror.example.com')
+
+
+def test_success_resets_the_failure_count(flaky, sleeps):
+    breaker = CircuitBreaker(threshold=2)
+    # Fails (transiently, with no retry left) once, then succeeds
+    run_with_retry(flaky(1), attempts=1, check=False, breaker=breaker, sleep=sleeps.append)
+    run_with_retry(flaky(1), breaker=breaker, sleep=sleeps.append)
+    breaker.record_failure('mirror.example.com')
+    assert breaker.allow('mirror.example.com')
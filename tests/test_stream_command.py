@@ -0,0 +1,92 @@
+"""stream_command and OutputTail: bounded memory, the kept tail and timeouts"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import PROJECT_ROOT
+
+from utils import STREAM_TAIL_BYTES, OutputTail, stream_command
+
+STREAM_MB = 300
+
+# Streams STREAM_MB of output through stream_command and reports its own peak RSS
+MEASURE = f'''
+import json, resource, sys
+sys.path.insert(0, {str(PROJECT_ROOT / 'scripts')!r})
+from utils import stream_command
+result = stream_command(['sh', '-c', 'yes "0123456789abcdefghijklmnopqrstuvwxyz0123456789abcdefghijklmnopqrstuvwxyz" '
+                         '| head -c {STREAM_MB * 1024 * 1024}; echo; echo last line'], progress=True)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'tail': result.stdout, 'peak': peak * (1 if sys.platform == 'darwin' else 1024)}}))
+'''
+
+
+def process_state(pid):
+    """ps state of a process, '' if it is gone"""
+    result = subprocess.run(['ps', '-o', 'stat=', '-p', str(pid)], capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def test_tail_keeps_the_last_bytes():
+    tail = OutputTail(limit=10)
+    data = b''
+    for chunk in [b'abc', b'defghijk', b'', b'lmnopqrstuvwxyz', b'0', b'123']:
+        tail.append(chunk)
+        data += chunk
+        assert tail.text() == data[-10:].decode()
+    assert tail.total == len(data)
+    # Whole chunks older than the limit are dropped
+    assert sum(len(chunk) for chunk in tail._chunks) - len(tail._chunks[0]) < tail.limit
+
+
+def test_tail_of_a_single_large_chunk():
+    tail = OutputTail(limit=4)
+    tail.append(b'x' * 1000 + b'tail')
+    assert tail.text() == 'tail'
+
+
+def test_stream_command_result_holds_the_tail_of_each_stream():
+    script = 'for i in $(seq 1 20000); do echo "line $i"; echo "err $i" >&2; done'
+    result = stream_command(['sh', '-c', script], progress=True, tail_bytes=1024)
+    assert result.returncode == 0
+    assert len(result.stdout) == 1024
+    assert result.stdout.endswith('line 19999\nline 20000\n')
+    assert result.stderr.endswith('err 20000\n')
+
+
+def test_stream_command_memory_stays_flat():
+    result = subprocess.run([sys.executable, '-c', MEASURE], capture_output=True, text=True,
+                            env={**os.environ, 'MAC_BOOTSTRAP_LOG_FORMAT': 'json'})
+    assert result.returncode == 0, result.stderr
+    measured = json.loads(result.stdout.splitlines()[-1])
+    assert len(measured['tail']) == STREAM_TAIL_BYTES
+    assert measured['tail'].endswith('\nlast line\n')
+    # An interpreter with the scripts imported is ~20 MB; the output is 300 MB
+    assert measured['peak'] < 80 * 1024 * 1024
+
+
+def test_stream_command_timeout_kills_the_process_group(tmp_path):
+    pid_file = tmp_path / 'pid'
+    # The background sleep holds the output pipe open after the shell is killed
+    script = f'sleep 60 & echo $! > {pid_file}; echo started; wait'
+    start = time.monotonic()
+    result = stream_command(['sh', '-c', script], check=False, timeout=1)
+    assert time.monotonic() - start < 10
+    assert result.returncode < 0
+    assert result.stdout == 'started\n'
+    grandchild = int(pid_file.read_text())
+    for _ in range(50):
+        if process_state(grandchild) in ('', 'Z'):
+            break
+        time.sleep(0.1)
+    assert process_state(grandchild) in ('', 'Z')
+
+
+def test_stream_command_timeout_raises_with_check():
+    with pytest.raises(subprocess.TimeoutExpired):
+        stream_command(['sleep', '60'], timeout=0.5)
@@ -0,0 +1,85 @@
+"""upgrade_packages against canned `brew outdated` and `brew info --installed` output"""
+
+import json
+import subprocess
+
+import pytest
+
+import upgrade_packages
+
+OUTDATED = {
+    'formulae': [
+        {'name': 'go', 'installed_versions': ['1.22.1'], 'current_version': '1.23.0'},
+        {'name': 'python@3.12', 'installed_versions': ['3.12.1'], 'current_version': '3.12.4'},
+        {'name': 'jq', 'installed_versions': ['1.6'], 'current_version': '1.7.1'},
+        {'name': 'libgit2', 'installed_versions': ['1.7.1'], 'current_version': '1.8.0'},
+    ],
+    'casks': [
+        {'name': 'visual-studio-code', 'installed_versions': ['1.90.0'], 'current_version': '1.91.0'},
+    ],
+}
+
+INSTALLED = {
+    'formulae': [
+        {'name': 'go', 'full_name': 'go', 'aliases': ['golang'], 'oldnames': []},
+        {'name': 'python@3.12', 'full_name': 'python@3.12', 'aliases': ['python', 'python3'], 'oldnames': []},
+        {'name': 'jq', 'full_name': 'jq', 'aliases': [], 'oldnames': []},
+        {'name': 'libgit2', 'full_name': 'libgit2', 'aliases': [], 'oldnames': []},
+    ],
+    'casks': [
+        {'token': 'visual-studio-code', 'full_token': 'visual-studio-code', 'old_tokens': ['vscode']},
+    ],
+}
+
+CONFIG = {
+    'brew_formulae': ['golang', 'python', 'jq'],
+    'brew_casks': ['homebrew/cask/vscode'],
+    'personal_apps': [],
+}
+
+
+@pytest.fixture
+def brew(monkeypatch):
+    """Answer brew commands from canned JSON and record them"""
+    calls = []
+
+    def run_command(cmd, check=True, **kwargs):
+        calls.append(cmd)
+        if cmd[:2] == ['brew', 'outdated']:
+            return subprocess.CompletedProcess(cmd, 0, json.dumps(OUTDATED), '')
+        if cmd[:2] == ['brew', 'info']:
+            if brew.info_fails:
+                return subprocess.CompletedProcess(cmd, 1, '', 'Error: simulated failure')
+            return subprocess.CompletedProcess(cmd, 0, json.dumps(INSTALLED), '')
+        return subprocess.CompletedProcess(cmd, 0, '', '')
+
+    brew.info_fails = False
+    brew.calls = calls
+    monkeypatch.setattr(upgrade_packages, 'run_command', run_command)
+    monkeypatch.setattr(upgrade_packages, 'command_exists', lambda name: True)
+    monkeypatch.setattr(upgrade_packages, 'load_config', lambda: CONFIG)
+    return brew
+
+
+def upgraded(calls):
+    return next(cmd[2:] for cmd in calls if cmd[:2] == ['brew', 'upgrade'])
+
+
+def test_aliases_and_old_tokens_are_upgraded(brew):
+    assert upgrade_packages.upgrade_packages(greedy=False)
+    # libgit2 is outdated but not configured, so it is left alone
+    assert upgraded(brew.calls) == ['go', 'jq', 'python@3.12', 'visual-studio-code']
+    assert sum(cmd[:2] == ['brew', 'info'] for cmd in brew.calls) == 1
+
+
+def test_names_are_matched_as_written_without_brew_info(brew):
+    brew.info_fails = True
+    assert upgrade_packages.upgrade_packages(greedy=False)
+    assert upgraded(brew.calls) == ['jq']
+
+
+def test_configured_packages_map_to_the_names_brew_outdated_uses():
+    installed = (upgrade_packages.FormulaIndex(INSTALLED['formulae']), {'vscode': 'visual-studio-code'})
+    packages = upgrade_packages.get_configured_packages(CONFIG, installed)
+    assert packages == {'go': 'golang', 'python@3.12': 'python', 'jq': 'jq',
+                        'visual-studio-code': 'homebrew/cask/vscode'}